@@ -4,61 +4,166 @@
 from kerno.models.world import World
 from kerno.models.player import Player
 from kerno.models.actions import ActionHandler
+from kerno.models.content import ContentLibrary
+from kerno.models.timeline import Timeline
 from kerno.utils.game_io import GameIO
+from kerno.utils.i18n import DEFAULT_LOCALE, load_catalog
 from kerno.utils.text_utils import TextFormatter
 import sys
+import time
+
+# Number of recent turns the player can undo
+UNDO_LIMIT = 1000
+
+class _NullProfiler:
+    """Stands in for a disabled Profiler, so that profiling is only imported when requested"""
+
+    enabled = False
+
+    def phase(self, name, **labels):
+        return self
+
+    def observe(self, key, seconds):
+        pass
+
+    def count(self, name, **labels):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
 
 class GameEngine:
-    def __init__(self, world_file):
+    def __init__(self, world_file, profiler=None, profession="technician", locale=DEFAULT_LOCALE,
+                 skip_intro=False, bootstrap_cache=None, started=None):
+        # started: perf_counter() value at process start, for the time-to-first-prompt measurement
+        self.started = time.perf_counter() if started is None else started
+        self.time_to_first_prompt = None
+        self.profiler = profiler or _NullProfiler()
+        self.profession = profession
+        self.skip_intro = skip_intro
+        self.content = ContentLibrary()
         self.world = World(world_file)
+        self.world.bootstrap_cache = bootstrap_cache  # Reuse the preparsed world if unchanged
         self.player = Player()
+        self.player.messages = load_catalog(locale)
         self.action_handler = ActionHandler(self.world, self.player)
+        # Recent turns are recorded so the player can undo and redo commands
+        self.timeline = Timeline(self.world, self.player, limit=UNDO_LIMIT)
+        self.action_handler.timeline = self.timeline
         self.io = GameIO()
-        self.text_formatter = TextFormatter()
+        self.text_formatter = TextFormatter(self.player.messages)
         self.running = True
+        # Profiling also counts the records of the event stream by kind
+        self.event_feed = self.world.event_stream.subscribe() if self.profiler.enabled else None
         
     def initialize(self):
         """Initialize the game state, load starting room"""
-        self.world.load()
+        with self.profiler.phase("load"):
+            self.world.load()
         starting_room = self.world.get_starting_room()
         self.player.current_location = starting_room.id
+        self.player.knowledge.observe(f"room:{starting_room.id}", starting_room.name, starting_room.description)
+        # The profession pack is only parsed now that it has been chosen
+        routine = self.content.profession(self.profession).apply(self.world, self.player)
+        self.player.explored.visit(self.player.current_location)
+        self.timeline.record("start")
         self.io.clear_screen()
-        self.io.display_intro()
+        if not self.skip_intro:
+            self.io.display_intro()
+        for message in routine:
+            self.io.display_message(message)
     
     def game_loop(self):
         """Main game loop"""
         self.initialize()
+        advance = True
         
         while self.running:
-            # Process world events for this turn
-            events = self.world.process_events(self.player)
-            for event in events:
-                self.io.display_message(event)
+            profiler = self.profiler
+            room_id = self.player.current_location
+            turn_start = time.perf_counter()
+            
+            # Process world events for this turn (not on the turn undo or redo returned to)
+            events = []
+            if advance:
+                with profiler.phase("process_events", room=room_id):
+                    events = self.world.process_events(self.player)
+                    events += self.action_handler.check_dialogue()
+            with profiler.phase("output"):
+                for event in events:
+                    self.io.display_message(event)
+            if self.check_ending():
+                break
             
             # Display current room description
-            current_room = self.world.get_room(self.player.current_location)
-            room_desc = self.text_formatter.format_room_description(current_room, self.player)
-            self.io.display_message(room_desc)
+            current_room = self.world.get_location(self.player.current_location)
+            with profiler.phase("format_room_description", room=room_id):
+                room_desc = self.text_formatter.format_room_description(
+                    current_room, self.player, self.world.agents.names_in_room(current_room.id))
+            with profiler.phase("output"):
+                self.io.display_message(room_desc)
             
             # Get available actions and display prompt
-            available_actions = self.action_handler.get_available_actions()
+            with profiler.phase("get_available_actions", room=room_id):
+                available_actions = self.action_handler.get_available_actions()
+            if self.time_to_first_prompt is None:
+                self.time_to_first_prompt = time.perf_counter() - self.started
+                profiler.observe(("time_to_first_prompt", ()), self.time_to_first_prompt)
             self.io.display_prompt(available_actions)
             
-            # Get player input
-            user_input = self.io.get_input()
+            # Get player input (time spent waiting is tracked separately)
+            input_start = time.perf_counter()
+            with profiler.phase("input"):
+                user_input = self.io.get_input()
+            input_time = time.perf_counter() - input_start
             
             # Process player action
-            result = self.action_handler.process_action(user_input)
-            self.io.display_message(result.message)
+            command = user_input.split(maxsplit=1)[0].lower() if user_input.strip() else ""
+            if command not in self.action_handler.action_mapping and command not in self.action_handler.direction_mapping:
+                command = "other"  # Keep label cardinality bounded
+            with profiler.phase("process_action", command=command, room=room_id):
+                result = self.action_handler.process_action(user_input)
+            with profiler.phase("output"):
+                self.io.display_message(result.message)
+            # Undo and redo move along the recorded turns instead of adding one
+            advance = result.action_type not in ("undo", "redo")
+            if advance and result.action_type != "quit":
+                with profiler.phase("snapshot"):
+                    self.timeline.record()
+            
+            if profiler.enabled:
+                # Turn latency excludes the time the player spent typing
+                profiler.observe(("turn", ()), time.perf_counter() - turn_start - input_time)
+                profiler.count("commands", action=result.action_type)
+                profiler.count("turns", room=room_id)
+                for event in self.event_feed.poll():
+                    profiler.count("events", kind=event.kind)
             
             # Check if action was to quit
             if result.action_type == "quit":
                 self.running = False
+            elif self.check_ending():
+                break
+    
+    def check_ending(self):
+        """Show the ending the story reached (or the player's death), if any, and stop the game"""
+        if self.player.health <= 0:
+            self.io.display_message(self.player.messages("game.death"))
+            self.running = False
+            return True
+        ending = self.world.reached_ending(self.player)
+        if ending is None:
+            return False
+        self.io.display_message(self.player.messages("game.ending", name=ending.name, text=ending.text))
+        self.running = False
+        return True
     
     def cleanup(self):
         """Clean up resources before exiting"""
-        # Thank you for playing! Goodbye!
-        self.io.display_message("Dankon pro ludado! Ĝis revido!")
+        self.io.display_message(self.player.messages("game.goodbye"))
 
 if __name__ == "__main__":
     world_file = "data/tutorial_world.json"
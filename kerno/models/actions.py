@@ -1,18 +1,30 @@
 from dataclasses import dataclass
+from kerno.models.dialogue import DialogueSession
+from kerno.utils.event_stream import ActionPerformed, ItemMoved, PlayerMoved
 from kerno.utils.text_utils import TextFormatter
 
+# Lines of the help text, in order
+HELP_KEYS = ("help.header", "help.look", "help.examine", "help.take", "help.drop", "help.use",
+             "help.interact", "help.talk", "help.respond", "help.attack", "help.inventory", "help.notebook",
+             "help.map", "help.status", "help.undo", "help.redo", "help.move", "help.quit")
+
 @dataclass
 class ActionResult:
     success: bool
     message: str
     action_type: str = ""
     data: dict = None
+    events: list = None  # Typed records (kerno.utils.event_stream) published while handling the action
 
 class ActionHandler:
     def __init__(self, world, player):
         self.world = world
         self.player = player
-        self.text_formatter = TextFormatter()
+        self.messages = player.messages  # Texts in the language of the player's session
+        self.text_formatter = TextFormatter(self.messages)
+        self.dialogue_session = None  # Conversation in progress, if any
+        self.map_renderer = None  # Created on first use of the map
+        self.timeline = None  # Timeline of the session, for undo and redo (set by the engine)
         
         # Use Ido for directions
         self.directions = ["nordo", "sudo", "esto", "westo", "supre", "infre"]
@@ -26,7 +38,7 @@ class ActionHandler:
         }
         
         # Use Ido for basic actions
-        self.basic_actions = ["regardar", "examinar", "prenar", "pozar", "uzar", "interagar", "inventario", "statuso", "helpo", "finar"]
+        self.basic_actions = ["regardar", "examinar", "prenar", "pozar", "uzar", "interagar", "parolar", "respondar", "atakar", "inventario", "kayero", "mapo", "statuso", "desfacar", "rifacar", "helpo", "finar"]
         self.action_mapping = {
             "regardar": "look",
             "examinar": "examine",
@@ -34,8 +46,15 @@ class ActionHandler:
             "pozar": "drop",
             "uzar": "use",
             "interagar": "interact",
+            "parolar": "talk",
+            "respondar": "respond",
+            "atakar": "attack",
             "inventario": "inventory",
+            "kayero": "notebook",
+            "mapo": "map",
             "statuso": "status",
+            "desfacar": "undo",
+            "rifacar": "redo",
             "helpo": "help",
             "finar": "quit"
         }
@@ -45,7 +64,7 @@ class ActionHandler:
         actions = self.basic_actions.copy()
         
         # Get available movement directions
-        current_room = self.world.get_room(self.player.current_location)
+        current_room = self.world.get_location(self.player.current_location)
         if current_room:
             # Map English exit directions to Ido directions
             available_directions = []
@@ -64,6 +83,22 @@ class ActionHandler:
             for furniture in current_room.furniture:
                 actions.append(f"interagar {furniture['name']}")
                 actions.append(f"examinar {furniture['name']}")
+                
+            # Add conversation options for characters
+            for agent_id in self.world.agents.agents_in_room(current_room.id):
+                if agent_id in self.world.agents.dialogue:
+                    actions.append(f"parolar {self.world.agents.names[self.world.agents.index[agent_id]]}")
+            
+            # Add attack options for the agents that can fight
+            agents = self.world.agents
+            for row in agents.occupancy().get(current_room.id, []):
+                if agents.combat[row] >= 0:
+                    actions.append(f"atakar {agents.names[row]}")
+        
+        # Add the responses of a conversation in progress
+        if self.dialogue_session:
+            for number in range(1, len(self.dialogue_session.available_responses()) + 1):
+                actions.append(f"respondar {number}")
         
         # Add inventory item actions
         for item in self.player.inventory:
@@ -75,13 +110,22 @@ class ActionHandler:
         
     def process_action(self, action_input):
         """Process player action from input text in Ido"""
+        stream = self.world.event_stream
+        start = stream.sequence
+        result = self._dispatch(action_input)
+        stream.publish(ActionPerformed(self.world.turn_count, result.action_type, result.success))
+        result.events = stream.since(start)
+        return result
+        
+    def _dispatch(self, action_input):
+        """Run the handler for a command"""
         action_input = action_input.lower().strip()
         
         # Handle empty input
         if not action_input:
             return ActionResult(
                 success=False,
-                message="Quo vu volas facar?",  # What would you like to do?
+                message=self.messages("action.empty"),
                 action_type="none"
             )
         
@@ -111,23 +155,37 @@ class ActionHandler:
                 return self._handle_use(target)
             elif english_action == "interact":
                 return self._handle_interact(target)
+            elif english_action == "talk":
+                return self._handle_talk(target)
+            elif english_action == "respond":
+                return self._handle_respond(target)
+            elif english_action == "attack":
+                return self._handle_attack(target)
             elif english_action == "inventory":
                 return self._handle_inventory()
+            elif english_action == "notebook":
+                return self._handle_notebook(target)
+            elif english_action == "map":
+                return self._handle_map()
             elif english_action == "status":
                 return self._handle_status()
+            elif english_action == "undo":
+                return self._handle_undo()
+            elif english_action == "redo":
+                return self._handle_redo()
             elif english_action == "help":
                 return self._handle_help()
             elif english_action == "quit":
                 return ActionResult(
                     success=True,
-                    message="Ka vu certas ke vu volas finar? (yes/no)",  # Are you sure you want to quit?
+                    message=self.messages("action.confirm_quit"),
                     action_type="quit"
                 )
             
         # Unknown command
         return ActionResult(
             success=False,
-            message=f"Me ne komprenas '{action_input}'.",  # I don't understand
+            message=self.messages("action.unknown", command=action_input),
             action_type="unknown"
         )
         
@@ -136,35 +194,56 @@ class ActionHandler:
         if not self.world.can_move(self.player.current_location, english_direction):
             return ActionResult(
                 success=False,
-                message=f"Vu ne povas irar {ido_direction} de ca-loke.",  # You can't go X from here
+                message=self.messages("move.no_exit", direction=self._direction_name(english_direction)),
+                action_type="move"
+            )
+            
+        if not self.world.is_exit_open(self.player.current_location, english_direction, self.player):
+            guarded_exit = self.world.get_exit(self.player.current_location, english_direction)
+            return ActionResult(
+                success=False,
+                message=guarded_exit.locked_message
+                    or self.messages("move.locked", direction=self._direction_name(english_direction)),
                 action_type="move"
             )
             
-        destination = self.world.get_destination(self.player.current_location, english_direction)
+        origin = self.player.current_location
+        destination = self.world.get_destination(origin, english_direction)
         self.player.current_location = destination
+        # Walking away ends a conversation
+        self.dialogue_session = None
         self.player.move(english_direction)
+        self.player.explored.visit(destination, came_from=origin, direction=english_direction)
+        self.world.event_stream.publish(PlayerMoved(self.world.turn_count, origin, destination, english_direction))
         
-        current_room = self.world.get_room(destination)
+        current_room = self.world.get_location(destination)
+        if current_room:
+            self._note_room(current_room)
         return ActionResult(
             success=True,
-            message=f"Vu movas {ido_direction}.",  # You move X
+            message=self.messages("move.done", direction=self._direction_name(english_direction)),
             action_type="move",
             data={"destination": destination}
         )
         
+    def _direction_name(self, english_direction):
+        """Name of a direction in the session's language"""
+        return self.messages.get(f"direction.{english_direction}", english_direction)
+        
     def _handle_look(self):
         """Handle looking around"""
-        current_room = self.world.get_room(self.player.current_location)
+        current_room = self.world.get_location(self.player.current_location)
         if not current_room:
             return ActionResult(
                 success=False,
-                message="Vu ne povas komprenar vua cirkumajo.",  # You can't make out your surroundings
+                message=self.messages("look.lost"),
                 action_type="look"
             )
             
+        self._note_room(current_room)
         return ActionResult(
             success=True,
-            message=current_room.get_description(detailed=True),
+            message=current_room.get_description(detailed=True, messages=self.messages),
             action_type="look"
         )
         
@@ -173,29 +252,31 @@ class ActionHandler:
         if not target:
             return ActionResult(
                 success=False,
-                message="Quo vu volas examinar?",  # What would you like to examine?
+                message=self.messages("examine.what"),
                 action_type="examine"
             )
             
         # Check if the target is in the player's inventory
-        for item in self.player.inventory:
-            if target.lower() in item["name"].lower():
-                return ActionResult(
-                    success=True,
-                    message=item.get("description", f"Un {item['name']}."),  # A [item name]
-                    action_type="examine",
-                    data={"item": item}
-                )
+        item = self.player.inventory.find(target)
+        if item:
+            self._note_item(item)
+            return ActionResult(
+                success=True,
+                message=item.get("description") or self.messages("examine.default", name=item["name"]),
+                action_type="examine",
+                data={"item": item}
+            )
                 
         # Check if the target is in the current room
-        current_room = self.world.get_room(self.player.current_location)
+        current_room = self.world.get_location(self.player.current_location)
         if current_room:
             # Check room items
             for item in current_room.items:
                 if target.lower() in item["name"].lower():
+                    self._note_item(item)
                     return ActionResult(
                         success=True,
-                        message=item.get("description", f"Un {item['name']}."),  # A [item name]
+                        message=item.get("description") or self.messages("examine.default", name=item["name"]),
                         action_type="examine",
                         data={"item": item}
                     )
@@ -203,16 +284,17 @@ class ActionHandler:
             # Check room furniture
             for furniture in current_room.furniture:
                 if target.lower() in furniture["name"].lower():
+                    self._note_item(furniture)
                     return ActionResult(
                         success=True,
-                        message=furniture.get("description", f"Un {furniture['name']}."),  # A [furniture name]
+                        message=furniture.get("description") or self.messages("examine.default", name=furniture["name"]),
                         action_type="examine",
                         data={"furniture": furniture}
                     )
                     
         return ActionResult(
             success=False,
-            message=f"Vu ne vidas {target} ca-hike.",  # You don't see any X here
+            message=self.messages("examine.not_found", target=target),
             action_type="examine"
         )
         
@@ -221,35 +303,42 @@ class ActionHandler:
         if not target:
             return ActionResult(
                 success=False,
-                message="Quo vu volas prenar?",  # What would you like to take?
+                message=self.messages("take.what"),
                 action_type="take"
             )
             
         # Check if the target is in the current room
-        current_room = self.world.get_room(self.player.current_location)
+        current_room = self.world.get_location(self.player.current_location)
         if current_room:
             for item in current_room.items:
                 if target.lower() in item["name"].lower():
                     if item.get("takeable", True):
                         # Add to inventory and remove from room
-                        self.player.add_item(item)
-                        self.world.remove_item_from_room(current_room.id, item["id"])
+                        if not self.player.add_item(item):
+                            return ActionResult(
+                                success=False,
+                                message=self.messages("take.too_full", name=item["name"]),
+                                action_type="take"
+                            )
+                        self.world.remove_item_from_room(current_room.id, item["id"], item)
+                        self.world.event_stream.publish(
+                            ItemMoved(self.world.turn_count, item["id"], f"room:{current_room.id}", "player"))
                         return ActionResult(
                             success=True,
-                            message=f"Vu prenas la {item['name']}.",  # You take the X
+                            message=self.messages("take.done", name=item["name"]),
                             action_type="take",
                             data={"item": item}
                         )
                     else:
                         return ActionResult(
                             success=False,
-                            message=f"Vu ne povas prenar la {item['name']}.",  # You can't take the X
+                            message=self.messages("take.not_takeable", name=item["name"]),
                             action_type="take"
                         )
                         
         return ActionResult(
             success=False,
-            message=f"Vu ne vidas {target} ca-hike por prenar.",  # You don't see any X here that you can take
+            message=self.messages("take.not_found", target=target),
             action_type="take"
         )
         
@@ -258,26 +347,28 @@ class ActionHandler:
         if not target:
             return ActionResult(
                 success=False,
-                message="Quo vu volas pozar?",  # What would you like to drop?
+                message=self.messages("drop.what"),
                 action_type="drop"
             )
             
         # Check if the target is in the player's inventory
-        for item in self.player.inventory:
-            if target.lower() in item["name"].lower():
-                # Remove from inventory and add to room
-                self.player.remove_item(item["id"])
-                self.world.add_item_to_room(self.player.current_location, item)
-                return ActionResult(
-                    success=True,
-                    message=f"Vu pozas la {item['name']}.",  # You drop the X
-                    action_type="drop",
-                    data={"item": item}
-                )
+        item = self.player.inventory.find(target)
+        if item:
+            # Remove from inventory and add to room
+            self.player.remove_item(item)
+            self.world.add_item_to_room(self.player.current_location, item)
+            self.world.event_stream.publish(
+                ItemMoved(self.world.turn_count, item["id"], "player", f"room:{self.player.current_location}"))
+            return ActionResult(
+                success=True,
+                message=self.messages("drop.done", name=item["name"]),
+                action_type="drop",
+                data={"item": item}
+            )
                 
         return ActionResult(
             success=False,
-            message=f"Vu ne havas {target} por pozar.",  # You don't have any X to drop
+            message=self.messages("drop.not_found", target=target),
             action_type="drop"
         )
         
@@ -286,29 +377,31 @@ class ActionHandler:
         if not target:
             return ActionResult(
                 success=False,
-                message="Quo vu volas uzar?",  # What would you like to use?
+                message=self.messages("use.what"),
                 action_type="use"
             )
             
         # Check if the target is in the player's inventory
-        for item in self.player.inventory:
-            if target.lower() in item["name"].lower():
-                if not item.get("usable", False):
-                    return ActionResult(
-                        success=False,
-                        message=f"Vu ne povas uzar la {item['name']} talamaniere.",  # You can't use the X like that
-                        action_type="use"
-                    )
-                    
-                # Process item use
-                result = self._process_item_use(item)
-                if result.success:
-                    self.player.use_item(item["id"])
-                return result
+        item = self.player.inventory.find(target)
+        if item:
+            if not item.get("usable", False):
+                return ActionResult(
+                    success=False,
+                    message=self.messages("use.not_usable", name=item["name"]),
+                    action_type="use"
+                )
+                
+            # Process item use
+            result = self._process_item_use(item)
+            if result.success:
+                self.player.use_item(item)
+                if item.get("consumable", False):
+                    self.world.event_stream.publish(ItemMoved(self.world.turn_count, item["id"], "player", None))
+            return result
                 
         return ActionResult(
             success=False,
-            message=f"Vu ne havas {target} por uzar.",  # You don't have any X to use
+            message=self.messages("use.not_found", target=target),
             action_type="use"
         )
         
@@ -321,7 +414,7 @@ class ActionHandler:
             self.player.consume_food(nutrition)
             return ActionResult(
                 success=True,
-                message=f"Vu manjas la {item['name']}. Ol satigas vua hungro.",  # You eat the X. It satisfies your hunger
+                message=self.messages("use.eat", name=item["name"]),
                 action_type="use",
                 data={"effect": "nutrition", "value": nutrition}
             )
@@ -331,27 +424,27 @@ class ActionHandler:
             self.player.consume_drink(hydration)
             return ActionResult(
                 success=True,
-                message=f"Vu drinkas la {item['name']}. Ol satenigas vua soifo.",  # You drink the X. It quenches your thirst
+                message=self.messages("use.drink", name=item["name"]),
                 action_type="use",
                 data={"effect": "hydration", "value": hydration}
             )
             
         elif item_type == "tool":
             # Tool use might depend on room context
-            current_room = self.world.get_room(self.player.current_location)
+            current_room = self.world.get_location(self.player.current_location)
             if "use_effects" in item and current_room:
                 for effect in item["use_effects"]:
                     if effect.get("room_type") == current_room.type:
                         return ActionResult(
                             success=True,
-                            message=effect.get("message", f"Vu uzas la {item['name']}."),  # You use the X
+                            message=effect.get("message") or self.messages("use.done", name=item["name"]),
                             action_type="use",
                             data={"effect": effect}
                         )
                         
             return ActionResult(
                 success=False,
-                message=f"Vu ne povas trovar maniero uzar la {item['name']} ca-hike.",  # You can't find a way to use the X here
+                message=self.messages("use.no_way", name=item["name"]),
                 action_type="use"
             )
             
@@ -359,7 +452,7 @@ class ActionHandler:
             # Generic item use
             return ActionResult(
                 success=True,
-                message=item.get("use_message", f"Vu uzas la {item['name']}."),  # You use the X
+                message=item.get("use_message") or self.messages("use.done", name=item["name"]),
                 action_type="use"
             )
             
@@ -368,12 +461,12 @@ class ActionHandler:
         if not target:
             return ActionResult(
                 success=False,
-                message="Kun quo vu volas interagar?",  # What would you like to interact with?
+                message=self.messages("interact.what"),
                 action_type="interact"
             )
             
         # Check if the target is in the current room's furniture
-        current_room = self.world.get_room(self.player.current_location)
+        current_room = self.world.get_location(self.player.current_location)
         if current_room:
             for furniture in current_room.furniture:
                 if target.lower() in furniture["name"].lower():
@@ -382,7 +475,7 @@ class ActionHandler:
                     # Check if the furniture has interaction effects
                     if "interaction" in furniture:
                         interaction = furniture["interaction"]
-                        message = interaction.get("message", f"Vu interagas kun la {furniture['name']}.")  # You interact with the X
+                        message = interaction.get("message") or self.messages("interact.done", name=furniture["name"])
                         
                         # Process any effects
                         if "effects" in interaction:
@@ -397,48 +490,240 @@ class ActionHandler:
                         
                     return ActionResult(
                         success=True,
-                        message=f"Vu interagas kun la {furniture['name']} ma nulo eventas.",  # You interact with the X but nothing happens
+                        message=self.messages("interact.nothing", name=furniture["name"]),
                         action_type="interact"
                     )
                     
         return ActionResult(
             success=False,
-            message=f"Vu ne vidas {target} ca-hike por interagar.",  # You don't see any X here that you can interact with
+            message=self.messages("interact.not_found", target=target),
             action_type="interact"
         )
         
+    def _handle_talk(self, target):
+        """Handle starting a conversation with a character"""
+        if not target:
+            return ActionResult(
+                success=False,
+                message=self.messages("talk.whom"),
+                action_type="talk"
+            )
+            
+        # "parolar kun X" and "parolar X" both work
+        if target.startswith("kun "):
+            target = target[4:]
+            
+        agents = self.world.agents
+        for agent_id in agents.agents_in_room(self.player.current_location):
+            name = agents.names[agents.index[agent_id]]
+            if target.lower() in name.lower():
+                dialogue = self.world.dialogues.get(agents.dialogue.get(agent_id))
+                if dialogue is None:
+                    return ActionResult(
+                        success=False,
+                        message=self.messages("talk.nothing_to_say", name=name),
+                        action_type="talk"
+                    )
+                self.dialogue_session = DialogueSession(dialogue, self.world, self.player, agent_id)
+                return self._dialogue_result("talk", {"agent": agent_id})
+                
+        return ActionResult(
+            success=False,
+            message=self.messages("talk.not_found", target=target),
+            action_type="talk"
+        )
+        
+    def _handle_attack(self, target):
+        """Handle attacking a creature or character; the blows land when the turn is resolved"""
+        if not target:
+            return ActionResult(
+                success=False,
+                message=self.messages("attack.whom"),
+                action_type="attack"
+            )
+            
+        agents = self.world.agents
+        for row in agents.occupancy().get(self.player.current_location, []):
+            name = agents.names[row]
+            if target.lower() in name.lower():
+                if agents.combat[row] < 0:
+                    return ActionResult(
+                        success=False,
+                        message=self.messages("attack.peaceful", name=name),
+                        action_type="attack"
+                    )
+                agent_id = agents.ids[row]
+                self.world.combat.declare(self.player, agent_id)
+                return ActionResult(
+                    success=True,
+                    message=self.messages("attack.declared", name=name),
+                    action_type="attack",
+                    data={"agent": agent_id}
+                )
+                
+        return ActionResult(
+            success=False,
+            message=self.messages("attack.not_found", target=target),
+            action_type="attack"
+        )
+        
+    def check_dialogue(self):
+        """End the conversation if the other speaker left the player's room; returns the messages to show
+
+        Call it at the start of each turn, after the world's events.
+        """
+        session = self.dialogue_session
+        if session is None or session.agent_id is None:
+            return []
+        agents = self.world.agents
+        if session.agent_id in agents.agents_in_room(self.player.current_location):
+            return []
+        self.dialogue_session = None
+        row = agents.index.get(session.agent_id)
+        name = agents.names[row] if row is not None else session.agent_id
+        return [self.messages("talk.left", name=name)]
+        
+    def _handle_respond(self, target):
+        """Handle choosing a response in a conversation"""
+        left = self.check_dialogue()
+        if left:
+            return ActionResult(
+                success=False,
+                message=left[0],
+                action_type="respond"
+            )
+        if not self.dialogue_session:
+            return ActionResult(
+                success=False,
+                message=self.messages("respond.not_talking"),
+                action_type="respond"
+            )
+            
+        if not target or not target.isdigit() or not self.dialogue_session.choose(int(target)):
+            return ActionResult(
+                success=False,
+                message=self.messages("respond.choose"),
+                action_type="respond"
+            )
+            
+        if self.dialogue_session.finished:
+            self.dialogue_session = None
+            return ActionResult(
+                success=True,
+                message=self.messages("respond.ended"),
+                action_type="respond"
+            )
+        return self._dialogue_result("respond")
+        
+    def _dialogue_result(self, action_type, data=None):
+        """Show the current line of the conversation"""
+        message = self.dialogue_session.render()
+        if self.dialogue_session.finished:
+            self.dialogue_session = None
+        return ActionResult(
+            success=True,
+            message=message,
+            action_type=action_type,
+            data=data
+        )
+        
     def _handle_inventory(self):
         """Handle checking inventory"""
         if not self.player.inventory:
             return ActionResult(
                 success=True,
-                message="Vua inventario esas vakua.",  # Your inventory is empty
+                message=self.messages("inventory.empty"),
                 action_type="inventory"
             )
             
-        inventory_text = "Inventario:\n"
-        for item in self.player.inventory:
-            inventory_text += f"- {item['name']}\n"
-            
         return ActionResult(
             success=True,
-            message=inventory_text,
+            message=self.text_formatter.format_inventory_list(self.player.inventory),
             action_type="inventory",
-            data={"items": self.player.inventory}
+            data={"items": self.player.inventory.stacks()}
+        )
+        
+    def _note_room(self, room):
+        """Index a room description in the player's notebook"""
+        self.player.knowledge.observe(f"room:{room.id}", room.name, room.description)
+        
+    def _note_item(self, item):
+        """Index an item (or furniture) description in the player's notebook"""
+        self.player.knowledge.observe(f"item:{item['id']}", item["name"], item.get("description", ""))
+        
+    def _handle_notebook(self, query):
+        """Handle looking things up in the notebook"""
+        if not query:
+            # Learned entries and observed descriptions are both indexed documents
+            knowledge = self.player.knowledge
+            if not knowledge.indexed:
+                return ActionResult(
+                    success=True,
+                    message=self.messages("notebook.empty"),
+                    action_type="notebook"
+                )
+            notebook_text = self.messages("notebook.header") + "\n"
+            for key, value in knowledge.items():
+                if isinstance(value, str):
+                    notebook_text += self.messages("notebook.entry_value", key=key, value=value) + "\n"
+                else:
+                    notebook_text += self.messages("notebook.entry", key=key) + "\n"
+            observed = knowledge.observed()
+            if observed:
+                notebook_text += self.messages("notebook.seen_header") + "\n"
+                for doc_id, title, text in observed:
+                    notebook_text += self.messages("notebook.search_entry", title=title) + "\n"
+            return ActionResult(
+                success=True,
+                message=notebook_text,
+                action_type="notebook"
+            )
+            
+        results = self.player.knowledge.search(query)
+        if not results:
+            return ActionResult(
+                success=False,
+                message=self.messages("notebook.not_found", query=query),
+                action_type="notebook"
+            )
+        notebook_text = self.messages("notebook.search_header", query=query) + "\n"
+        for doc_id, title, text in results:
+            notebook_text += self.messages("notebook.search_entry", title=title) + "\n"
+        return ActionResult(
+            success=True,
+            message=notebook_text,
+            action_type="notebook",
+            data={"results": [doc_id for doc_id, title, text in results]}
+        )
+        
+    def _handle_map(self):
+        """Handle showing the map of explored places"""
+        explored = self.player.explored
+        if self.player.current_location not in explored:
+            explored.visit(self.player.current_location)
+        if self.map_renderer is None or self.map_renderer.tracker is not explored:
+            from kerno.utils.map_render import AsciiMapRenderer  # Only needed once the map is opened
+            self.map_renderer = AsciiMapRenderer(explored)
+        # Only cells discovered since the last look at the map are redrawn
+        self.map_renderer.update(self.player.current_location)
+        return ActionResult(
+            success=True,
+            message=self.messages("map.header") + "\n" + self.map_renderer.render(),
+            action_type="map"
         )
         
     def _handle_status(self):
         """Handle checking player status"""
         status = self.player.get_status()
         
-        # Status terms are already in Ido from the player class
-        status_text = f"Saneso: {status['health']}\n"
-        status_text += f"Hungro: {status['hunger']}\n"
-        status_text += f"Soifo: {status['thirst']}\n"
-        status_text += f"Energio: {status['energy']}\n"
+        # Status terms are already translated by the player class
+        messages = self.messages
+        status_text = ""
+        for need in ("health", "hunger", "thirst", "energy"):
+            status_text += messages("status.line", need=messages(f"need.{need}"), status=status[need]) + "\n"
         
         if "effects" in status:
-            status_text += "Statuso-efekti: " + ", ".join(status["effects"])
+            status_text += messages("status.effects", effects=", ".join(status["effects"]))
             
         return ActionResult(
             success=True,
@@ -447,19 +732,46 @@ class ActionHandler:
             data={"status": status}
         )
         
+    def _handle_undo(self):
+        """Handle going back to before the last command"""
+        snapshot = self.timeline.undo() if self.timeline else None
+        if snapshot is None:
+            return ActionResult(
+                success=False,
+                message=self.messages("undo.nothing"),
+                action_type="undo"
+            )
+        # A conversation in progress or a declared attack does not survive going back
+        self.dialogue_session = None
+        self.world.combat.withdraw(self.player)
+        return ActionResult(
+            success=True,
+            message=self.messages("undo.done", turn=snapshot.turn),
+            action_type="undo",
+            data={"turn": snapshot.turn}
+        )
+        
+    def _handle_redo(self):
+        """Handle going forward again after an undo"""
+        snapshot = self.timeline.redo() if self.timeline else None
+        if snapshot is None:
+            return ActionResult(
+                success=False,
+                message=self.messages("redo.nothing"),
+                action_type="redo"
+            )
+        self.dialogue_session = None
+        self.world.combat.withdraw(self.player)
+        return ActionResult(
+            success=True,
+            message=self.messages("redo.done", turn=snapshot.turn),
+            action_type="redo",
+            data={"turn": snapshot.turn}
+        )
+        
     def _handle_help(self):
         """Handle help command"""
-        help_text = "Disponebla komandi:\n"
-        help_text += "- regardar: Regardar vua nuna loko\n"
-        help_text += "- examinar [objekto]: Examinar objekto plu detale\n"
-        help_text += "- prenar [objekto]: Prenar objekto e pozar ol en vua inventario\n"
-        help_text += "- pozar [objekto]: Pozar objekto de vua inventario\n"
-        help_text += "- uzar [objekto]: Uzar objekto de vua inventario\n"
-        help_text += "- interagar [objekto]: Interagar kun objekto en la medio\n"
-        help_text += "- inventario: Kontrolar vua inventario\n"
-        help_text += "- statuso: Kontrolar vua nuna statuso\n"
-        help_text += "- [direciono]: Movar en direciono (nordo, sudo, esto, westo, supre, infre)\n"
-        help_text += "- finar: Finar la ludo\n"
+        help_text = "\n".join(self.messages(key) for key in HELP_KEYS) + "\n"
         
         return ActionResult(
             success=True,
@@ -0,0 +1,283 @@
+import json
+import random
+import zlib
+from array import array
+from collections import deque
+from itertools import compress
+from kerno.models import needs
+
+# Agent kinds, stored as small integers in the kind column
+KIND_NPC = 0
+KIND_CREATURE = 1
+KIND_NAMES = {"npc": KIND_NPC, "creature": KIND_CREATURE}
+
+# Agents below this energy rest instead of moving
+EXHAUSTED_ENERGY = 20.0
+
+# Health of a fighting agent whose combat profile does not give one
+DEFAULT_HEALTH = 10
+
+# Typed array columns, in the order row_state() stores them
+_ARRAY_COLUMNS = ("kind", "location", "hunger", "thirst", "energy", "mobility", "schedule",
+                  "health", "combat", "hostile", "attack_scale", "defend_scale", "status_until")
+
+class AgentPool:
+    """NPCs and creatures stored column-wise (struct of arrays) and updated in batches"""
+
+    def __init__(self, world):
+        self.world = world
+        self.rng = random.Random()  # Reseeded every tick from the world seed and the turn
+
+        # Room graph as integer indices with exits in CSR form
+        self.room_ids = []
+        self.room_index = {}
+        self.adj_offsets = array('l', [0])
+        self.adj_targets = array('l')
+        self._next_hop = {}  # target room index -> array of next hops
+        self.rebuild_graph()
+
+        # Agent columns; row i describes the agent self.ids[i]
+        self.ids = []
+        self.names = []
+        self.index = {}
+        self.kind = array('B')
+        self.location = array('l')
+        self.hunger = array('d')
+        self.thirst = array('d')
+        self.energy = array('d')
+        self.mobility = array('d')  # Chance per turn that an unscheduled agent wanders
+        self.schedule = array('l')  # Index into self.schedules, -1 for none
+        self.schedules = []  # Tuples of room indices, one entry per turn of the cycle
+        self._schedule_index = {}
+        self.dialogue = {}  # Agent id -> dialogue id, for agents the player can talk to
+
+        # Combat columns (see kerno.models.combat)
+        self.health = array('d')
+        self.combat = array('l')  # Index into self.combat_profiles, -1 for agents that do not fight
+        self.combat_profiles = []  # Combat profile dicts from the world file
+        self._combat_index = {}
+        self.hostile = array('B')  # 1 if the agent attacks players on sight (or was attacked)
+        self.attack_scale = array('d')  # Multiplier of the damage the agent deals while under a status effect
+        self.defend_scale = array('d')  # Multiplier of the damage it takes while under a status effect
+        self.status_until = array('l')  # Turn at which that status effect wears off
+        self._occupancy = None
+        self.dirty = set()  # Ids of agents changed since the last consume_dirty()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rebuild_graph(self):
+        """Index the world's rooms and exits; call again if rooms are added"""
+        self.room_ids = list(self.world.rooms)
+        self.room_index = {room_id: i for i, room_id in enumerate(self.room_ids)}
+        offsets = array('l', [0])
+        targets = array('l')
+        for room_id in self.room_ids:
+            for destination in self.world.rooms[room_id].exits.values():
+                target = self.room_index.get(destination)
+                if target is not None:
+                    targets.append(target)
+            offsets.append(len(targets))
+        self.adj_offsets = offsets
+        self.adj_targets = targets
+        self._next_hop.clear()
+
+    def spawn(self, agent_data):
+        """Add an agent from its JSON description and return its row"""
+        agent_id = agent_data["id"]
+        if agent_id in self.index:
+            raise ValueError(f"Duplicate agent id: {agent_id}")
+        location = self.room_index.get(agent_data.get("location"))
+        if location is None:
+            raise ValueError(f"Agent {agent_id} is not placed in a known room")
+
+        row = len(self.ids)
+        self.index[agent_id] = row
+        self.ids.append(agent_id)
+        self.names.append(agent_data.get("name", agent_id))
+        self.kind.append(KIND_NAMES.get(agent_data.get("kind", "npc"), KIND_NPC))
+        self.location.append(location)
+        self.hunger.append(agent_data.get("hunger", 0))
+        self.thirst.append(agent_data.get("thirst", 0))
+        self.energy.append(agent_data.get("energy", 100))
+        self.mobility.append(agent_data.get("mobility", 0.0))
+        self.schedule.append(self._intern_schedule(agent_data.get("schedule")))
+        if "dialogue" in agent_data:
+            self.dialogue[agent_id] = agent_data["dialogue"]
+        combat = agent_data.get("combat")
+        self.combat.append(self._intern_combat(combat))
+        self.health.append(combat.get("health", DEFAULT_HEALTH) if combat else 0)
+        self.hostile.append(1 if combat and combat.get("hostile") else 0)
+        self.attack_scale.append(1.0)
+        self.defend_scale.append(1.0)
+        self.status_until.append(0)
+        self._occupancy = None
+        self.dirty.add(agent_id)
+        return row
+
+    def despawn(self, agent_id):
+        """Remove an agent by swapping the last row into its place"""
+        row = self.index.pop(agent_id, None)
+        if row is None:
+            return False
+        self.dialogue.pop(agent_id, None)
+        last = len(self.ids) - 1
+        for column in self._columns():
+            column[row] = column[last]
+            column.pop()
+        if row != last:
+            self.index[self.ids[row]] = row
+        self._occupancy = None
+        return True
+
+    def _columns(self):
+        """All per-agent columns, in a fixed order"""
+        return (self.ids, self.names) + tuple(getattr(self, name) for name in _ARRAY_COLUMNS)
+
+    def row_state(self, row):
+        """One agent's state as an immutable value, for timelines"""
+        return (self.names[row], *(getattr(self, name)[row] for name in _ARRAY_COLUMNS),
+                self.dialogue.get(self.ids[row]))
+
+    def restore(self, ids, rows):
+        """Replace every agent with ids and the matching row_state() values"""
+        self.ids = list(ids)
+        self.index = {agent_id: row for row, agent_id in enumerate(ids)}
+        columns = list(zip(*rows)) or [()] * (len(_ARRAY_COLUMNS) + 2)
+        self.names = list(columns[0])
+        for name, values in zip(_ARRAY_COLUMNS, columns[1:]):
+            setattr(self, name, array(getattr(self, name).typecode, values))
+        self.dialogue = {agent_id: dialogue for agent_id, dialogue in zip(ids, columns[-1]) if dialogue is not None}
+        self._occupancy = None
+        self.dirty = set()
+
+    def touch(self, row):
+        """Mark an agent as changed, for callers writing to its columns directly"""
+        self.dirty.add(self.ids[row])
+
+    def consume_dirty(self):
+        """Return the ids of the agents changed since the last call and reset the set"""
+        dirty = self.dirty
+        self.dirty = set()
+        return dirty
+
+    def _intern_schedule(self, schedule):
+        """Store a schedule (list of room ids) once and return its index"""
+        if not schedule:
+            return -1
+        rooms = tuple(self.room_index[room_id] for room_id in schedule)
+        if rooms not in self._schedule_index:
+            self._schedule_index[rooms] = len(self.schedules)
+            self.schedules.append(rooms)
+        return self._schedule_index[rooms]
+
+    def _intern_combat(self, profile):
+        """Store a combat profile once and return its index"""
+        if not profile:
+            return -1
+        key = json.dumps(profile, sort_keys=True)
+        if key not in self._combat_index:
+            self._combat_index[key] = len(self.combat_profiles)
+            self.combat_profiles.append(profile)
+        return self._combat_index[key]
+
+    def next_hop_towards(self, target):
+        """Array giving, for every room, the next room on a shortest path to target"""
+        hops = self._next_hop.get(target)
+        if hops is not None:
+            return hops
+
+        hops = array('l', range(len(self.room_ids)))  # Unreachable rooms stay put
+        # Reverse BFS from the target over the exit graph
+        reverse = [[] for _ in self.room_ids]
+        offsets, targets = self.adj_offsets, self.adj_targets
+        for source in range(len(self.room_ids)):
+            for k in range(offsets[source], offsets[source + 1]):
+                reverse[targets[k]].append(source)
+        seen = {target}
+        queue = deque([target])
+        while queue:
+            current = queue.popleft()
+            for source in reverse[current]:
+                if source not in seen:
+                    seen.add(source)
+                    hops[source] = current
+                    queue.append(source)
+        self._next_hop[target] = hops
+        return hops
+
+    def tick(self, turn):
+        """Advance every agent by one turn"""
+        if not self.ids:
+            return
+        # Rolls depend only on the world seed and the turn, so timelines need not store them
+        self.rng.seed(zlib.crc32(f"{self.world.seed}:agents:{turn}".encode("utf-8")))
+        resting = [e < EXHAUSTED_ENERGY for e in self.energy]
+        before = (self.location, self.hunger, self.thirst, self.energy)
+        self._update_movement(turn, resting)
+        self._update_needs(resting, [a != b for a, b in zip(before[0], self.location)])
+        self._occupancy = None
+        after = (self.location, self.hunger, self.thirst, self.energy)
+        ids = self.ids
+        self.dirty.update(ids[row] for row, (old, new) in enumerate(zip(zip(*before), zip(*after))) if old != new)
+
+    def _update_needs(self, resting, moved):
+        """Apply need changes to all agents at once: exhausted agents rest, the others move or idle"""
+        activities = ["rest" if r else "move" if m else "idle" for r, m in zip(resting, moved)]
+        columns = needs.apply_activities_columns(
+            {"hunger": self.hunger, "thirst": self.thirst, "energy": self.energy}, activities)
+        self.hunger = columns["hunger"]
+        self.thirst = columns["thirst"]
+        self.energy = columns["energy"]
+
+    def _update_movement(self, turn, resting):
+        """Move scheduled agents along their routes and let the others wander"""
+        # Scheduled agents step towards this turn's destination; the next-hop
+        # table is looked up once per distinct schedule, not once per agent
+        hop_tables = [self.next_hop_towards(route[turn % len(route)]) for route in self.schedules]
+        self.location = location = array('l', [
+            hop_tables[s][loc] if s >= 0 and not r else loc
+            for s, r, loc in zip(self.schedule, resting, self.location)
+        ])
+
+        # Unscheduled agents wander to a random neighbouring room
+        random_roll = self.rng.random
+        wandering = [s < 0 and not r and random_roll() < m for s, r, m in zip(self.schedule, resting, self.mobility)]
+        offsets, targets = self.adj_offsets, self.adj_targets
+        for row in compress(range(len(self.ids)), wandering):
+            start, end = offsets[location[row]], offsets[location[row] + 1]
+            if start < end:
+                location[row] = targets[start + int(random_roll() * (end - start))]
+
+    def occupancy(self):
+        """Map of room id to the rows of the agents inside it"""
+        if self._occupancy is None:
+            occupancy = {}
+            for row, room in enumerate(self.location):
+                occupancy.setdefault(self.room_ids[room], []).append(row)
+            self._occupancy = occupancy
+        return self._occupancy
+
+    def agents_in_room(self, room_id):
+        """Ids of the agents currently in a room"""
+        return [self.ids[row] for row in self.occupancy().get(room_id, [])]
+
+    def names_in_room(self, room_id):
+        """Names of the agents currently in a room"""
+        return [self.names[row] for row in self.occupancy().get(room_id, [])]
+
+    def get_agent(self, agent_id):
+        """Return an agent's state as a dict, or None"""
+        row = self.index.get(agent_id)
+        if row is None:
+            return None
+        return {
+            "id": agent_id,
+            "name": self.names[row],
+            "kind": "creature" if self.kind[row] == KIND_CREATURE else "npc",
+            "location": self.room_ids[self.location[row]],
+            "hunger": self.hunger[row],
+            "thirst": self.thirst[row],
+            "energy": self.energy[row],
+            "health": self.health[row] if self.combat[row] >= 0 else None
+        }
@@ -0,0 +1,275 @@
+import json
+import random
+import zlib
+from array import array
+from weakref import WeakKeyDictionary, WeakSet
+from kerno.utils.event_stream import CombatRound, DamageTaken, StatusEffectAdded
+
+# Kinds of damage attacks deal; resistances give a multiplier for each
+DAMAGE_TYPES = ("physical", "electric", "chemical", "thermal")
+_TYPE_INDEX = {name: i for i, name in enumerate(DAMAGE_TYPES)}
+
+# Attack of a player who carries no weapon
+UNARMED_ATTACK = {"damage": [1, 3], "type": "physical", "accuracy": 0.8}
+
+class CombatTables:
+    """Attacks and resistances interned into flat lookup tables
+
+    Attack specs look like:
+        {"damage": [min, max], "type": "electric", "accuracy": 0.7,
+         "inflicts": {status effect}, "inflict_chance": 0.25}
+    and resistances like {"physical": 0.5, "electric": 2}, the multiplier
+    of the damage taken of each type (1 for types not listed). Each spec
+    is compiled once, however many combatants share it.
+    """
+
+    def __init__(self):
+        # Attack tables; row i describes attack i
+        self.damage = []  # Possible damage values, one per roll bucket
+        self.average = array('d')  # Mean damage, to pick a player's best weapon
+        self.damage_type = array('B')  # Index into DAMAGE_TYPES
+        self.accuracy = array('d')
+        self.inflicts = []  # Status effect dict, or None
+        self.inflict_chance = array('d')
+        self._attacks = {}
+
+        # Resistance tables; row i gives the multiplier per damage type
+        self.multipliers = []
+        self._resistances = {}
+
+    def attack(self, spec):
+        """Index of an attack spec, compiling it on first use"""
+        key = json.dumps(spec, sort_keys=True)
+        index = self._attacks.get(key)
+        if index is None:
+            damage_type = spec.get("type", "physical")
+            if damage_type not in _TYPE_INDEX:
+                raise ValueError(f"Unknown damage type: {damage_type}")
+            low, high = spec.get("damage", (1, 1))
+            index = self._attacks[key] = len(self.damage)
+            self.damage.append(tuple(range(low, high + 1)) or (low,))
+            self.average.append((low + high) / 2)
+            self.damage_type.append(_TYPE_INDEX[damage_type])
+            self.accuracy.append(spec.get("accuracy", 1.0))
+            self.inflicts.append(spec.get("inflicts"))
+            self.inflict_chance.append(spec.get("inflict_chance", 1.0) if "inflicts" in spec else 0.0)
+        return index
+
+    def resistance(self, spec):
+        """Index of a resistance spec, compiling it on first use"""
+        key = json.dumps(spec, sort_keys=True)
+        index = self._resistances.get(key)
+        if index is None:
+            unknown = set(spec) - _TYPE_INDEX.keys()
+            if unknown:
+                raise ValueError(f"Unknown damage type: {', '.join(sorted(unknown))}")
+            index = self._resistances[key] = len(self.multipliers)
+            self.multipliers.append(tuple(spec.get(name, 1.0) for name in DAMAGE_TYPES))
+        return index
+
+class CombatEngine:
+    """Turn-based fights between players and the agents of their room
+
+    Agents fight when their world file entry has a combat profile:
+        {"id": "rato", ..., "combat": {"health": 8, "hostile": true,
+                                       "attack": {attack spec},
+                                       "resistances": {"electric": 2}}}
+    Hostile agents attack the players in their room every turn; the others
+    fight back once attacked. Items with an "attack" spec are weapons, and
+    a player attacks with the best one carried. Status effects with
+    "combat_modifiers" for "attack" or "defend" scale the damage their
+    bearer deals or takes.
+
+    Each room is resolved in one batched pass per turn: every attack of the
+    turn is rolled against the state at the start of the turn (rooms with
+    a declared attack before agents move, so targets cannot walk away), then all
+    damage, status effects and deaths are applied together. Rolls come from
+    a generator seeded with (world seed, turn, room), so a turn plays out
+    the same whatever happens in other rooms or sessions, and again after
+    an undo. Players of a room act in the order of their ids.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.tables = CombatTables()
+        self.unarmed = self.tables.attack(UNARMED_ATTACK)
+        self.neutral = self.tables.resistance({})
+        self.players = WeakSet()  # Players seen in a turn; hostile agents attack them
+        self._arrival = WeakKeyDictionary()  # Player -> order first seen, to break ties between equal ids
+        self._profiles = []  # Agent combat profile index -> (attack index or -1, resistance index)
+        self._weapons = {}  # Item prototype id -> attack index, or None for items that are not weapons
+        self._targets = WeakKeyDictionary()  # Player -> id of the agent they attack this turn
+        self._reports = WeakKeyDictionary()  # Player -> combat messages not shown yet
+        self._resolved = set()  # (turn, room id) of the passes already run
+        self._restores = world.event_stream.subscribe(("restored",))
+
+    def declare(self, player, agent_id):
+        """Have a player attack an agent this turn; the agent fights back from now on"""
+        agents = self.world.agents
+        self._see(player)
+        self._targets[player] = agent_id
+        row = agents.index[agent_id]
+        agents.hostile[row] = 1
+        agents.touch(row)
+
+    def withdraw(self, player):
+        """Forget the attack a player declared this turn"""
+        self._targets.pop(player, None)
+
+    def resolve(self, player):
+        """Resolve this turn's fights in a player's room (once) and return the player's messages"""
+        self._see(player)
+        self._resolve_once(player.current_location)
+        return self._reports.pop(player, [])
+
+    def resolve_declared(self):
+        """Resolve this turn's fights in every room where a player declared an attack
+
+        Called before agents move, so that an attack lands on a target that
+        was in the room when it was declared. Messages wait for resolve().
+        """
+        for player in list(self._targets.keys()):
+            self._resolve_once(player.current_location)
+
+    def _resolve_once(self, room_id):
+        """Run the batched pass of a room unless it already ran this turn"""
+        if self._restores.poll():
+            # Turns replayed after going back in a timeline are fought again
+            self._resolved.clear()
+        key = (self.world.turn_count, room_id)
+        if key not in self._resolved:
+            if len(self._resolved) > 4096:
+                self._resolved.clear()
+            self._resolved.add(key)
+            self._resolve_room(*key)
+
+    def _see(self, player):
+        """Remember a player as a possible target"""
+        if player not in self._arrival:
+            self._arrival[player] = len(self._arrival)
+            self.players.add(player)
+
+    def _profile(self, index):
+        """Compiled (attack, resistance) of an agent combat profile"""
+        profiles = self._profiles
+        while len(profiles) <= index:
+            profile = self.world.agents.combat_profiles[len(profiles)]
+            attack = profile.get("attack")
+            profiles.append((self.tables.attack(attack) if attack else -1,
+                             self.tables.resistance(profile.get("resistances", {}))))
+        return profiles[index]
+
+    def _weapon(self, player):
+        """Attack index of the best weapon a player carries"""
+        best, best_average = self.unarmed, self.tables.average[self.unarmed]
+        for item in player.inventory:
+            item_id = item.get("id")
+            attack = self._weapons.get(item_id, -1)
+            if attack == -1:
+                spec = item.get("attack")
+                attack = self._weapons[item_id] = self.tables.attack(spec) if spec else None
+            if attack is not None and self.tables.average[attack] > best_average:
+                best, best_average = attack, self.tables.average[attack]
+        return best
+
+    def _resolve_room(self, turn, room_id):
+        """The batched pass: roll every attack in a room, then apply the results"""
+        world, agents, tables = self.world, self.world.agents, self.tables
+        rows = [row for row in agents.occupancy().get(room_id, ()) if agents.combat[row] >= 0]
+        arrival = self._arrival
+        players = sorted((p for p in self.players if p.current_location == room_id and p.health > 0),
+                         key=lambda p: (p.id, arrival[p]))
+        targets = [self._targets.pop(player, None) for player in players]
+        if not rows or not players:
+            return
+
+        # Attack list: (attacker, attack index, attacker scale, target); players
+        # are objects and agents are rows
+        rng = random.Random(zlib.crc32(f"{world.seed}:{turn}:{room_id}".encode("utf-8")))
+        roll = rng.random
+        attacks = []
+        room_rows = set(rows)
+        for player, agent_id in zip(players, targets):
+            row = agents.index.get(agent_id)
+            if row in room_rows:
+                attacks.append((player, self._weapon(player), player.status_effects.combat_multiplier("attack"), row))
+        attack_scale, defend_scale, status_until = agents.attack_scale, agents.defend_scale, agents.status_until
+        for row in rows:
+            attack = self._profile(agents.combat[row])[0]
+            if agents.hostile[row] and attack >= 0:
+                scale = attack_scale[row] if status_until[row] > turn else 1.0
+                attacks.append((row, attack, scale, players[int(roll() * len(players))]))
+        if not attacks:
+            return
+
+        # Roll everything against the state at the start of the turn
+        damage_values, damage_type, accuracy = tables.damage, tables.damage_type, tables.accuracy
+        multipliers, inflict_chance = tables.multipliers, tables.inflict_chance
+        results = []  # (attacker, target, damage or None for a miss, status effect or None)
+        for attacker, attack, scale, target in attacks:
+            hit, value, inflict = roll(), roll(), roll()
+            if hit >= accuracy[attack] or scale <= 0:
+                results.append((attacker, target, None, None))
+                continue
+            if isinstance(target, int):
+                resistance = self._profile(agents.combat[target])[1]
+                defend = defend_scale[target] if status_until[target] > turn else 1.0
+            else:
+                resistance = self.neutral
+                defend = target.status_effects.combat_multiplier("defend")
+            values = damage_values[attack]
+            damage = round(values[int(value * len(values))] * multipliers[resistance][damage_type[attack]]
+                           * scale * defend)
+            effect = tables.inflicts[attack] if inflict < inflict_chance[attack] else None
+            results.append((attacker, target, max(damage, 0), effect))
+
+        # Apply all results together
+        publish = world.event_stream.publish
+        player_damage = {}
+        for attacker, target, damage, effect in results:
+            if damage is None:
+                continue
+            if isinstance(target, int):
+                agents.health[target] -= damage
+                agents.touch(target)
+                if effect is not None:
+                    modifiers = effect.get("combat_modifiers", {})
+                    attack_scale[target] = modifiers.get("attack", 1.0)
+                    defend_scale[target] = modifiers.get("defend", 1.0)
+                    status_until[target] = turn + effect.get("duration", 1)
+            else:
+                player_damage[target] = player_damage.get(target, 0) + damage
+                if effect is not None:
+                    target.add_status_effect(effect)
+                    publish(StatusEffectAdded(turn, effect.get("id")))
+        for player, damage in player_damage.items():
+            before = player.health
+            player.take_damage(damage)
+            publish(DamageTaken(turn, "health", player.health - before, player.health, "combat"))
+        defeated = [agents.ids[row] for row in rows if agents.health[row] <= 0]
+        names = {row: agents.names[row] for row in rows}
+
+        for player in players:
+            messages = player.messages
+            report = self._reports.setdefault(player, [])
+            for attacker, target, damage, _ in results:
+                if attacker is player:
+                    if damage is None:
+                        report.append(messages("combat.miss", target=names[target]))
+                    else:
+                        report.append(messages("combat.hit", target=names[target], damage=damage))
+                elif target is player:
+                    if damage is None:
+                        report.append(messages("combat.dodged", attacker=names[attacker]))
+                    else:
+                        report.append(messages("combat.hurt", attacker=names[attacker], damage=damage))
+            for row in rows:
+                if agents.health[row] <= 0:
+                    report.append(messages("combat.defeated", name=names[row]))
+
+        publish(CombatRound(turn, room_id, tuple(
+            (agents.ids[attacker] if isinstance(attacker, int) else "player",
+             agents.ids[target] if isinstance(target, int) else "player", damage or 0)
+            for attacker, target, damage, _ in results), tuple(defeated)))
+        for agent_id in defeated:
+            agents.despawn(agent_id)
@@ -0,0 +1,114 @@
+# Comparison operators usable in global_state conditions
+OPERATORS = {
+    "equals": lambda value, expected: value == expected,
+    "not_equals": lambda value, expected: value != expected,
+    "gt": lambda value, expected: value is not None and value > expected,
+    "gte": lambda value, expected: value is not None and value >= expected,
+    "lt": lambda value, expected: value is not None and value < expected,
+    "lte": lambda value, expected: value is not None and value <= expected,
+    "in": lambda value, expected: value in expected
+}
+
+# Player attributes a condition can read, besides global_state
+USES_INVENTORY = "inventory"
+USES_KNOWLEDGE = "knowledge"
+USES_PROFESSION = "profession"
+
+class Condition:
+    """A condition compiled once into a closure, with the inputs it reads"""
+
+    __slots__ = ("check", "keys", "uses", "items", "knows")
+
+    def __init__(self, check, keys, uses=(), items=(), knows=()):
+        self.check = check  # check(world, player) -> bool
+        self.keys = frozenset(keys)  # global_state keys the result depends on
+        self.uses = frozenset(uses)  # Player inputs the result depends on
+        self.items = frozenset(items)  # Item ids whose presence in the inventory it reads
+        self.knows = frozenset(knows)  # Knowledge keys it reads
+
+    def signature(self, world, player):
+        """Versions of every input; the result can only change when this does"""
+        state = world.global_state
+        parts = [state.version(key) for key in self.keys]
+        if USES_INVENTORY in self.uses:
+            parts.append(player.inventory.version)
+        if USES_KNOWLEDGE in self.uses:
+            parts.append(player.knowledge_version)
+        if USES_PROFESSION in self.uses:
+            parts.append(player.profession)
+        return tuple(parts)
+
+    def __call__(self, world, player):
+        return self.check(world, player)
+
+def compile_condition(spec):
+    """Compile a condition spec from a world file into a Condition
+
+    Specs are {"key": k} (true if global_state[k] is truthy),
+    {"key": k, "<operator>": value} with an operator from OPERATORS,
+    {"has_item": id}, {"knows": key}, {"profession": name or [names]}, or
+    {"all": [...]}, {"any": [...]} and {"not": spec} combinations.
+    """
+    if spec is None:
+        return Condition(lambda world, player: True, ())
+
+    if "has_item" in spec:
+        item_id = spec["has_item"]
+        return Condition(lambda world, player: item_id in player.inventory, (), (USES_INVENTORY,), (item_id,))
+
+    if "knows" in spec:
+        knowledge_key = spec["knows"]
+        return Condition(lambda world, player: player.knows(knowledge_key), (), (USES_KNOWLEDGE,),
+                         (), (knowledge_key,))
+
+    if "profession" in spec:
+        professions = spec["profession"]
+        if isinstance(professions, str):
+            professions = [professions]
+        professions = frozenset(professions)
+        return Condition(lambda world, player: player.profession in professions, (), (USES_PROFESSION,))
+
+    if "all" in spec or "any" in spec:
+        combine = all if "all" in spec else any
+        parts = [compile_condition(part) for part in spec.get("all", spec.get("any"))]
+        checks = tuple(part.check for part in parts)
+        return Condition(
+            lambda world, player: combine(check(world, player) for check in checks),
+            set().union(*(part.keys for part in parts)),
+            set().union(*(part.uses for part in parts)),
+            set().union(*(part.items for part in parts)),
+            set().union(*(part.knows for part in parts))
+        )
+
+    if "not" in spec:
+        inner = compile_condition(spec["not"])
+        inner_check = inner.check
+        return Condition(lambda world, player: not inner_check(world, player),
+                         inner.keys, inner.uses, inner.items, inner.knows)
+
+    key = spec["key"]
+    for name, operator in OPERATORS.items():
+        if name in spec:
+            expected = spec[name]
+            return Condition(lambda world, player: operator(world.global_state.get(key), expected), (key,))
+    return Condition(lambda world, player: bool(world.global_state.get(key)), (key,))
+
+def compile_requirements(requirements):
+    """Compile access requirements into a Condition
+
+    Accepts a condition spec or the shorthand
+    {"items": [...], "global": {key: value}, "knowledge": [...], "profession": [...]}
+    where every listed requirement must hold.
+    """
+    if requirements is None:
+        return compile_condition(None)
+    shorthand = ("items", "global", "knowledge", "profession")
+    if not any(key in requirements for key in shorthand):
+        return compile_condition(requirements)
+
+    parts = [{"has_item": item_id} for item_id in requirements.get("items", [])]
+    parts += [{"key": key, "equals": value} for key, value in requirements.get("global", {}).items()]
+    parts += [{"knows": key} for key in requirements.get("knowledge", [])]
+    if "profession" in requirements:
+        parts.append({"profession": requirements["profession"]})
+    return compile_condition({"all": parts})
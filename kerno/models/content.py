@@ -0,0 +1,71 @@
+import importlib
+import json
+from pathlib import Path
+
+# Directory holding the bundled profession packs
+PROFESSIONS_DIR = Path(__file__).resolve().parent.parent / "data" / "professions"
+
+class ProfessionPack:
+    """A profession's starting state, routine and optional code hooks
+
+    Pack files look like:
+        {"id": "technician", "name": "Teknikisto", "starting_room": "tech_room",
+         "starting_items": ["diagnostic_tool"], "knowledge": {...},
+         "routine": ["..."], "start_effects": [...], "module": "pkg.module"}
+    "module", if given, is imported only when the pack is applied and may
+    define on_start(world, player).
+    """
+
+    def __init__(self, pack_data):
+        self.id = pack_data["id"]
+        self.name = pack_data.get("name", self.id)
+        self.description = pack_data.get("description", "")
+        self.starting_room = pack_data.get("starting_room")
+        self.starting_items = pack_data.get("starting_items", [])
+        self.knowledge = pack_data.get("knowledge", {})
+        self.routine = pack_data.get("routine", [])
+        self.start_effects = pack_data.get("start_effects", [])
+        self.module_name = pack_data.get("module")
+
+    def apply(self, world, player):
+        """Set up a player with this profession; returns the routine messages"""
+        player.profession = self.id
+        player.name = self.name
+        if self.starting_room and world.get_room(self.starting_room):
+            player.current_location = self.starting_room
+        for item in self.starting_items:
+            player.add_item(world.items.instantiate(item))
+        for key, value in self.knowledge.items():
+            player.learn(key, value)
+        if self.start_effects:
+            world._process_event_effects(self.start_effects, player)
+        if self.module_name:
+            module = importlib.import_module(self.module_name)
+            if hasattr(module, "on_start"):
+                module.on_start(world, player)
+        return list(self.routine)
+
+class ContentLibrary:
+    """Finds content packs by file name and parses each only when first needed"""
+
+    def __init__(self, professions_dir=PROFESSIONS_DIR):
+        self.professions_dir = Path(professions_dir)
+        self._professions = {}  # id -> ProfessionPack, filled lazily
+
+    def available_professions(self):
+        """Ids of the installed profession packs (no pack is parsed)"""
+        if not self.professions_dir.is_dir():
+            return []
+        return sorted(path.stem for path in self.professions_dir.glob("*.json"))
+
+    def profession(self, profession_id):
+        """Load (once) and return a profession pack"""
+        pack = self._professions.get(profession_id)
+        if pack is None:
+            path = self.professions_dir / f"{profession_id}.json"
+            if not path.is_file():
+                raise ValueError(f"Unknown profession: {profession_id} "
+                                 f"(available: {', '.join(self.available_professions())})")
+            with open(path, 'r', encoding='utf-8') as f:
+                pack = self._professions[profession_id] = ProfessionPack(json.load(f))
+        return pack
@@ -0,0 +1,131 @@
+import json
+from array import array
+from kerno.models.conditions import compile_condition
+
+END = -1  # Response "next" index that ends the conversation
+
+class CompiledDialogue:
+    """A conversation graph flattened into indexed tables
+
+    Dialogue files look like:
+        {"id": "kaliel_intro", "start": "greet", "nodes": [
+            {"id": "greet", "speaker": "Kaliel", "text": "...", "effects": [...],
+             "responses": [{"text": "...", "next": "other_node", "when": {...},
+                            "effects": [...]}]}]}
+    A response without "next" ends the conversation. "when" uses the
+    condition specs of kerno.models.conditions.
+    """
+
+    def __init__(self, dialogue_data):
+        self.id = dialogue_data["id"]
+        nodes = dialogue_data.get("nodes", [])
+        if not nodes:
+            raise ValueError(f"Dialogue {self.id} has no nodes")
+        self.node_index = {node["id"]: i for i, node in enumerate(nodes)}
+        start = dialogue_data.get("start", nodes[0]["id"])
+        if start not in self.node_index:
+            raise ValueError(f"Dialogue {self.id}: unknown start node '{start}'")
+        self.start = self.node_index[start]
+
+        # Node tables; the responses of node i are rows first[i]..first[i+1]-1
+        self.node_speaker = [node.get("speaker") for node in nodes]
+        self.node_text = [node.get("text", "") for node in nodes]
+        self.node_effects = [node.get("effects", []) for node in nodes]
+        self.first_response = array('l', [0])
+
+        # Response tables
+        self.response_text = []
+        self.response_next = array('l')
+        self.response_condition = array('l')  # Index into self.conditions, -1 if always available
+        self.response_effects = []
+
+        # Identical conditions are compiled once and shared
+        self.conditions = []
+        condition_index = {}
+        for node in nodes:
+            for response in node.get("responses", []):
+                self.response_text.append(response.get("text", ""))
+                next_id = response.get("next")
+                if next_id is not None and next_id not in self.node_index:
+                    raise ValueError(f"Dialogue {self.id}: unknown node '{next_id}'")
+                self.response_next.append(END if next_id is None else self.node_index[next_id])
+                self.response_effects.append(response.get("effects", []))
+                spec = response.get("when")
+                if spec is None:
+                    self.response_condition.append(-1)
+                    continue
+                key = json.dumps(spec, sort_keys=True)
+                if key not in condition_index:
+                    condition_index[key] = len(self.conditions)
+                    self.conditions.append(compile_condition(spec))
+                self.response_condition.append(condition_index[key])
+            self.first_response.append(len(self.response_text))
+
+class DialogueSession:
+    """One player's conversation, with condition results memoized per turn"""
+
+    def __init__(self, dialogue, world, player, agent_id=None):
+        self.dialogue = dialogue
+        self.world = world
+        self.player = player
+        self.agent_id = agent_id  # Agent the player is talking to, if any
+        self.node = dialogue.start
+        self.finished = False
+        self._memo = {}  # condition index -> (turn, result)
+        self._enter(self.node)
+
+    def available_responses(self):
+        """Rows of the responses the player can currently choose"""
+        dialogue = self.dialogue
+        rows = range(dialogue.first_response[self.node], dialogue.first_response[self.node + 1])
+        return [row for row in rows if self._condition_holds(dialogue.response_condition[row])]
+
+    def choose(self, number):
+        """Pick the n-th (1-based) available response; returns False if there is none"""
+        available = self.available_responses()
+        if not 1 <= number <= len(available):
+            return False
+        row = available[number - 1]
+        self._apply(self.dialogue.response_effects[row])
+        next_node = self.dialogue.response_next[row]
+        if next_node == END:
+            self.finished = True
+        else:
+            self._enter(next_node)
+        return True
+
+    def render(self):
+        """Current line of the conversation with the numbered responses"""
+        dialogue = self.dialogue
+        speaker = dialogue.node_speaker[self.node]
+        text = dialogue.node_text[self.node]
+        lines = [f"{speaker}: {text}" if speaker else text]
+        available = self.available_responses()
+        for number, row in enumerate(available, 1):
+            lines.append(f"{number}. {dialogue.response_text[row]}")
+        if not available:
+            self.finished = True
+        return "\n".join(lines)
+
+    def _enter(self, node):
+        """Move to a node and apply its effects"""
+        self.node = node
+        self._apply(self.dialogue.node_effects[node])
+
+    def _apply(self, effects):
+        """Apply dialogue effects with the world's event effect types"""
+        if effects:
+            self.world._process_event_effects(effects, self.player)
+            self._memo.clear()  # Effects may change what the conditions read
+
+    def _condition_holds(self, index):
+        """Evaluate a response condition, reusing the result within a turn"""
+        if index < 0:
+            return True
+        turn = self.world.turn_count
+        cached = self._memo.get(index)
+        if cached is not None and cached[0] == turn:
+            return cached[1]
+        result = self.dialogue.conditions[index](self.world, self.player)
+        self._memo[index] = (turn, result)
+        return result
@@ -0,0 +1,23 @@
+from kerno.models.conditions import compile_condition
+
+class Ending:
+    """A way the story can end, reached as soon as its condition holds
+
+    World files list them as:
+        {"id": "escape", "name": "Fugo", "text": "...", "when": {...}}
+    "when" uses the condition specs of kerno.models.conditions.
+    """
+
+    __slots__ = ("id", "name", "text", "condition")
+
+    def __init__(self, ending_data):
+        self.id = ending_data["id"]
+        if "when" not in ending_data:
+            raise ValueError(f"Ending {self.id} has no condition")
+        self.name = ending_data.get("name", self.id)
+        self.text = ending_data.get("text", "")
+        self.condition = compile_condition(ending_data["when"])
+
+    def reached(self, world, player):
+        """Check whether the story ends this way now"""
+        return self.condition(world, player)
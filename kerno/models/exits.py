@@ -0,0 +1,45 @@
+from weakref import WeakKeyDictionary
+from kerno.models.conditions import compile_requirements
+
+class Exit:
+    """An exit with access requirements (doors, keys, clearances)
+
+    Requirements are compiled once at load time; the result for each
+    player is cached until one of the inputs it reads changes.
+    """
+
+    __slots__ = ("direction", "destination", "condition", "locked_message", "_cache")
+
+    def __init__(self, direction, exit_data):
+        self.direction = direction
+        self.destination = exit_data["to"]
+        self.condition = compile_requirements(exit_data.get("requires"))
+        self.locked_message = exit_data.get("locked_message")
+        self._cache = WeakKeyDictionary()  # player -> (signature, result)
+
+    def is_open(self, world, player):
+        """Check whether a player may pass"""
+        signature = self.condition.signature(world, player)
+        cached = self._cache.get(player)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        result = self.condition(world, player)
+        self._cache[player] = (signature, result)
+        return result
+
+def parse_exits(exits_data):
+    """Split a room's exits into direction -> destination and direction -> Exit for guarded exits
+
+    An exit is either a destination id or
+    {"to": id, "requires": {...}, "locked_message": "..."}.
+    """
+    exits = {}
+    guarded = {}
+    for direction, exit_data in exits_data.items():
+        if isinstance(exit_data, dict):
+            exits[direction] = exit_data["to"]
+            if "requires" in exit_data:
+                guarded[direction] = Exit(direction, exit_data)
+        else:
+            exits[direction] = exit_data
+    return exits, guarded
@@ -0,0 +1,94 @@
+# Grid step for each exit direction: (x, y, z); north is up on the map
+DIRECTION_VECTORS = {
+    "north": (0, -1, 0),
+    "south": (0, 1, 0),
+    "east": (1, 0, 0),
+    "west": (-1, 0, 0),
+    "up": (0, 0, 1),
+    "down": (0, 0, -1)
+}
+
+class ExplorationTracker:
+    """Locations and links the player has explored, laid out on a grid
+
+    Coordinates are assigned from exit directions as locations are
+    discovered. Newly changed cells are queued in dirty_cells so map
+    renderers only redraw what changed.
+    """
+
+    def __init__(self):
+        self.coords = {}  # location id -> (x, y, z)
+        self.cells = {}  # (x, y, z) -> location id
+        self.links = set()  # Frozensets of two explored, connected location ids
+        self.dirty_cells = set()  # Cells changed since the last drain_dirty()
+
+    def __contains__(self, location_id):
+        return location_id in self.coords
+
+    def __len__(self):
+        return len(self.coords)
+
+    def visit(self, location_id, came_from=None, direction=None):
+        """Record arriving at a location, optionally from a neighbor in a direction"""
+        if location_id not in self.coords:
+            origin = self.coords.get(came_from)
+            if origin is None:
+                self._place(location_id, self._free_cell((0, 0, 0), (1, 0, 0)))
+            else:
+                step = DIRECTION_VECTORS.get(direction, (1, 0, 0))
+                target = tuple(o + s for o, s in zip(origin, step))
+                self._place(location_id, self._free_cell(target, step))
+        if came_from in self.coords and came_from != location_id:
+            link = frozenset((came_from, location_id))
+            if link not in self.links:
+                self.links.add(link)
+                self.dirty_cells.add(self.coords[came_from])
+                self.dirty_cells.add(self.coords[location_id])
+
+    def linked(self, a, b):
+        """Check whether two locations are known to be connected"""
+        return frozenset((a, b)) in self.links
+
+    def drain_dirty(self):
+        """Return and reset the set of changed cells"""
+        dirty = self.dirty_cells
+        self.dirty_cells = set()
+        return dirty
+
+    def to_dict(self):
+        """Serializable exploration state"""
+        return {
+            "coords": {location_id: list(cell) for location_id, cell in self.coords.items()},
+            "links": [sorted(link) for link in self.links]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a tracker from to_dict() output"""
+        tracker = cls()
+        for location_id, cell in data.get("coords", {}).items():
+            tracker._place(location_id, tuple(cell))
+        tracker.links = {frozenset(link) for link in data.get("links", [])}
+        return tracker
+
+    def _place(self, location_id, cell):
+        self.coords[location_id] = cell
+        self.cells[cell] = location_id
+        self.dirty_cells.add(cell)
+
+    def _free_cell(self, cell, step):
+        """The given cell, or the nearest free one continuing in the same direction"""
+        for _ in range(8):
+            if cell not in self.cells:
+                return cell
+            cell = tuple(c + s for c, s in zip(cell, step))
+        # Crowded area: spiral outwards on the same level
+        x, y, z = cell
+        radius = 1
+        while True:
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    candidate = (x + dx, y + dy, z)
+                    if candidate not in self.cells:
+                        return candidate
+            radius += 1
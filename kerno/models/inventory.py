@@ -0,0 +1,141 @@
+def normalize_name(name):
+    """Normalize an item name for lookups (case and whitespace insensitive)"""
+    return " ".join(name.lower().split())
+
+def _unindex(index, name, key):
+    """Remove a stack key from an id or name index"""
+    keys = index[name]
+    del keys[key]
+    if not keys:
+        del index[name]
+
+class Inventory:
+    """Item container indexed by id and by name, with stacking and capacity limits
+
+    Items sharing an id are stored once with a quantity, unless they carry
+    per-instance state (an ItemInstance with overrides, such as a lamp's
+    charge): each of those keeps its own entry so its state is not merged
+    into another copy. Iterating yields one item dict per entry. Weight
+    ("weight", kg) and volume ("volume") totals are kept up to date on
+    every change.
+    """
+
+    def __init__(self, max_weight=None, max_volume=None):
+        self.max_weight = max_weight
+        self.max_volume = max_volume
+        self._stacks = {}  # stack key -> [item, quantity]; the key is the id, or (id, serial) for items with state
+        self._by_id = {}  # id -> {stack key: None} in insertion order
+        self._by_name = {}  # normalized name -> {stack key: None} in insertion order
+        self._serial = 0  # Last serial given to an item with state
+        self.weight = 0
+        self.volume = 0
+        self.count = 0  # Total number of items, counting every unit of a stack
+        self.version = 0  # Increases on every change, so callers can cache derived data
+
+    def __len__(self):
+        return len(self._stacks)
+
+    def __iter__(self):
+        return iter([stack[0] for stack in self._stacks.values()])
+
+    def __contains__(self, item_id):
+        return item_id in self._by_id
+
+    def get(self, item_id):
+        """Return the (first) item with the given id, or None"""
+        keys = self._by_id.get(item_id)
+        return self._stacks[next(iter(keys))][0] if keys else None
+
+    def quantity(self, item_id):
+        """Number of units of an item, over all its entries"""
+        return sum(self._stacks[key][1] for key in self._by_id.get(item_id, ()))
+
+    def stacks(self):
+        """List of (item, quantity) pairs"""
+        return [(item, quantity) for item, quantity in self._stacks.values()]
+
+    def can_add(self, item, quantity=1):
+        """Check whether the capacity limits allow adding an item"""
+        if self.max_weight is not None and self.weight + item.get("weight", 0) * quantity > self.max_weight:
+            return False
+        if self.max_volume is not None and self.volume + item.get("volume", 0) * quantity > self.max_volume:
+            return False
+        return True
+
+    def add(self, item, quantity=1):
+        """Add units of an item; returns False if it would exceed the capacity"""
+        if not self.can_add(item, quantity):
+            return False
+        item_id = item["id"]
+        if getattr(item, "state", None):
+            self._serial += 1
+            key = (item_id, self._serial)
+        else:
+            key = item_id
+        stack = self._stacks.get(key)
+        if stack:
+            stack[1] += quantity
+        else:
+            self._stacks[key] = [item, quantity]
+            self._by_id.setdefault(item_id, {})[key] = None
+            self._by_name.setdefault(normalize_name(item["name"]), {})[key] = None
+        self._account(item, quantity)
+        return True
+
+    def remove(self, item, quantity=1):
+        """Remove units of an item and return the item, or None if not held
+
+        item is an id (the oldest entry with that id is used) or an item
+        from this inventory, such as one returned by find().
+        """
+        key = self._key(item)
+        stack = self._stacks.get(key)
+        if not stack or stack[1] < quantity:
+            return None
+        item = stack[0]
+        stack[1] -= quantity
+        if stack[1] == 0:
+            del self._stacks[key]
+            _unindex(self._by_id, item["id"], key)
+            _unindex(self._by_name, normalize_name(item["name"]), key)
+        self._account(item, -quantity)
+        return item
+
+    def find(self, name):
+        """Find an item by name: exact match through the index, else a partial match"""
+        key = normalize_name(name)
+        keys = self._by_name.get(key)
+        if keys:
+            return self._stacks[next(iter(keys))][0]
+        # Partial names ("stango" for "Nutrivo-Stango") fall back to the name index
+        for indexed_name, keys in self._by_name.items():
+            if key in indexed_name:
+                return self._stacks[next(iter(keys))][0]
+        return None
+
+    def clear(self):
+        """Remove every item"""
+        self._stacks.clear()
+        self._by_id.clear()
+        self._by_name.clear()
+        self.weight = 0
+        self.volume = 0
+        self.count = 0
+        self.version += 1
+
+    def _key(self, item):
+        """Stack key of an item id or of an item held in this inventory"""
+        if isinstance(item, str):
+            keys = self._by_id.get(item)
+            return next(iter(keys)) if keys else None
+        for key in self._by_id.get(item["id"], ()):
+            if self._stacks[key][0] is item:
+                return key
+        return None
+
+    def _account(self, item, quantity):
+        """Update the running totals after adding (or removing) units"""
+        self.weight += item.get("weight", 0) * quantity
+        self.volume += item.get("volume", 0) * quantity
+        self.count += quantity
+        self.version += 1
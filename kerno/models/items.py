@@ -0,0 +1,141 @@
+from collections.abc import Mapping
+
+_MISSING = object()
+
+class ItemInstance(Mapping):
+    """A placed item: a shared prototype plus a small per-instance state overlay
+
+    Behaves like a read-only item dict, so code written for inline item
+    dicts keeps working. Keys in the overlay shadow the prototype's.
+    """
+
+    __slots__ = ("prototype", "state")
+
+    def __init__(self, prototype, state=None):
+        self.prototype = prototype
+        self.state = state  # None until the instance diverges from its prototype
+
+    def __getitem__(self, key):
+        state = self.state
+        if state is not None and key in state:
+            return state[key]
+        return self.prototype[key]
+
+    def __contains__(self, key):
+        return (self.state is not None and key in self.state) or key in self.prototype
+
+    def __iter__(self):
+        if not self.state:
+            return iter(self.prototype)
+        return iter(dict.fromkeys([*self.prototype, *self.state]))
+
+    def __len__(self):
+        if not self.state:
+            return len(self.prototype)
+        return len(self.prototype.keys() | self.state.keys())
+
+    def __repr__(self):
+        return f"ItemInstance({self.prototype.get('id')!r}, {self.state!r})"
+
+    def set(self, key, value):
+        """Change a value for this instance only"""
+        if self.state is None:
+            self.state = {}
+        self.state[key] = value
+
+    def to_dict(self):
+        """Compact form for world and save files"""
+        if not self.state:
+            return self.prototype["id"]
+        return {"proto": self.prototype["id"], **self.state}
+
+class ItemRegistry:
+    """Item prototypes defined once per world, from which placed items are instanced"""
+
+    def __init__(self):
+        self.prototypes = {}  # id -> prototype dict
+        self.loading = False  # While a file is read, ids may be referenced before their definition
+        self.undefined = set()  # Ids referenced during loading and not defined yet
+
+    def __contains__(self, item_id):
+        return item_id in self.prototypes
+
+    def __getitem__(self, item_id):
+        return self.prototypes[item_id]
+
+    def __len__(self):
+        return len(self.prototypes)
+
+    def __iter__(self):
+        return iter(self.prototypes)
+
+    def get(self, item_id, default=None):
+        """Return a prototype by id"""
+        return self.prototypes.get(item_id, default)
+
+    def define(self, item_data):
+        """Register (or update) a prototype and return it
+
+        Existing prototype dicts are updated in place so instances created
+        before the definition was read see the final data.
+        """
+        prototype = self.prototypes.get(item_data["id"])
+        if prototype is None:
+            prototype = self.prototypes[item_data["id"]] = dict(item_data)
+        else:
+            prototype.update(item_data)
+        self.undefined.discard(item_data["id"])
+        return prototype
+
+    def finish_loading(self):
+        """End a file load; raises ValueError if an item was referenced but never defined"""
+        self.loading = False
+        if self.undefined:
+            undefined = sorted(self.undefined)
+            self.abort_loading()
+            raise ValueError(f"Unknown item ids: {', '.join(undefined)}")
+
+    def abort_loading(self):
+        """End a file load that failed, dropping the placeholders it left"""
+        self.loading = False
+        for item_id in self.undefined:
+            del self.prototypes[item_id]
+        self.undefined.clear()
+
+    def instantiate(self, spec):
+        """Create an instance from a world or save file entry
+
+        An entry is a prototype id ("nutrition_bar"), a prototype reference
+        with overrides ({"proto": "nutrition_bar", "name": "..."}) or, for
+        older files, a complete inline item dict.
+        """
+        if isinstance(spec, ItemInstance):
+            return spec
+        if isinstance(spec, str):
+            return ItemInstance(self._prototype(spec))
+        if "proto" in spec:
+            state = {key: value for key, value in spec.items() if key != "proto"}
+            return ItemInstance(self._prototype(spec["proto"]), state or None)
+
+        # Inline item dict: the first occurrence becomes the prototype,
+        # later ones only keep the keys where they differ from it
+        prototype = self.prototypes.get(spec["id"])
+        if prototype is None:
+            return ItemInstance(self.define(spec))
+        state = {key: value for key, value in spec.items() if prototype.get(key, _MISSING) != value}
+        return ItemInstance(prototype, state or None)
+
+    def _prototype(self, item_id):
+        """Prototype by id
+
+        While loading, unknown ids get a placeholder filled in by a later
+        define() (finish_loading() reports those that never were); otherwise
+        they raise KeyError.
+        """
+        prototype = self.prototypes.get(item_id)
+        if prototype is None:
+            if not self.loading:
+                raise KeyError(f"Unknown item: {item_id}")
+            prototype = self.prototypes[item_id] = {"id": item_id, "name": item_id}
+            self.undefined.add(item_id)
+        return prototype
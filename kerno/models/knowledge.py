@@ -0,0 +1,160 @@
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text):
+    """Split text into lowercase, accent-free word tokens"""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _TOKEN.findall(text)
+
+class KnowledgeStore:
+    """What the player has learned and seen, with an inverted index for notebook searches
+
+    Learned entries behave like the old knowledge dict (key -> value).
+    Observed entries (room and item descriptions the player has seen) are
+    only searchable. Both are indexed word by word as they are added.
+    """
+
+    def __init__(self, entries=None):
+        self._learned = {}  # key -> value
+        self._documents = {}  # doc id -> (title, text)
+        self._postings = {}  # token -> {doc id: number of occurrences}
+        self._tokens = []  # Sorted distinct tokens, for prefix lookups
+        self.version = 0  # Increases whenever something is learned
+        for key, value in (entries or {}).items():
+            self.learn(key, value)
+
+    def __contains__(self, key):
+        return key in self._learned
+
+    def __getitem__(self, key):
+        return self._learned[key]
+
+    def __setitem__(self, key, value):
+        self.learn(key, value)
+
+    def __iter__(self):
+        return iter(self._learned)
+
+    def __len__(self):
+        return len(self._learned)
+
+    def get(self, key, default=None):
+        """Learned value for a key"""
+        return self._learned.get(key, default)
+
+    def items(self):
+        """Learned (key, value) pairs"""
+        return self._learned.items()
+
+    def to_dict(self):
+        """Learned entries as a plain dict"""
+        return dict(self._learned)
+
+    @property
+    def indexed(self):
+        """Number of indexed documents, learned and observed"""
+        return len(self._documents)
+
+    def observed(self):
+        """Documents indexed by observe(), as (doc id, title, indexed text) tuples"""
+        return [(doc_id, title, text) for doc_id, (title, text) in self._documents.items()
+                if not doc_id.startswith("learn:")]
+
+    def restore(self, entries, observed=()):
+        """Replace the contents with learned (key, value) pairs and documents from observed()
+
+        version keeps increasing, so data cached against it is invalidated.
+        """
+        version = self.version
+        self._learned = {}
+        self._documents = {}
+        self._postings = {}
+        self._tokens = []
+        for key, value in entries:
+            self.learn(key, value)
+        for doc_id, title, text in observed:
+            self._index(doc_id, title, text)
+        self.version = version + 1
+
+    def learn(self, key, value):
+        """Add or update a learned entry and index it"""
+        self._learned[key] = value
+        self.version += 1
+        self._index(f"learn:{key}", str(key), f"{key} {value}" if isinstance(value, str) else str(key))
+
+    def observe(self, doc_id, title, text):
+        """Index something the player has seen (once per doc id)"""
+        if doc_id not in self._documents:
+            self._index(doc_id, title, f"{title} {text}")
+
+    def has_seen(self, doc_id):
+        """Check whether a document is indexed"""
+        return doc_id in self._documents
+
+    def complete(self, prefix, limit=10):
+        """Indexed words starting with a prefix, for autocompletion"""
+        prefix = "".join(tokenize(prefix))
+        start = bisect_left(self._tokens, prefix)
+        words = []
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix) or len(words) >= limit:
+                break
+            words.append(token)
+        return words
+
+    def search(self, query, limit=20):
+        """Entries containing every word of the query (each word matches as a prefix)
+
+        Returns (doc id, title, text) tuples, best matches first.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        scores = None
+        for term in terms:
+            term_scores = {}
+            start = bisect_left(self._tokens, term)
+            for token in self._tokens[start:]:
+                if not token.startswith(term):
+                    break
+                # Whole-word matches rank above prefix matches
+                weight = 2 if token == term else 1
+                for doc_id, occurrences in self._postings[token].items():
+                    term_scores[doc_id] = term_scores.get(doc_id, 0) + occurrences * weight
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc_id: score + term_scores[doc_id] for doc_id, score in scores.items() if doc_id in term_scores}
+            if not scores:
+                return []
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))[:limit]
+        return [(doc_id, *self._documents[doc_id]) for doc_id in ranked]
+
+    def _index(self, doc_id, title, text):
+        """(Re)index a document"""
+        if doc_id in self._documents:
+            self._unindex(doc_id)
+        self._documents[doc_id] = (title, text)
+        counts = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        for token, occurrences in counts.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._tokens, token)
+            postings[doc_id] = occurrences
+
+    def _unindex(self, doc_id):
+        """Remove a document from the index"""
+        title, text = self._documents.pop(doc_id)
+        for token in set(tokenize(text)):
+            postings = self._postings[token]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
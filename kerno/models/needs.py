@@ -0,0 +1,75 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+NEEDS = ("health", "hunger", "thirst", "energy")
+NEED_LIMITS = (0, 100)
+
+# Change of each need per activity; the same table drives the Player and
+# every simulated agent
+NEED_RATES = {
+    "move": {"energy": -1, "hunger": 0.5, "thirst": 0.8},
+    "rest": {"energy": 5, "hunger": 0.5, "thirst": 0.8},
+    # Passive decay per turn in advanced survival mode
+    "idle": {"hunger": 0.2, "thirst": 0.3}
+}
+
+# Status bands: (thresholds, message keys from low to high value, strict)
+# With strict=True a value must exceed a threshold to reach the next band
+# (health 90 is still "status.health.scratched"); otherwise reaching it is
+# enough (hunger 20 is already "status.hunger.peckish"). The texts live in
+# the message catalogs (kerno.utils.i18n).
+STATUS_BANDS = {
+    "health": ((10, 30, 50, 70, 90),
+               ("status.health.near_death", "status.health.critical", "status.health.serious",
+                "status.health.wounded", "status.health.scratched", "status.health.healthy"), True),
+    "hunger": ((20, 40, 60, 80),
+               ("status.hunger.fed", "status.hunger.peckish", "status.hunger.hungry",
+                "status.hunger.very_hungry", "status.hunger.starving"), False),
+    "thirst": ((20, 40, 60, 80),
+               ("status.thirst.hydrated", "status.thirst.slightly_thirsty", "status.thirst.thirsty",
+                "status.thirst.very_thirsty", "status.thirst.dehydrated"), False),
+    "energy": ((20, 40, 60, 80),
+               ("status.energy.exhausted", "status.energy.very_tired", "status.energy.tired",
+                "status.energy.alert", "status.energy.energetic"), True)
+}
+
+def clamp(value):
+    """Keep a need value inside its limits"""
+    low, high = NEED_LIMITS
+    return low if value < low else high if value > high else value
+
+def adjust(target, need, delta):
+    """Change one need of a Player-like object, respecting the limits"""
+    setattr(target, need, clamp(getattr(target, need) + delta))
+
+def apply_activity(target, activity, multiplier=1):
+    """Apply one row of NEED_RATES to a Player-like object"""
+    for need, rate in NEED_RATES[activity].items():
+        setattr(target, need, clamp(getattr(target, need) + rate * multiplier))
+
+def status_label(need, value):
+    """Message key of the status band of a single need value"""
+    thresholds, labels, strict = STATUS_BANDS[need]
+    position = bisect_left(thresholds, value) if strict else bisect_right(thresholds, value)
+    return labels[position]
+
+def status_labels(need, values):
+    """Message keys of the status bands for a whole column of need values"""
+    thresholds, labels, strict = STATUS_BANDS[need]
+    find = bisect_left if strict else bisect_right
+    return [labels[find(thresholds, value)] for value in values]
+
+def apply_activities_columns(columns, activities):
+    """Apply NEED_RATES to columns of need values (dict of need -> array)
+
+    activities gives the activity of each row. Returns a dict with the new
+    columns; needs no activity changes are returned unchanged.
+    """
+    low, high = NEED_LIMITS
+    updated = dict(columns)
+    for need, values in columns.items():
+        rates = {activity: NEED_RATES[activity].get(need, 0) for activity in set(activities)}
+        if any(rates.values()):
+            updated[need] = array('d', [min(high, max(low, v + rates[activity]))
+                                        for v, activity in zip(values, activities)])
+    return updated
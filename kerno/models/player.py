@@ -1,16 +1,32 @@
+from kerno.models import needs
+from kerno.models.exploration import ExplorationTracker
+from kerno.models.inventory import Inventory
+from kerno.models.knowledge import KnowledgeStore
+from kerno.models.status_effects import StatusEffects
+from kerno.utils.i18n import load_catalog
+
+# How much the player can carry
+MAX_CARRY_WEIGHT = 30  # kg
+MAX_CARRY_VOLUME = 60  # liters
+
 class Player:
     def __init__(self):
+        self.id = "player"  # Stable identifier; set a distinct one for each player sharing a world
         self.name = "Technician"
         self.profession = "technician"  # Default profession for the MVP
         self.current_location = None  # ID of current room or passage
-        self.inventory = []  # List of item dictionaries
+        self.explored = ExplorationTracker()  # Map of the places the player has been
+        self.inventory = Inventory(MAX_CARRY_WEIGHT, MAX_CARRY_VOLUME)
         self.health = 100
         self.hunger = 0  # 0-100 scale, 100 is starving
         self.thirst = 0  # 0-100 scale, 100 is dehydrated
         self.energy = 100  # 0-100 scale, 0 is exhausted
-        self.knowledge = {}  # Dict of learned information
+        self.knowledge = KnowledgeStore()  # Learned information and seen descriptions
         self.scars = []  # List of injury descriptions
-        self.status_effects = []  # List of temporary effects
+        self.status_effects = StatusEffects()  # Temporary effects keyed by id
+        self.survival_mode = False  # Advanced mode: needs also decay while idle
+        self.turn = 0
+        self.messages = load_catalog()  # Message catalog of the player's language
         self.stats = {
             "moves": 0,
             "items_taken": 0,
@@ -18,43 +34,83 @@ class Player:
             "interactions": 0
         }
         
+    def to_dict(self):
+        """Serializable player state; items are written in their compact form"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "profession": self.profession,
+            "locale": self.messages.locale,
+            "current_location": self.current_location,
+            "inventory": [
+                [item.to_dict() if hasattr(item, "to_dict") else dict(item), quantity]
+                for item, quantity in self.inventory.stacks()
+            ],
+            "health": self.health,
+            "hunger": self.hunger,
+            "thirst": self.thirst,
+            "energy": self.energy,
+            "knowledge": self.knowledge.to_dict(),
+            "scars": list(self.scars),
+            "status_effects": self.status_effects.to_list(),
+            "survival_mode": self.survival_mode,
+            "turn": self.turn,
+            "stats": dict(self.stats),
+            "explored": self.explored.to_dict()
+        }
+        
+    @classmethod
+    def from_dict(cls, data, item_registry):
+        """Rebuild a player from to_dict() output, instancing items from the registry"""
+        player = cls()
+        for key in ("id", "name", "profession", "current_location", "health", "hunger",
+                    "thirst", "energy", "survival_mode", "turn"):
+            if key in data:
+                setattr(player, key, data[key])
+        for item, quantity in data.get("inventory", []):
+            player.inventory.add(item_registry.instantiate(item), quantity)
+        player.knowledge = KnowledgeStore(data.get("knowledge", {}))
+        player.scars = list(data.get("scars", []))
+        player.status_effects.restore(data.get("status_effects", []))
+        player.stats.update(data.get("stats", {}))
+        if "locale" in data:
+            player.messages = load_catalog(data["locale"])
+        if "explored" in data:
+            player.explored = ExplorationTracker.from_dict(data["explored"])
+        return player
+        
     def add_item(self, item):
-        """Add an item to the player's inventory"""
-        self.inventory.append(item)
+        """Add an item to the player's inventory; returns False if it is too much to carry"""
+        if not self.inventory.add(item):
+            return False
         self.stats["items_taken"] += 1
         return True
         
-    def remove_item(self, item_id):
-        """Remove an item from inventory by ID"""
-        for i, item in enumerate(self.inventory):
-            if item["id"] == item_id:
-                self.inventory.pop(i)
-                return True
-        return False
+    def remove_item(self, item):
+        """Remove an item from inventory, by ID or as the item itself (see Inventory.remove)"""
+        return self.inventory.remove(item) is not None
         
     def has_item(self, item_id):
         """Check if player has a specific item"""
-        return any(item["id"] == item_id for item in self.inventory)
-        
-    def use_item(self, item_id):
-        """Use an item from inventory"""
-        for item in self.inventory:
-            if item["id"] == item_id:
-                self.stats["items_used"] += 1
-                # Check if item is consumable and should be removed
-                if item.get("consumable", False):
-                    self.remove_item(item_id)
-                return True
-        return False
+        return item_id in self.inventory
+        
+    def use_item(self, item):
+        """Use an item from inventory, given by ID or as the item itself"""
+        if isinstance(item, str):
+            item = self.inventory.get(item)
+        if item is None:
+            return False
+        self.stats["items_used"] += 1
+        # Check if item is consumable and should be removed
+        if item.get("consumable", False):
+            self.inventory.remove(item)
+        return True
         
     def move(self, direction):
         """Record that player has moved"""
         self.stats["moves"] += 1
-        # Energy consumption
-        self.energy = max(0, self.energy - 1)
-        # Increase hunger and thirst slightly with movement
-        self.hunger = min(100, self.hunger + 0.5)
-        self.thirst = min(100, self.thirst + 0.8)
+        # Moving costs energy and makes the player hungry and thirsty
+        needs.apply_activity(self, "move", self.status_effects.action_multiplier("move"))
         
     def interact(self):
         """Record that player has interacted with something"""
@@ -62,7 +118,12 @@ class Player:
         
     def learn(self, key, value):
         """Add knowledge to the player's memory"""
-        self.knowledge[key] = value
+        self.knowledge.learn(key, value)
+        
+    @property
+    def knowledge_version(self):
+        """Increases whenever something is learned"""
+        return self.knowledge.version
         
     def knows(self, key):
         """Check if player knows something"""
@@ -77,37 +138,49 @@ class Player:
         self.scars.append(description)
         
     def add_status_effect(self, effect):
-        """Add a temporary status effect"""
-        self.status_effects.append(effect)
+        """Add a temporary status effect, expiring after its duration in turns if it has one"""
+        return self.status_effects.add(effect, self.turn)
         
     def remove_status_effect(self, effect_id):
         """Remove a status effect by ID"""
-        self.status_effects = [e for e in self.status_effects if e["id"] != effect_id]
+        return self.status_effects.remove(effect_id)
         
     def has_status_effect(self, effect_id):
         """Check if player has a specific status effect"""
-        return any(effect["id"] == effect_id for effect in self.status_effects)
+        return effect_id in self.status_effects
         
     def consume_food(self, nutrition_value):
         """Reduce hunger based on nutrition value"""
-        self.hunger = max(0, self.hunger - nutrition_value)
+        needs.adjust(self, "hunger", -nutrition_value)
         
     def consume_drink(self, hydration_value):
         """Reduce thirst based on hydration value"""
-        self.thirst = max(0, self.thirst - hydration_value)
+        needs.adjust(self, "thirst", -hydration_value)
         
     def rest(self, energy_recovery):
         """Recover energy based on rest value"""
-        self.energy = min(100, self.energy + energy_recovery)
+        needs.adjust(self, "energy", energy_recovery)
         
     def take_damage(self, amount):
         """Reduce health by damage amount"""
-        self.health = max(0, self.health - amount)
+        needs.adjust(self, "health", -amount)
         return self.health <= 0  # Return true if player died
         
     def heal(self, amount):
         """Increase health by healing amount"""
-        self.health = min(100, self.health + amount)
+        needs.adjust(self, "health", amount)
+        
+    def tick(self, turn):
+        """Advance the player's own clock: passive needs, effect modifiers and expiry
+
+        Returns the status effects that wore off this turn.
+        """
+        self.turn = turn
+        if self.survival_mode:
+            needs.apply_activity(self, "idle", self.status_effects.action_multiplier("idle"))
+        for need, change in self.status_effects.need_modifiers.items():
+            needs.adjust(self, need, change)
+        return self.status_effects.expire(turn)
         
     def get_status(self):
         """Get player status summary"""
@@ -124,55 +197,17 @@ class Player:
         return status
         
     def get_health_status(self):
-        """Get descriptive health status in Ido"""
-        if self.health > 90:
-            return "Sanoza"
-        elif self.health > 70:
-            return "Kelke vundita"
-        elif self.health > 50:
-            return "Vundita"
-        elif self.health > 30:
-            return "Serioze vundita"
-        elif self.health > 10:
-            return "Kritike vundita"
-        else:
-            return "Proxim morto"
+        """Get descriptive health status in the player's language"""
+        return self.messages(needs.status_label("health", self.health))
             
     def get_hunger_status(self):
-        """Get descriptive hunger status in Ido"""
-        if self.hunger < 20:
-            return "Satita"
-        elif self.hunger < 40:
-            return "Iomete hungrega"
-        elif self.hunger < 60:
-            return "Hungrega"
-        elif self.hunger < 80:
-            return "Tre hungrega"
-        else:
-            return "Afamanta"
+        """Get descriptive hunger status in the player's language"""
+        return self.messages(needs.status_label("hunger", self.hunger))
             
     def get_thirst_status(self):
-        """Get descriptive thirst status in Ido"""
-        if self.thirst < 20:
-            return "Hidratizita"
-        elif self.thirst < 40:
-            return "Kelke soifanta"
-        elif self.thirst < 60:
-            return "Soifanta"
-        elif self.thirst < 80:
-            return "Tre soifanta"
-        else:
-            return "Dehidratizita"
+        """Get descriptive thirst status in the player's language"""
+        return self.messages(needs.status_label("thirst", self.thirst))
             
     def get_energy_status(self):
-        """Get descriptive energy status in Ido"""
-        if self.energy > 80:
-            return "Energioza"
-        elif self.energy > 60:
-            return "Vigla"
-        elif self.energy > 40:
-            return "Fatigita"
-        elif self.energy > 20:
-            return "Tre fatigita"
-        else:
-            return "Exhaustita" 
\ No newline at end of file
+        """Get descriptive energy status in the player's language"""
+        return self.messages(needs.status_label("energy", self.energy))
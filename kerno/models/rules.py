@@ -0,0 +1,168 @@
+from kerno.models.conditions import compile_condition
+
+# Upper bound on rule cascades (rules whose effects trigger other rules) per turn
+MAX_CASCADE_ROUNDS = 10
+
+class GlobalState(dict):
+    """global_state dict that records which keys changed and how often"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.changed = set()  # Keys changed since the last consume_changes()
+        self.versions = {}  # key -> number of changes, for callers caching derived data
+
+    def __setitem__(self, key, value):
+        if key in self and self[key] == value:
+            return
+        super().__setitem__(key, value)
+        self._touch(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._touch(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._touch(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._touch(key)
+        return key, value
+
+    def clear(self):
+        for key in list(self):
+            self._touch(key)
+        super().clear()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def version(self, key):
+        """Number of times a key has changed"""
+        return self.versions.get(key, 0)
+
+    def consume_changes(self):
+        """Return the keys changed since the last call and reset the set"""
+        changed = self.changed
+        self.changed = set()
+        return changed
+
+    def _touch(self, key):
+        self.changed.add(key)
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+class Rule:
+    __slots__ = ("id", "order", "condition", "effects", "message", "once", "fired", "last_result", "signature")
+
+    def __init__(self, rule_data, order):
+        self.id = rule_data.get("id", f"rule_{order}")
+        self.order = order
+        self.condition = compile_condition(rule_data.get("when"))
+        self.effects = rule_data.get("effects", [])
+        self.message = rule_data.get("message")
+        self.once = rule_data.get("once", True)
+        self.fired = False
+        self.last_result = False
+        self.signature = None  # Inputs seen at the last evaluation, for rules reading the player
+
+class RulesEngine:
+    """Conditional rules over global_state, re-evaluated only when their keys change
+
+    A rule fires when its condition becomes true (it must turn false again
+    before firing a second time, and rules with "once" fire only once).
+    Rules whose conditions read the player (inventory, knowledge,
+    profession) are re-evaluated when the versions of those inputs change.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.rules = []
+        self.by_key = {}  # global_state key -> rules depending on it
+        self.player_rules = []  # Rules whose conditions read player inputs
+        self._pending = []  # New rules not evaluated yet
+
+    def add(self, rule_data):
+        """Register a rule from its world file description"""
+        rule = Rule(rule_data, len(self.rules))
+        self.rules.append(rule)
+        for key in rule.condition.keys:
+            self.by_key.setdefault(key, []).append(rule)
+        if rule.condition.uses:
+            self.player_rules.append(rule)
+        self._pending.append(rule)
+        return rule
+
+    def snapshot(self):
+        """Firing state of every rule as an immutable value, for timelines"""
+        return tuple((rule.fired, rule.last_result) for rule in self.rules)
+
+    def restore(self, state):
+        """Return the rules to a state produced by snapshot()
+
+        Rules added after the snapshot (by content packs) are left as they are.
+        """
+        for rule, (fired, last_result) in zip(self.rules, state):
+            rule.fired = fired
+            rule.last_result = last_result
+            rule.signature = None
+
+    def evaluate(self, player):
+        """Evaluate the rules affected by state changes and fire them; returns messages"""
+        messages = []
+        state = self.world.global_state
+        candidates = self._pending
+        self._pending = []
+        changed = state.consume_changes()
+
+        if player is None:
+            # Rules reading the player wait until there is one
+            self._pending = [rule for rule in candidates if rule.condition.uses]
+            candidates = [rule for rule in candidates if not rule.condition.uses]
+
+        for _ in range(MAX_CASCADE_ROUNDS):
+            affected = {id(rule): rule for rule in candidates}
+            for key in changed:
+                for rule in self.by_key.get(key, ()):
+                    if player is not None or not rule.condition.uses:
+                        affected[id(rule)] = rule
+            if player is not None:
+                for rule in self.player_rules:
+                    signature = rule.condition.signature(self.world, player)
+                    if signature != rule.signature:
+                        rule.signature = signature
+                        affected[id(rule)] = rule
+            if not affected:
+                break
+            for rule in sorted(affected.values(), key=lambda r: r.order):
+                self._evaluate_rule(rule, player, messages)
+            candidates = []
+            changed = state.consume_changes()
+        else:
+            # Cascade cut short: rules reading the last round's changes run next turn
+            state.changed.update(changed)
+        return messages
+
+    def _evaluate_rule(self, rule, player, messages):
+        """Fire a rule if its condition just became true"""
+        if rule.once and rule.fired:
+            return
+        result = rule.condition(self.world, player)
+        if result and not rule.last_result:
+            rule.fired = True
+            if rule.message:
+                messages.append(rule.message)
+            if rule.effects:
+                self.world._process_event_effects(rule.effects, player)
+        rule.last_result = result
@@ -0,0 +1,157 @@
+import math
+from collections import deque
+
+# Level of detail assigned to each room relative to the player
+LOD_FULL = 0  # Simulated every turn
+LOD_COARSE = 1  # Simulated in batches every few turns
+LOD_DORMANT = 2  # Not simulated; caught up when the player gets close
+
+def room_effects(effects):
+    """The effects of an event that act on its room or the world, not on the player
+
+    Events rolled away from the player, or caught up in a batch, only apply
+    these: damage, items given or taken and knowledge learned only happen
+    while the player is in the room. Scheduled events are left out too, as
+    they would report their message to the player later.
+    """
+    return [effect for effect in effects
+            if effect.get("type") == "set_global"
+            or (effect.get("type") in ("add_item", "remove_item") and effect.get("target") == "room")]
+
+def occurrences(rng, probability, turns):
+    """How many times an event with a per-turn probability happens in a number of turns
+
+    Draws the gaps between occurrences (geometrically distributed), so the
+    cost grows with the count rather than with the turns.
+    """
+    if probability <= 0 or turns <= 0:
+        return 0
+    if probability >= 1:
+        return turns
+    log_miss = math.log(1 - probability)
+    count, turn = 0, 0
+    while True:
+        turn += int(math.log(1 - rng.random()) / log_miss) + 1
+        if turn > turns:
+            return count
+        count += 1
+
+class LODScheduler:
+    """Simulates rooms away from the player at a level of detail that depends on distance"""
+
+    def __init__(self, world, near_radius=1, far_radius=3, coarse_interval=5):
+        self.world = world
+        self.near_radius = near_radius
+        self.far_radius = far_radius
+        self.coarse_interval = coarse_interval
+        self.last_simulated = {}  # room id -> last turn the room was simulated
+        self._neighborhood_origin = None
+        self._neighborhood = {}  # room id -> distance from the origin
+        self._coarse_slot = {}  # room id -> turn offset to stagger coarse updates
+
+    def reset(self, turn=0):
+        """Mark every room as simulated up to the given turn"""
+        self.last_simulated = {location_id: turn for location_id in (*self.world.rooms, *self.world.passages)}
+        self._neighborhood_origin = None
+
+    def invalidate(self):
+        """Forget the cached neighborhood; call when locations or exits are added"""
+        self._neighborhood_origin = None
+
+    def neighborhood(self, origin):
+        """Rooms and passages within far_radius of origin, with their distances (cached per origin)"""
+        if origin == self._neighborhood_origin:
+            return self._neighborhood
+        distances = {origin: 0}
+        queue = deque([origin])
+        while queue:
+            room_id = queue.popleft()
+            distance = distances[room_id]
+            if distance >= self.far_radius:
+                continue
+            location = self.world.get_location(room_id)
+            if not location:
+                continue
+            for destination in location.exits.values():
+                # Only loaded locations: content packs stay unloaded until the player needs them
+                if destination not in distances and (destination in self.world.rooms
+                                                     or destination in self.world.passages):
+                    distances[destination] = distance + 1
+                    queue.append(destination)
+        self._neighborhood_origin = origin
+        self._neighborhood = distances
+        return distances
+
+    def level_of_detail(self, room_id, origin):
+        """LOD level of a room for a player standing in origin"""
+        distance = self.neighborhood(origin).get(room_id)
+        if distance is None:
+            return LOD_DORMANT
+        return LOD_FULL if distance <= self.near_radius else LOD_COARSE
+
+    def tick(self, turn, player):
+        """Simulate the rooms around the player for this turn
+
+        The player's own room is brought up to date (including this turn's
+        processes) but its random events are left to World.process_events,
+        which reports their messages.
+        """
+        origin = player.current_location
+        for room_id, distance in self.neighborhood(origin).items():
+            last = self.last_simulated.get(room_id, turn - 1)
+            elapsed = turn - last
+            if elapsed <= 0:
+                continue
+            if distance <= self.near_radius:
+                # Full fidelity: catch up anything missed while the room was
+                # dormant or coarse, then simulate this turn in detail
+                if elapsed > 1:
+                    self.advance(room_id, elapsed - 1, player)
+                self._advance_processes(room_id, 1)
+                if distance > 0:
+                    self._roll_events(room_id, player)
+                self.last_simulated[room_id] = turn
+            elif (turn + self._slot(room_id)) % self.coarse_interval == 0:
+                self.advance(room_id, elapsed, player)
+                self.last_simulated[room_id] = turn
+
+    def advance(self, room_id, turns, player):
+        """Apply the aggregate outcome of several turns to a room at once"""
+        self._advance_processes(room_id, turns)
+        room = self.world.get_location(room_id)
+        if not room:
+            return
+        for event in room.events:
+            if "effects" not in event or "probability" not in event:
+                continue
+            # Every occurrence in the elapsed turns counts, so items and the like accumulate
+            for _ in range(occurrences(self.world.random, event["probability"], turns)):
+                self.world._process_event_effects(room_effects(event["effects"]), player, room_id=room_id)
+
+    def _advance_processes(self, room_id, turns):
+        """Advance the continuous processes of a room (flooding, power drain...)"""
+        room = self.world.get_location(room_id)
+        if not room:
+            return
+        for process in getattr(room, "processes", ()):
+            key = process["property"]
+            value = room.properties.get(key, process.get("start", 0)) + process.get("rate", 0) * turns
+            if "min" in process:
+                value = max(process["min"], value)
+            if "max" in process:
+                value = min(process["max"], value)
+            room.properties[key] = value
+
+    def _roll_events(self, room_id, player):
+        """Roll the random events of an off-screen room for one turn"""
+        room = self.world.get_location(room_id)
+        for event in room.events if room else ():
+            if "effects" in event and "probability" in event and self.world.random.random() < event["probability"]:
+                self.world._process_event_effects(room_effects(event["effects"]), player, room_id=room_id)
+
+    def _slot(self, room_id):
+        """Stable per-room offset so coarse updates are spread across turns"""
+        slot = self._coarse_slot.get(room_id)
+        if slot is None:
+            slot = self._coarse_slot[room_id] = len(self._coarse_slot) % self.coarse_interval
+        return slot
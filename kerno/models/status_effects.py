@@ -0,0 +1,172 @@
+from itertools import count
+from kerno.utils.scheduler import TurnScheduler
+
+# How a new effect combines with an active effect of the same id
+STACK_REFRESH = "refresh"  # Restart the duration (default)
+STACK_EXTEND = "extend"  # Add the new duration to the remaining one
+STACK_STACK = "stack"  # Add a stack (up to max_stacks) and restart the duration
+STACK_IGNORE = "ignore"  # Keep the active effect untouched
+
+class StatusEffects:
+    """Active status effects keyed by id, with heap-based timed expiry
+
+    Effects are dicts such as:
+        {"id": "poisoned", "name": "Venenita", "description": "...",
+         "duration": 5, "stacking": "stack", "max_stacks": 3,
+         "modifiers": {"health": -2}, "action_modifiers": {"move": 1.5},
+         "combat_modifiers": {"attack": 0.5}}
+    "modifiers" are need changes applied every turn (per stack),
+    "action_modifiers" multiply the need costs of an activity and
+    "combat_modifiers" multiply the damage dealt ("attack") or taken
+    ("defend") in fights.
+    """
+
+    def __init__(self):
+        self._effects = {}  # id -> effect dict
+        self._expiry = TurnScheduler()  # (id, generation) by expiry turn
+        self._generation = {}  # id -> generation of its live expiry entry
+        self._generations = count(1)
+        self.need_modifiers = {}  # need -> total change per turn
+        self.action_modifiers = {}  # activity -> total multiplier
+        self.combat_modifiers = {}  # "attack" or "defend" -> total multiplier
+        self._need_parts = {}  # need -> {effect id: change per turn with its stacks}
+        self._multiplier_parts = {}  # (effect key, name) -> {effect id: multiplier with its stacks}
+
+    def __len__(self):
+        return len(self._effects)
+
+    def __bool__(self):
+        return bool(self._effects)
+
+    def __iter__(self):
+        return iter(list(self._effects.values()))
+
+    def __contains__(self, effect_id):
+        return effect_id in self._effects
+
+    def get(self, effect_id):
+        """Return an active effect by id, or None"""
+        return self._effects.get(effect_id)
+
+    def add(self, effect, turn):
+        """Add an effect, applying its stacking rule if it is already active"""
+        effect_id = effect["id"]
+        active = self._effects.get(effect_id)
+        duration = effect.get("duration")
+
+        if active is None:
+            active = dict(effect)
+            active["stacks"] = 1
+            self._effects[effect_id] = active
+            if duration is not None:
+                self._set_expiry(active, turn + duration)
+            self._apply_modifiers(active)
+        else:
+            stacking = active.get("stacking", STACK_REFRESH)
+            if stacking == STACK_IGNORE:
+                return active
+            if stacking == STACK_STACK:
+                stacks = min(active["stacks"] + 1, active.get("max_stacks", active["stacks"] + 1))
+                if stacks != active["stacks"]:
+                    self._retract_modifiers(active)
+                    active["stacks"] = stacks
+                    self._apply_modifiers(active)
+            if duration is not None:
+                if stacking == STACK_EXTEND and "expires" in active:
+                    self._set_expiry(active, active["expires"] + duration)
+                else:
+                    self._set_expiry(active, turn + duration)
+        return active
+
+    def remove(self, effect_id):
+        """Remove an effect; its queued expiry entry is discarded lazily"""
+        effect = self._effects.pop(effect_id, None)
+        if effect is None:
+            return None
+        self._generation.pop(effect_id, None)
+        self._retract_modifiers(effect)
+        return effect
+
+    def expire(self, turn):
+        """Remove and return the effects whose duration ran out by the given turn"""
+        expired = []
+        for effect_id, generation in self._expiry.pop_due(turn):
+            # Entries superseded by a refresh or removal are skipped
+            if self._generation.get(effect_id) == generation:
+                expired.append(self.remove(effect_id))
+        return expired
+
+    def action_multiplier(self, activity):
+        """Combined multiplier for the need costs of an activity"""
+        return self.action_modifiers.get(activity, 1)
+
+    def combat_multiplier(self, kind):
+        """Combined multiplier for the damage dealt ("attack") or taken ("defend")"""
+        return self.combat_modifiers.get(kind, 1)
+
+    def to_list(self):
+        """Active effects (with their stacks and expiry turn) for serialization"""
+        return [dict(effect) for effect in self._effects.values()]
+
+    def restore(self, effects):
+        """Replace the active effects with a list produced by to_list()"""
+        self.clear()
+        for effect in effects:
+            effect = dict(effect)
+            self._effects[effect["id"]] = effect
+            if "expires" in effect:
+                self._set_expiry(effect, effect["expires"])
+            self._apply_modifiers(effect)
+
+    def clear(self):
+        """Remove every effect"""
+        self._effects.clear()
+        self._generation.clear()
+        self._expiry.clear()
+        self.need_modifiers = {}
+        self.action_modifiers = {}
+        self.combat_modifiers = {}
+        self._need_parts = {}
+        self._multiplier_parts = {}
+
+    def _set_expiry(self, effect, expires):
+        """Queue a (new) expiry for an effect, invalidating any older entry"""
+        generation = next(self._generations)
+        self._generation[effect["id"]] = generation
+        effect["expires"] = expires
+        self._expiry.schedule(expires, (effect["id"], generation))
+
+    def _apply_modifiers(self, effect):
+        """Add an active effect's modifiers (with its stacks) to the totals"""
+        effect_id, stacks = effect["id"], effect["stacks"]
+        for need, change in effect.get("modifiers", {}).items():
+            self._need_parts.setdefault(need, {})[effect_id] = change * stacks
+            self.need_modifiers[need] = self.need_modifiers.get(need, 0.0) + change * stacks
+        for key, totals in (("action_modifiers", self.action_modifiers), ("combat_modifiers", self.combat_modifiers)):
+            for name, multiplier in effect.get(key, {}).items():
+                self._multiplier_parts.setdefault((key, name), {})[effect_id] = multiplier ** stacks
+                totals[name] = totals.get(name, 1) * multiplier ** stacks
+
+    def _retract_modifiers(self, effect):
+        """Take an effect's modifiers back out of the totals"""
+        effect_id = effect["id"]
+        for need in effect.get("modifiers", {}):
+            parts = self._need_parts[need]
+            change = parts.pop(effect_id)
+            if parts:
+                self.need_modifiers[need] -= change
+            else:
+                # No rounding error survives the last effect on a need
+                del self._need_parts[need], self.need_modifiers[need]
+        for key, totals in (("action_modifiers", self.action_modifiers), ("combat_modifiers", self.combat_modifiers)):
+            for name in effect.get(key, {}):
+                parts = self._multiplier_parts[key, name]
+                del parts[effect_id]
+                if parts:
+                    # Multiplied again rather than divided, as a multiplier may be 0
+                    total = 1
+                    for multiplier in parts.values():
+                        total *= multiplier
+                    totals[name] = total
+                else:
+                    del self._multiplier_parts[key, name], totals[name]
@@ -0,0 +1,316 @@
+from kerno.models.exploration import ExplorationTracker
+from kerno.utils.event_stream import GlobalSet, ItemMoved, PlayerMoved, StateRestored
+from kerno.utils.persistent import PersistentMap
+
+# Value of a fragment that is absent from a snapshot
+_MISSING = object()
+
+class Snapshot:
+    """One recorded point of a timeline
+
+    state maps fragment keys such as ("location", id), ("global", key),
+    ("agent", id) or ("player", "inventory") to immutable values; a snapshot
+    shares every fragment that did not change with its parent.
+    """
+
+    __slots__ = ("state", "parent", "children", "turn", "label", "depth")
+
+    def __init__(self, state, parent, turn, label=None):
+        self.state = state
+        self.parent = parent
+        self.children = []  # Later snapshots recorded from this one, oldest first
+        self.turn = turn
+        self.label = label
+        self.depth = 0 if parent is None else parent.depth + 1  # Snapshots between this one and the first
+
+    def __repr__(self):
+        return f"Snapshot(turn={self.turn}, label={self.label!r})"
+
+    def path(self):
+        """Snapshots from the start of the timeline to this one"""
+        path = []
+        snapshot = self
+        while snapshot is not None:
+            path.append(snapshot)
+            snapshot = snapshot.parent
+        path.reverse()
+        return path
+
+class Timeline:
+    """Recorded states of a game as a tree, for undo, redo and branching
+
+    record() adds the live world and player state as a Snapshot. Only the
+    fragments that can have changed since the last snapshot are captured
+    again: the locations named by the event stream, the rooms the level of
+    detail scheduler simulates around the player, and the player's parts
+    whose version changed. Agents are stored one fragment per agent, and
+    random rolls are not stored at all: the world reseeds them from its
+    seed and the turn. A snapshot therefore costs O(changes) and
+    everything else is shared with its parent, however large the world.
+
+    Going back to a snapshot only applies the fragments that differ from
+    the live state. Recording after going back starts a new branch; the
+    abandoned future stays reachable through redo() and, once named with
+    fork(), through checkout().
+
+    With a limit, only about the last limit snapshots (at least limit and
+    at most twice as many) are kept; older ones, and the branches that
+    split off before them, are dropped.
+    """
+
+    def __init__(self, world, player, limit=None):
+        self.world = world
+        self.player = player
+        self.limit = limit
+        self.root = None
+        self.current = None  # Snapshot the live state was last recorded as or restored to
+        self.branch = "main"  # Branch that record() extends
+        self.branches = {}  # Branch name -> latest snapshot on it
+        self._feed = world.event_stream.subscribe(("item", "moved", "global"))
+        self._dropped = 0  # Feed records lost so far; any loss forces a full capture
+        self._location = None  # Player location at the last capture
+        self._locations = 0  # Number of loaded locations at the last capture
+        self._marks = {}  # Player part -> version marker of the object captured
+
+    def record(self, label=None):
+        """Snapshot the live state after the current snapshot and return it"""
+        snapshot = Snapshot(self._capture(), self.current, self.world.turn_count, label)
+        if self.current is None:
+            self.root = snapshot
+        else:
+            self.current.children.append(snapshot)
+        self.current = snapshot
+        self.branches[self.branch] = snapshot
+        if self.limit and snapshot.depth - self.root.depth > 2 * self.limit:
+            self._prune()
+        return snapshot
+
+    def _prune(self):
+        """Drop the snapshots recorded more than limit snapshots before the current one"""
+        root = self.current
+        for _ in range(self.limit):
+            root = root.parent
+        root.parent = None
+        self.root = root
+        for name, snapshot in list(self.branches.items()):
+            while snapshot is not None and snapshot.depth > root.depth:
+                snapshot = snapshot.parent
+            if snapshot is not root:
+                del self.branches[name]
+
+    def undo(self, steps=1):
+        """Go back a number of snapshots; returns the snapshot reached, or None"""
+        target = self.current
+        for _ in range(steps):
+            if target is None or target.parent is None:
+                return None
+            target = target.parent
+        self.restore(target)
+        return target
+
+    def redo(self):
+        """Go forward to the latest snapshot recorded after the current one, if any"""
+        if self.current is None or not self.current.children:
+            return None
+        target = self.current.children[-1]
+        self.restore(target)
+        return target
+
+    def fork(self, name):
+        """Start a named branch at the current snapshot; record() extends it from now on
+
+        Forking copies nothing, so a session can be forked any number of
+        times from the same point.
+        """
+        if self.current is None:
+            self.record()
+        self.branches[name] = self.current
+        self.branch = name
+        return self.current
+
+    def checkout(self, target):
+        """Go to a snapshot or to the latest snapshot of a named branch"""
+        if isinstance(target, str):
+            if target not in self.branches:
+                raise KeyError(f"Unknown branch: {target}")
+            self.branch = target
+            target = self.branches[target]
+        self.restore(target)
+        return target
+
+    def restore(self, snapshot):
+        """Make the live world and player match a snapshot of this timeline"""
+        origin_turn = self.world.turn_count
+        live = self._capture()
+        agents_changed = False
+        for key, _, value in live.diff(snapshot.state, _MISSING):
+            if key[0] == "agent" or key == ("world", "agents"):
+                agents_changed = True
+            else:
+                self._apply(key, value)
+        if agents_changed:
+            ids = snapshot.state[("world", "agents")]
+            self.world.agents.restore(ids, [snapshot.state[("agent", agent_id)] for agent_id in ids])
+        # Restoring globals marks them changed; only the changes the rules
+        # had not seen at the snapshot are still pending
+        self.world.global_state.changed = set(snapshot.state[("world", "rules")][1])
+        self.current = snapshot
+        self._location = self.player.current_location
+        self._marks = self._player_marks()
+        self.world.event_stream.publish(StateRestored(self.world.turn_count, origin_turn))
+
+    def _capture(self):
+        """State map of the live game, built from the current snapshot's state"""
+        world, player = self.world, self.player
+        records = self._feed.poll()
+        locations = len(world.rooms) + len(world.passages)
+        full = self.current is None or self._feed.dropped != self._dropped or locations != self._locations
+        self._dropped = self._feed.dropped
+        self._locations = locations
+        state = PersistentMap() if self.current is None else self.current.state
+        changes = {}
+
+        def put(key, value):
+            if state.get(key, _MISSING) != value:
+                changes[key] = value
+
+        if full:
+            dirty_locations = list(world.rooms) + list(world.passages)
+            dirty_globals = list(world.global_state)
+        else:
+            dirty_locations = set()
+            dirty_globals = set()
+            origins = {self._location}
+            for record in records:
+                if isinstance(record, ItemMoved):
+                    for place in (record.source, record.destination):
+                        if place and place.startswith("room:"):
+                            dirty_locations.add(place[5:])
+                elif isinstance(record, PlayerMoved):
+                    origins.update((record.origin, record.destination))
+                elif isinstance(record, GlobalSet):
+                    dirty_globals.add(record.key)
+            # The scheduler simulates (and the description marks visited)
+            # only the rooms near wherever the player has been
+            origins.discard(player.current_location)
+            origins.discard(None)
+            for origin in origins:
+                dirty_locations.update(world.lod.neighborhood(origin))
+            dirty_locations.update(world.lod.neighborhood(player.current_location))
+
+        for location_id in dirty_locations:
+            location = world.rooms.get(location_id) or world.passages.get(location_id)
+            if location is not None:
+                put(("location", location_id), self._location_state(location))
+        global_state = world.global_state
+        for key in dirty_globals:
+            put(("global", key), global_state[key] if key in global_state else _MISSING)
+
+        put(("world", "clock"), (world.turn_count, world.seed))
+        put(("world", "events"), tuple(dict(event) for event in world.events))
+        agents = world.agents
+        ids = tuple(agents.ids)
+        previous_ids = state.get(("world", "agents"), ())
+        put(("world", "agents"), ids)
+        # Only agents changed since the last capture are read again
+        dirty = agents.consume_dirty()
+        for agent_id in (ids if full else dirty):
+            row = agents.index.get(agent_id)
+            if row is not None:
+                put(("agent", agent_id), agents.row_state(row))
+        if previous_ids != ids:
+            for agent_id in set(previous_ids).difference(ids):
+                put(("agent", agent_id), _MISSING)
+        put(("world", "rules"), (world.rules.snapshot(), frozenset(global_state.changed)))
+        put(("player", "state"), (player.current_location, player.health, player.hunger, player.thirst,
+                                  player.energy, player.turn, player.survival_mode, player.profession,
+                                  tuple(player.stats.items()), tuple(player.scars)))
+        put(("player", "effects"), tuple(player.status_effects.to_list()))
+        # Inventory, knowledge and the map are only copied when they changed
+        marks = self._player_marks()
+        for part, mark in marks.items():
+            if self._marks.get(part) != mark:
+                put(("player", part), self._player_part(part))
+        self._marks = marks
+        self._location = player.current_location
+
+        state = state.update((key, value) for key, value in changes.items() if value is not _MISSING)
+        for key, value in changes.items():
+            if value is _MISSING:
+                state = state.delete(key)
+        if full:
+            for key in list(state):
+                if key[0] == "global" and key[1] not in global_state:
+                    state = state.delete(key)
+        return state
+
+    def _location_state(self, location):
+        """Changing state of a room or passage"""
+        items = tuple(item.to_dict() if hasattr(item, "to_dict") else dict(item) for item in location.items)
+        return (items, location.visited, tuple(location.properties.items()),
+                self.world.lod.last_simulated.get(location.id))
+
+    def _player_marks(self):
+        """Version markers of the player's larger parts"""
+        player = self.player
+        return {
+            "inventory": (id(player.inventory), player.inventory.version),
+            "knowledge": (id(player.knowledge), player.knowledge.version, player.knowledge.indexed),
+            "explored": (id(player.explored), len(player.explored), len(player.explored.links))
+        }
+
+    def _player_part(self, part):
+        """Immutable copy of one of the player's larger parts"""
+        player = self.player
+        if part == "inventory":
+            return tuple((item.to_dict() if hasattr(item, "to_dict") else dict(item), quantity)
+                         for item, quantity in player.inventory.stacks())
+        if part == "knowledge":
+            return tuple(player.knowledge.items()), tuple(player.knowledge.observed())
+        return tuple(player.explored.coords.items()), frozenset(player.explored.links)
+
+    def _apply(self, key, value):
+        """Set one fragment of the live state"""
+        world, player = self.world, self.player
+        kind, name = key
+        if kind == "location":
+            location = world.rooms.get(name) or world.passages.get(name)
+            if location is None or value is _MISSING:
+                return  # Loaded after the snapshot was taken: left as it is
+            items, visited, properties, last_simulated = value
+            location.items = [world.items.instantiate(item) for item in items]
+            location.visited = visited
+            location.properties.clear()
+            location.properties.update(properties)
+            if last_simulated is None:
+                world.lod.last_simulated.pop(name, None)
+            else:
+                world.lod.last_simulated[name] = last_simulated
+        elif kind == "global":
+            if value is _MISSING:
+                world.global_state.pop(name, None)
+            else:
+                world.global_state[name] = value
+        elif name == "clock":
+            world.turn_count, world.seed = value
+        elif name == "events":
+            world.events = [dict(event) for event in value]
+        elif name == "rules":
+            world.rules.restore(value[0])
+        elif name == "state":
+            (player.current_location, player.health, player.hunger, player.thirst, player.energy,
+             player.turn, player.survival_mode, player.profession, stats, scars) = value
+            player.stats = dict(stats)
+            player.scars = list(scars)
+        elif name == "effects":
+            player.status_effects.restore(value)
+        elif name == "inventory":
+            player.inventory.clear()
+            for item, quantity in value:
+                player.inventory.add(world.items.instantiate(item), quantity)
+        elif name == "knowledge":
+            learned, observed = value
+            player.knowledge.restore(learned, observed)
+        elif name == "explored":
+            coords, links = value
+            player.explored = ExplorationTracker.from_dict({"coords": dict(coords), "links": links})
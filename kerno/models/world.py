@@ -1,6 +1,24 @@
-import json
+import os
 import random
+import warnings
+import zlib
 from pathlib import Path
+from kerno.models.agents import AgentPool
+from kerno.models.combat import CombatEngine
+from kerno.models.dialogue import CompiledDialogue
+from kerno.models.endings import Ending
+from kerno.models.exits import parse_exits
+from kerno.models.items import ItemRegistry
+from kerno.models.rules import GlobalState, RulesEngine
+from kerno.utils.event_stream import (DamageTaken, EventStream, GlobalSet, ItemMoved, KnowledgeLearned,
+                                     Narration, NeedChanged, StatusEffectAdded)
+from kerno.utils.i18n import load_catalog
+from kerno.utils.world_loader import STREAMED_SECTIONS, iter_world_file
+from kerno.models.simulation import LODScheduler, room_effects
+
+def direction_names(directions, messages):
+    """Names of exit directions in a catalog's language (unknown ones as they are)"""
+    return [messages.get(f"direction.{direction}", direction) for direction in directions]
 
 class Room:
     def __init__(self, room_data):
@@ -11,13 +29,16 @@ class Room:
         self.visited = False
         self.items = room_data.get("items", [])
         self.furniture = room_data.get("furniture", [])
-        self.exits = room_data.get("exits", {})
+        # Plain direction -> destination map, plus Exit objects for guarded exits
+        self.exits, self.guarded_exits = parse_exits(room_data.get("exits", {}))
         self.events = room_data.get("events", [])
         self.properties = room_data.get("properties", {})
         self.sub_locations = room_data.get("sub_locations", [])
+        self.processes = room_data.get("processes", [])  # Continuous changes to properties per turn
         
-    def get_description(self, detailed=False):
+    def get_description(self, detailed=False, messages=None):
         """Return room description, with additional details if requested"""
+        messages = messages or load_catalog()
         desc = self.description
         
         # First visit provides more detail
@@ -27,31 +48,19 @@ class Room:
         
         # Add information about items
         if self.items and detailed:
-            item_desc = "\nVu povas vidar: " + ", ".join([item["name"] for item in self.items])
-            desc += item_desc
+            desc += "\n" + messages("room.items", items=", ".join([item["name"] for item in self.items]))
         
         # Add information about furniture
         if self.furniture and detailed:
-            furniture_desc = "\nLa chambro kontenas: " + ", ".join([f["name"] for f in self.furniture])
-            desc += furniture_desc
+            desc += "\n" + messages("room.furniture", furniture=", ".join([f["name"] for f in self.furniture]))
             
         # Add information about exits
-        exit_desc = "\nExiti: " + ", ".join(self._translate_exits()) if self.exits else "\nNe existas evidenta exiti."
-        desc += exit_desc
+        if self.exits:
+            desc += "\n" + messages("room.exits", exits=", ".join(direction_names(self.exits, messages)))
+        else:
+            desc += "\n" + messages("room.no_exits")
         
         return desc
-        
-    def _translate_exits(self):
-        """Translate exit directions to Ido"""
-        direction_map = {
-            "north": "nordo",
-            "south": "sudo",
-            "east": "esto",
-            "west": "westo",
-            "up": "supre",
-            "down": "infre"
-        }
-        return [direction_map.get(direction, direction) for direction in self.exits.keys()]
 
 class Passage:
     def __init__(self, passage_data):
@@ -61,11 +70,17 @@ class Passage:
         self.type = passage_data.get("type", "generic")
         self.visited = False
         self.connections = passage_data.get("connections", {})
+        # Passages can be walked through like rooms: connections are their exits
+        self.exits = self.connections
+        self.guarded_exits = {}
+        self.furniture = []
+        self.events = []
         self.items = passage_data.get("items", [])
         self.properties = passage_data.get("properties", {})
         
-    def get_description(self, detailed=False):
+    def get_description(self, detailed=False, messages=None):
         """Return passage description"""
+        messages = messages or load_catalog()
         desc = self.description
         
         # First visit provides more detail
@@ -75,125 +90,323 @@ class Passage:
             
         # Add information about items
         if self.items and detailed:
-            item_desc = "\nVu povas vidar: " + ", ".join([item["name"] for item in self.items])
-            desc += item_desc
+            desc += "\n" + messages("room.items", items=", ".join([item["name"] for item in self.items]))
             
         # Add information about connections
-        conn_desc = "\nVu povas irar al: " + ", ".join(self._translate_connections()) if self.connections else "\nIca pasejo semblas duktar nulaloke."
-        desc += conn_desc
+        if self.connections:
+            desc += "\n" + messages("passage.connections",
+                                    destinations=", ".join(direction_names(self.connections, messages)))
+        else:
+            desc += "\n" + messages("passage.no_connections")
         
         return desc
-        
-    def _translate_connections(self):
-        """Translate connection directions to Ido"""
-        direction_map = {
-            "north": "nordo",
-            "south": "sudo",
-            "east": "esto", 
-            "west": "westo",
-            "up": "supre",
-            "down": "infre"
-        }
-        return [direction_map.get(conn, conn) for conn in self.connections.keys()]
 
 class World:
     def __init__(self, world_file):
         self.world_file = world_file
         self.rooms = {}
         self.passages = {}
-        self.items = {}
+        self.items = ItemRegistry()  # Item prototypes shared by every placed item
         self.starting_room_id = None
-        self.global_state = {}
+        self.global_state = GlobalState()
         self.turn_count = 0
         self.events = []
+        self.agents = AgentPool(self)
+        self.lod = LODScheduler(self)
+        self.seed = random.randrange(1 << 32)  # Set it for reproducible games
+        self.random = random.Random()  # Reseeded every turn from seed and turn_count
+        self.rules = RulesEngine(self)
+        self.dialogues = {}  # Dialogue id -> CompiledDialogue
+        self.endings = []  # Ending objects, checked in file order
+        self.packs = {}  # Content pack id -> pack description from the world file
+        self._pack_index = {}  # Location id -> id of the pack that defines it
+        self.foreign_room_handler = None  # Called as (room_id, item) for rooms this world did not load
+        self.foreign_removal_handler = None  # Called as (room_id, item_id) for the same rooms
+        self.event_stream = EventStream()  # Typed record of what happens, for observers
+        self.combat = CombatEngine(self)  # Fights between players and agents, one batched pass per room and turn
+        self.bootstrap_cache = None  # BootstrapCache for preparsed world and pack files, if any
+        
+    def load(self, progress=None, region=None):
+        """Load world data from file
         
-    def load(self):
-        """Load world data from file"""
+        The file is read incrementally, building rooms and passages one at a
+        time. progress, if given, is called as progress(section, count,
+        bytes_read, total_bytes). region, if given, is a collection of room
+        and passage ids: only those locations (and the agents inside them)
+        are loaded, so that each location has a single owner when a world
+        is split into regions. Exits leading out of the region are dropped,
+        unless foreign_room_handler is set beforehand: then another region
+        is there to take over players walking through them. Content packs
+        listed in the file are only registered; each is loaded the first
+        time one of its locations is needed.
+        """
         try:
-            path = Path(self.world_file)
-            with open(path, 'r', encoding='utf-8') as f:
-                world_data = json.load(f)
-                
-            # Load global state
-            self.global_state = world_data.get("global_state", {})
-            self.starting_room_id = world_data.get("starting_room")
-            
-            # Load rooms
-            for room_data in world_data.get("rooms", []):
-                room = Room(room_data)
-                self.rooms[room.id] = room
-                
-            # Load passages
-            for passage_data in world_data.get("passages", []):
-                passage = Passage(passage_data)
-                self.passages[passage.id] = passage
-                
-            # Load global items
-            for item_data in world_data.get("items", []):
-                self.items[item_data["id"]] = item_data
-                
+            self._load_file(Path(self.world_file), progress, region)
+            self.lod.reset(self.turn_count)
             return True
         except Exception as e:
             print(f"Error loading world data: {e}")
             return False
             
+    def load_pack(self, pack_id):
+        """Load a content pack (rooms, passages, items, agents, rules) into the world"""
+        pack = self.packs[pack_id]
+        if pack.get("loaded"):
+            return
+        pack["loaded"] = True
+        path = Path(self.world_file).parent / pack["file"]
+        new_locations = self._load_file(path, extend=True)
+        for location_id in new_locations:
+            self.lod.last_simulated[location_id] = self.turn_count
+            
+    def _read_sections(self, path, progress=None):
+        """(section, value) pairs of a world or pack file, preparsed if a bootstrap cache is set"""
+        if self.bootstrap_cache is None:
+            return iter_world_file(path, progress)
+        sections = self.bootstrap_cache.lookup(path)
+        if sections is None:
+            # Streamed as usual; the cache is written once the whole file was read
+            return self.bootstrap_cache.collect(path, iter_world_file(path, progress))
+        if progress:
+            # Cached files are not read incrementally: report each section once
+            size = os.path.getsize(path)
+            counts = {}
+            for section, _ in sections:
+                counts[section] = counts.get(section, 0) + 1
+            for section, count in counts.items():
+                if section in STREAMED_SECTIONS:
+                    progress(section, count, size, size)
+        return sections
+        
+    def _load_file(self, path, progress=None, region=None, extend=False):
+        """Read a world or pack file into this world; returns the new location ids"""
+        if region is not None:
+            region = set(region)
+        agents_data = []
+        new_locations = []
+        
+        self.items.loading = True
+        try:
+            for section, data in self._read_sections(path, progress):
+                if section == "global_state":
+                    if extend:
+                        # Packs add keys without resetting the running state
+                        for key, value in data.items():
+                            self.global_state.setdefault(key, value)
+                    else:
+                        self.global_state = GlobalState(data)
+                elif section == "starting_room":
+                    if not extend:
+                        self.starting_room_id = data
+                elif section == "items":
+                    # Prototypes referenced before their definition are filled in place
+                    self.items.define(data)
+                elif section == "rooms":
+                    if region is not None and data.get("id") not in region:
+                        continue
+                    room = Room(data)
+                    room.items = [self.items.instantiate(item) for item in room.items]
+                    self.rooms[room.id] = room
+                    new_locations.append(room.id)
+                elif section == "passages":
+                    if region is not None and data.get("id") not in region:
+                        continue
+                    passage = Passage(data)
+                    passage.items = [self.items.instantiate(item) for item in passage.items]
+                    self.passages[passage.id] = passage
+                    new_locations.append(passage.id)
+                elif section == "agents":
+                    if region is None or data.get("location") in region:
+                        agents_data.append(data)
+                elif section == "rules":
+                    self.rules.add(data)
+                elif section == "dialogues":
+                    dialogue = CompiledDialogue(data)
+                    self.dialogues[dialogue.id] = dialogue
+                elif section == "endings":
+                    self.endings.append(Ending(data))
+                elif section == "packs":
+                    for pack in data:
+                        self.packs[pack["id"]] = dict(pack)
+                        for location_id in pack.get("rooms", []) + pack.get("passages", []):
+                            self._pack_index[location_id] = pack["id"]
+        except Exception:
+            self.items.abort_loading()
+            raise
+        self.items.finish_loading()
+        if region is not None and self.foreign_room_handler is None:
+            # Without another region to hand the player to, exits leaving this one lead nowhere
+            for location_id in new_locations:
+                location = self.rooms.get(location_id) or self.passages[location_id]
+                for direction, destination in list(location.exits.items()):
+                    if destination not in region and destination not in self._pack_index:
+                        del location.exits[direction]
+                        location.guarded_exits.pop(direction, None)
+            
+        # NPCs and creatures need the complete room graph
+        self.agents.rebuild_graph()
+        self.lod.invalidate()
+        for agent_data in agents_data:
+            self.agents.spawn(agent_data)
+        return new_locations
+            
     def get_starting_room(self):
         """Return the starting room"""
         return self.rooms.get(self.starting_room_id)
         
     def get_room(self, room_id):
-        """Get a room by ID"""
-        return self.rooms.get(room_id)
+        """Get a room by ID, loading its content pack on first use"""
+        room = self.rooms.get(room_id)
+        if room is None and room_id in self._pack_index:
+            self.load_pack(self._pack_index[room_id])
+            room = self.rooms.get(room_id)
+        return room
         
     def get_passage(self, passage_id):
-        """Get a passage by ID"""
-        return self.passages.get(passage_id)
+        """Get a passage by ID, loading its content pack on first use"""
+        passage = self.passages.get(passage_id)
+        if passage is None and passage_id in self._pack_index:
+            self.load_pack(self._pack_index[passage_id])
+            passage = self.passages.get(passage_id)
+        return passage
+        
+    def get_location(self, location_id):
+        """Get the room or passage with an ID"""
+        return self.get_room(location_id) or self.get_passage(location_id)
+        
+    def reached_ending(self, player):
+        """The first ending whose condition holds, or None"""
+        for ending in self.endings:
+            if ending.reached(self, player):
+                return ending
+        return None
         
-    def can_move(self, room_id, direction):
-        """Check if a move in given direction is possible"""
-        room = self.get_room(room_id)
+    def can_move(self, room_id, direction, player=None):
+        """Check if a move in given direction is possible (and, given a player, allowed)"""
+        room = self.get_location(room_id)
         if not room:
             return False
             
-        return direction in room.exits
+        if direction not in room.exits:
+            return False
+        if player is not None:
+            return self.is_exit_open(room_id, direction, player)
+        return True
+        
+    def is_exit_open(self, room_id, direction, player):
+        """Check whether the requirements of an exit are met by the player"""
+        room = self.get_location(room_id)
+        guarded_exit = room.guarded_exits.get(direction) if room else None
+        return guarded_exit is None or guarded_exit.is_open(self, player)
+        
+    def get_exit(self, room_id, direction):
+        """Get the guarded Exit in a direction, or None for a free or missing exit"""
+        room = self.get_location(room_id)
+        return room.guarded_exits.get(direction) if room else None
         
     def get_destination(self, room_id, direction):
         """Get destination room/passage ID when moving in a direction"""
-        room = self.get_room(room_id)
+        room = self.get_location(room_id)
         if not room or direction not in room.exits:
             return None
             
         return room.exits[direction]
         
     def add_item_to_room(self, room_id, item_data):
-        """Add an item to a room"""
-        room = self.get_room(room_id)
-        if room:
-            room.items.append(item_data)
+        """Add an item (instance, prototype id or item dict) to a room or passage
+
+        Returns False if the location is unknown here.
+        """
+        location = self.get_location(room_id)
+        if location:
+            location.items.append(self.items.instantiate(item_data))
+            return True
+        if self.foreign_room_handler:
+            # The room belongs to a part of the world loaded elsewhere
+            self.foreign_room_handler(room_id, self.items.instantiate(item_data))
+            return True
+        return False
             
-    def remove_item_from_room(self, room_id, item_id):
-        """Remove an item from a room"""
-        room = self.get_room(room_id)
-        if room:
-            room.items = [item for item in room.items if item["id"] != item_id]
+    def remove_item_from_room(self, room_id, item_id, instance=None):
+        """Remove an item from a room or passage (one unit if several share the id)
+
+        With instance, that exact instance is removed. Returns whether an
+        item was removed; removals from rooms loaded elsewhere are
+        forwarded and count as done.
+        """
+        location = self.get_location(room_id)
+        if location:
+            for i, item in enumerate(location.items):
+                if item is instance if instance is not None else item["id"] == item_id:
+                    location.items.pop(i)
+                    return True
+        elif self.foreign_removal_handler:
+            self.foreign_removal_handler(room_id, item_id)
+            return True
+        return False
             
-    def process_events(self, player):
-        """Process world events for the current turn"""
-        self.turn_count += 1
+    def process_events(self, player, advance=True):
+        """Process world events for the current turn
+        
+        With several players in one world, call it with advance=True for
+        the first player only: the others then get their personal and
+        local events without advancing the world clock a second time.
+        A world without players still advances with player=None: agents,
+        scheduled events and rules run, and effects on a player are skipped.
+        """
+        if advance:
+            self.turn_count += 1
+            # Each turn's rolls follow from (seed, turn) alone, so a timeline
+            # only has to record the turn to replay them
+            self.random.seed(zlib.crc32(f"{self.seed}:{self.turn_count}".encode("utf-8")))
         events_messages = []
         
+        # Advance the player's needs and status effects
+        for effect in player.tick(self.turn_count) if player is not None else ():
+            if "expire_message" in effect:
+                events_messages.append(effect["expire_message"])
+        
+        # Simulate the rooms around the player at their level of detail
+        if advance and player is not None:
+            self.lod.tick(self.turn_count, player)
+        
         # Process random events based on location
-        current_room = self.get_room(player.current_location)
+        current_room = self.get_location(player.current_location) if player is not None else None
         if current_room and current_room.events:
             for event in current_room.events:
-                if "probability" in event and random.random() < event["probability"]:
+                if "probability" in event and self.random.random() < event["probability"]:
                     events_messages.append(event["message"])
                     # Handle any state changes from the event
                     if "effects" in event:
                         self._process_event_effects(event["effects"], player)
         
-        # Process global events
-        for event_id, event in enumerate(self.events):
+        if advance:
+            # Declared attacks land before their targets can walk away
+            self.combat.resolve_declared()
+            # Simulate NPCs and creatures across the whole facility
+            self.agents.tick(self.turn_count)
+            events_messages.extend(self._process_global_events(player))
+        
+        # Resolve the fights in the player's room
+        if player is not None:
+            events_messages.extend(self.combat.resolve(player))
+        
+        # Fire rules whose global_state inputs changed since the last turn
+        events_messages.extend(self.rules.evaluate(player))
+        
+        for message in events_messages:
+            self.event_stream.publish(Narration(self.turn_count, message))
+        return events_messages
+        
+    def _process_global_events(self, player):
+        """Count down scheduled events and fire the ones that are due
+        
+        Events scheduled while firing start counting down next turn.
+        """
+        events_messages = []
+        events, self.events = self.events, []
+        remaining = []
+        for event in events:
             if "turns_remaining" in event:
                 event["turns_remaining"] -= 1
                 if event["turns_remaining"] <= 0:
@@ -201,36 +414,58 @@ class World:
                     # Handle any state changes from the event
                     if "effects" in event:
                         self._process_event_effects(event["effects"], player)
-                    # Remove the expired event
-                    self.events.pop(event_id)
-        
+                    continue
+            remaining.append(event)
+        self.events = remaining + self.events
         return events_messages
         
-    def _process_event_effects(self, effects, player):
-        """Process effects from an event"""
+    def _process_event_effects(self, effects, player, room_id=None):
+        """Process effects from an event, defaulting room targets to room_id or the player's room"""
+        if player is None:
+            # Nobody to act on: only effects on rooms and the world apply
+            effects = [effect for effect in effects
+                       if effect.get("type") == "schedule_event" or room_effects([effect])]
+        elif room_id is None:
+            room_id = player.current_location
+        publish = self.event_stream.publish
+        turn = self.turn_count
         for effect in effects:
             effect_type = effect.get("type")
             if effect_type == "add_item":
                 target = effect.get("target")
-                item_data = effect.get("item")
+                # Either a prototype id or an (older) inline item dict
+                item_data = self.items.instantiate(effect.get("item_id") or effect.get("item"))
                 if target == "player":
-                    player.add_item(item_data)
+                    # Items the player cannot carry fall to the floor
+                    if player.add_item(item_data):
+                        publish(ItemMoved(turn, item_data["id"], None, "player"))
+                    elif self.add_item_to_room(player.current_location, item_data):
+                        publish(ItemMoved(turn, item_data["id"], None, f"room:{player.current_location}"))
                 elif target == "room":
-                    room_id = effect.get("room_id", player.current_location)
-                    self.add_item_to_room(room_id, item_data)
+                    target_room = effect.get("room_id", room_id)
+                    if self.add_item_to_room(target_room, item_data):
+                        publish(ItemMoved(turn, item_data["id"], None, f"room:{target_room}"))
             elif effect_type == "remove_item":
                 target = effect.get("target")
                 item_id = effect.get("item_id")
                 if target == "player":
-                    player.remove_item(item_id)
+                    if player.remove_item(item_id):
+                        publish(ItemMoved(turn, item_id, "player", None))
                 elif target == "room":
-                    room_id = effect.get("room_id", player.current_location)
-                    self.remove_item_from_room(room_id, item_id)
+                    target_room = effect.get("room_id", room_id)
+                    if self.remove_item_from_room(target_room, item_id):
+                        publish(ItemMoved(turn, item_id, f"room:{target_room}", None))
             elif effect_type == "set_global":
                 key = effect.get("key")
                 value = effect.get("value")
                 if key:
                     self.global_state[key] = value
+                    publish(GlobalSet(turn, key, value))
+            elif effect_type == "learn":
+                key = effect.get("key")
+                if key:
+                    player.learn(key, effect.get("value", True))
+                    publish(KnowledgeLearned(turn, key))
             elif effect_type == "schedule_event":
                 turns = effect.get("turns", 1)
                 message = effect.get("message", "Something happens.")
@@ -244,8 +479,21 @@ class World:
                 effect_name = effect.get("effect")
                 value = effect.get("value", 0)
                 if effect_name == "rest":
+                    before = player.energy
                     player.rest(value)
+                    publish(NeedChanged(turn, "energy", player.energy - before, player.energy, "rest"))
                 elif effect_name == "heal":
+                    before = player.health
                     player.heal(value)
+                    publish(NeedChanged(turn, "health", player.health - before, player.health, "heal"))
                 elif effect_name == "damage":
-                    player.take_damage(value) 
\ No newline at end of file
+                    before = player.health
+                    player.take_damage(value)
+                    publish(DamageTaken(turn, "health", player.health - before, player.health, "damage"))
+                elif effect_name == "status":
+                    status = effect.get("status")
+                    if not isinstance(status, dict) or "id" not in status:
+                        warnings.warn(f"Ignoring a status player_effect without a status id: {effect!r}")
+                        continue
+                    player.add_status_effect(status)
+                    publish(StatusEffectAdded(turn, status["id"])) 
\ No newline at end of file
@@ -0,0 +1,111 @@
+import os
+import pickle
+import zlib
+
+# Bump when the layout of cached values changes
+CACHE_FORMAT = 1
+
+def default_cache_dir():
+    """Where bootstrap caches live: $KERNO_CACHE_DIR, else the user cache directory"""
+    if os.environ.get("KERNO_CACHE_DIR"):
+        return os.environ["KERNO_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "kerno")
+
+class BootstrapCache:
+    """Pickled results of parsing data files, reused while the file is unchanged
+
+    Each entry records the source file's mtime, size and SHA-256. A matching
+    mtime and size is trusted as is; otherwise the content hash decides, so
+    a file that was only touched (or copied) does not force a reparse.
+    Any problem with the cache falls back to parsing the file.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_cache_dir()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path, parse, kind="world"):
+        """Return parse(path), from the cache when the file has not changed"""
+        value = self.lookup(path, kind)
+        if value is None:
+            value = parse(path)
+            self.store(path, value, kind)
+        return value
+
+    def lookup(self, path, kind="world"):
+        """The cached value for an unchanged file, or None (counted as a miss)"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._entry_path(path, kind)
+        try:
+            with open(entry, 'rb') as f:
+                header = pickle.load(f)
+                if header.get("format") == CACHE_FORMAT and header.get("source") == path:
+                    digest = None
+                    fresh = header["mtime_ns"] == stat.st_mtime_ns and header["size"] == stat.st_size
+                    if not fresh:
+                        digest = _file_digest(path)
+                        fresh = header["sha256"] == digest
+                    if fresh:
+                        value = pickle.load(f)
+                        self.hits += 1
+                        if digest is not None:
+                            # Same content with a new mtime: refresh the header only
+                            self._store(entry, path, stat, digest, value)
+                        return value
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError, TypeError, ValueError):
+            pass
+        self.misses += 1
+        return None
+
+    def store(self, path, value, kind="world", stat=None):
+        """Cache the parsed value of a file (stat: os.stat() taken before parsing it)"""
+        path = os.path.abspath(path)
+        stat = stat or os.stat(path)
+        self._store(self._entry_path(path, kind), path, stat, _file_digest(path), value)
+
+    def collect(self, path, values, kind="world"):
+        """Yield values as they are parsed from a file, caching the list once all were read
+
+        This keeps a cache miss streaming: nothing waits for the whole file.
+        """
+        stat = os.stat(path)
+        collected = []
+        for value in values:
+            collected.append(value)
+            yield value
+        self.store(path, collected, kind, stat)
+
+    def _entry_path(self, path, kind):
+        """Cache file of a source file"""
+        # Names only need to be distinct enough; the header records the full source path
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.directory, f"{kind}-{name}-{zlib.crc32(path.encode('utf-8')):08x}.pickle")
+
+    def _store(self, entry, path, stat, digest, value):
+        """Write an entry atomically; failures only cost the next startup a reparse"""
+        header = {"format": CACHE_FORMAT, "source": path, "mtime_ns": stat.st_mtime_ns,
+                  "size": stat.st_size, "sha256": digest}
+        temp_path = f"{entry}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry)
+        except (OSError, pickle.PicklingError):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+def _file_digest(path):
+    """SHA-256 of a file's content"""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,199 @@
+class GameEvent:
+    """Base of the typed records published on an EventStream
+
+    Records are small slotted objects shared by every subscriber, so they
+    must be treated as read-only once published.
+    """
+
+    __slots__ = ("turn",)
+    kind = "event"
+
+    def __init__(self, turn):
+        self.turn = turn
+
+    def to_dict(self):
+        """Plain dict form, for journals and network clients"""
+        data = {"kind": self.kind}
+        for cls in reversed(type(self).__mro__):
+            for name in cls.__dict__.get("__slots__", ()):
+                data[name] = getattr(self, name)
+        return data
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items() if key != "kind")
+        return f"{type(self).__name__}({fields})"
+
+class ActionPerformed(GameEvent):
+    """The player ran a command"""
+    __slots__ = ("action", "success")
+    kind = "action"
+
+    def __init__(self, turn, action, success):
+        super().__init__(turn)
+        self.action = action
+        self.success = success
+
+class PlayerMoved(GameEvent):
+    """The player went from one location to another"""
+    __slots__ = ("origin", "destination", "direction")
+    kind = "moved"
+
+    def __init__(self, turn, origin, destination, direction):
+        super().__init__(turn)
+        self.origin = origin
+        self.destination = destination
+        self.direction = direction
+
+class ItemMoved(GameEvent):
+    """An item changed place
+
+    source and destination are "player", "room:<id>" or None (the item
+    was created or destroyed).
+    """
+    __slots__ = ("item_id", "source", "destination")
+    kind = "item"
+
+    def __init__(self, turn, item_id, source, destination):
+        super().__init__(turn)
+        self.item_id = item_id
+        self.source = source
+        self.destination = destination
+
+class GlobalSet(GameEvent):
+    """A global_state key was set"""
+    __slots__ = ("key", "value")
+    kind = "global"
+
+    def __init__(self, turn, key, value):
+        super().__init__(turn)
+        self.key = key
+        self.value = value
+
+class KnowledgeLearned(GameEvent):
+    """The player learned something"""
+    __slots__ = ("key",)
+    kind = "learned"
+
+    def __init__(self, turn, key):
+        super().__init__(turn)
+        self.key = key
+
+class NeedChanged(GameEvent):
+    """A player need was changed by an effect (damage, healing, rest)"""
+    __slots__ = ("need", "delta", "value", "cause")
+    kind = "need"
+
+    def __init__(self, turn, need, delta, value, cause):
+        super().__init__(turn)
+        self.need = need
+        self.delta = delta
+        self.value = value
+        self.cause = cause
+
+class DamageTaken(NeedChanged):
+    """The player lost health"""
+    __slots__ = ()
+    kind = "damage"
+
+class StatusEffectAdded(GameEvent):
+    """A status effect started on the player"""
+    __slots__ = ("effect_id",)
+    kind = "status"
+
+    def __init__(self, turn, effect_id):
+        super().__init__(turn)
+        self.effect_id = effect_id
+
+class CombatRound(GameEvent):
+    """The fights of a room were resolved for a turn
+
+    attacks holds (attacker, target, damage) with agent ids or "player"
+    (damage 0 for a miss); defeated lists the agents that died.
+    """
+    __slots__ = ("room_id", "attacks", "defeated")
+    kind = "combat"
+
+    def __init__(self, turn, room_id, attacks, defeated):
+        super().__init__(turn)
+        self.room_id = room_id
+        self.attacks = attacks
+        self.defeated = defeated
+
+class Narration(GameEvent):
+    """A message produced by world events, rules or expiring effects"""
+    __slots__ = ("text",)
+    kind = "narration"
+
+    def __init__(self, turn, text):
+        super().__init__(turn)
+        self.text = text
+
+class StateRestored(GameEvent):
+    """The game went back (or over) to another point of its timeline
+
+    Everything published since that point no longer describes the world;
+    observers keeping derived state should rebuild it.
+    """
+    __slots__ = ("origin_turn",)
+    kind = "restored"
+
+    def __init__(self, turn, origin_turn):
+        super().__init__(turn)
+        self.origin_turn = origin_turn
+
+class EventStream:
+    """Bounded ring buffer of game events with independent readers
+
+    Publishing is O(1) and never waits for readers. Each Subscription keeps
+    its own cursor into the buffer; a reader that falls more than capacity
+    events behind skips the overwritten ones and counts them as dropped.
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.sequence = 0  # Number of events published so far
+        self._buffer = [None] * capacity
+
+    def publish(self, event):
+        """Append an event, overwriting the oldest one when the buffer is full"""
+        self._buffer[self.sequence % self.capacity] = event
+        self.sequence += 1
+        return event
+
+    def since(self, sequence):
+        """Events published from a sequence number on (those still buffered)"""
+        start = max(sequence, self.sequence - self.capacity)
+        return [self._buffer[position % self.capacity] for position in range(start, self.sequence)]
+
+    def subscribe(self, kinds=None, from_start=False):
+        """New reader; by default it only sees events published from now on"""
+        start = max(0, self.sequence - self.capacity) if from_start else self.sequence
+        return Subscription(self, start, kinds)
+
+class Subscription:
+    """One reader's position in an EventStream"""
+
+    def __init__(self, stream, cursor, kinds=None):
+        self.stream = stream
+        self.cursor = cursor  # Sequence number of the next event to read
+        self.kinds = frozenset(kinds) if kinds else None
+        self.dropped = 0  # Events overwritten before this reader got to them
+
+    def pending(self):
+        """Number of published events not read yet (including dropped ones)"""
+        return self.stream.sequence - self.cursor
+
+    def poll(self, limit=None):
+        """Read the next events (at most limit) and advance the cursor"""
+        stream = self.stream
+        oldest = stream.sequence - stream.capacity
+        if self.cursor < oldest:
+            self.dropped += oldest - self.cursor
+            self.cursor = oldest
+        end = stream.sequence if limit is None else min(stream.sequence, self.cursor + limit)
+        buffer, capacity, kinds = stream._buffer, stream.capacity, self.kinds
+        events = [buffer[position % capacity] for position in range(self.cursor, end)]
+        self.cursor = end
+        if kinds is not None:
+            events = [event for event in events if event.kind in kinds]
+        return events
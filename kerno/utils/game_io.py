@@ -9,8 +9,13 @@ class GameIO:
         self.text_speed = 0.01  # Delay between characters for typing effect
         
     def clear_screen(self):
-        """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        """Clear the terminal screen with an ANSI escape sequence (no subprocess)"""
+        if not sys.stdout.isatty():
+            return
+        if os.name == 'nt':
+            os.system('')  # Turns on ANSI escape handling in the Windows console
+        sys.stdout.write("\033[2J\033[H")
+        sys.stdout.flush()
         
     def display_intro(self):
         """Display game introduction in Ido"""
@@ -0,0 +1,159 @@
+import json
+from pathlib import Path
+from string import Formatter
+
+# Directory holding the bundled message catalogs, one <locale>.json per language
+LOCALES_DIR = Path(__file__).resolve().parent.parent / "data" / "locales"
+DEFAULT_LOCALE = "io"
+
+_CONVERSIONS = (None, "s", "r", "a")
+_PARSER = Formatter()
+_CATALOGS = {}  # (locale, directory) -> MessageCatalog, shared by every session
+
+def template_fields(template):
+    """Check a str.format template and return its placeholder names
+
+    Only plain field names are supported ("{name}", "{weight:g}",
+    "{query!r}"); that is all the catalogs need.
+    """
+    fields = set()
+    for literal, name, spec, conversion in _PARSER.parse(template):
+        if name is None:
+            continue
+        if not name.isidentifier():
+            raise ValueError(f"Unsupported field '{{{name}}}' in message template: {template!r}")
+        if "{" in spec:
+            raise ValueError(f"Nested fields are not supported in message template: {template!r}")
+        if conversion not in _CONVERSIONS:
+            raise ValueError(f"Unknown conversion '!{conversion}' in message template: {template!r}")
+        fields.add(name)
+    return frozenset(fields)
+
+def compile_template(template):
+    """Turn a str.format template into a function of a values dict
+
+    The template is rebuilt as an f-string, so rendering runs the same
+    bytecode as the inline f-strings the catalogs replace.
+    Returns (render, fields).
+    """
+    fields = template_fields(template)
+    body = []
+    lines = []
+    specs = {}
+    names = []
+    for literal, name, spec, conversion in _PARSER.parse(template):
+        body.append(literal.replace("{", "{{").replace("}", "}}"))
+        if name is None:
+            continue
+        if name not in names:
+            lines.append(f"    _{len(names)} = values[{name!r}]")
+            names.append(name)
+        field = f"_{names.index(name)}"
+        if conversion:
+            field += f"!{conversion}"
+        if spec:
+            # Format specs are passed in rather than written into the source
+            spec_name = f"_spec{len(specs)}"
+            specs[spec_name] = spec
+            field += f":{{{spec_name}}}"
+        body.append("{" + field + "}")
+
+    parameters = "".join(f", {name}={name}" for name in specs)
+    source = f"def render(values{parameters}):\n"
+    source += "".join(line + "\n" for line in lines)
+    source += f"    return f{''.join(body)!r}\n"
+    namespace = dict(specs)
+    exec(compile(source, "<message template>", "exec"), namespace)
+    return namespace["render"], fields
+
+class MessageCatalog:
+    """The player-facing texts of one language
+
+    Calling the catalog renders a message: messages("move.done", direction="nordo").
+    Templates are checked when the catalog is loaded and each is compiled
+    the first time it is rendered, so startup does not pay for messages a
+    session never shows. Keys the catalog lacks come from the fallback
+    catalog; every such key is recorded in missing, and keys no catalog
+    knows render as the key itself.
+    """
+
+    def __init__(self, locale, messages, fallback=None):
+        self.locale = locale
+        self.fallback = fallback
+        self.missing = set()  # Keys requested but not translated in this catalog
+        self._sources = dict(messages)  # key -> template
+        self._templates = {}  # key -> render function, filled on first use
+        self._fields = {key: template_fields(template) for key, template in messages.items()}
+        if fallback is not None:
+            # A translation may not ask for values the game never passes
+            for key, fields in self._fields.items():
+                expected = fallback._fields.get(key)
+                if expected is not None and not fields <= expected:
+                    raise ValueError(f"Message '{key}' in locale '{locale}' uses unknown fields: "
+                                     f"{', '.join(sorted(fields - expected))}")
+
+    def __call__(self, key, **values):
+        """Render a message"""
+        render = self._templates.get(key) or self._compile(key)
+        if render is None:
+            return self._missing(key, values)
+        return render(values)
+
+    def get(self, key, default=None, **values):
+        """Render a message that may legitimately be absent (e.g. a direction name)"""
+        catalog = self
+        while catalog is not None:
+            render = catalog._templates.get(key) or catalog._compile(key)
+            if render is not None:
+                return render(values)
+            catalog = catalog.fallback
+        return default
+
+    def __contains__(self, key):
+        return key in self._sources
+
+    def keys(self):
+        """Keys translated in this catalog"""
+        return self._sources.keys()
+
+    def untranslated(self):
+        """Keys of the fallback catalog(s) that this catalog does not translate"""
+        if self.fallback is None:
+            return set()
+        return (set(self.fallback.keys()) | self.fallback.untranslated()) - self._sources.keys()
+
+    def _compile(self, key):
+        """Compile a template on its first use; None if the key is not translated"""
+        template = self._sources.get(key)
+        if template is None:
+            return None
+        render = self._templates[key] = compile_template(template)[0]
+        return render
+
+    def _missing(self, key, values):
+        """Record a missing key and render it from the fallback (or as the key)"""
+        self.missing.add(key)
+        if self.fallback is not None:
+            return self.fallback(key, **values)
+        return key
+
+def available_locales(directory=LOCALES_DIR):
+    """Locales with a catalog file (no catalog is parsed)"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(path.stem for path in directory.glob("*.json"))
+
+def load_catalog(locale=DEFAULT_LOCALE, directory=LOCALES_DIR):
+    """Load (once per process) the catalog of a locale, falling back to the default locale"""
+    cache_key = (locale, str(directory))
+    catalog = _CATALOGS.get(cache_key)
+    if catalog is None:
+        path = Path(directory) / f"{locale}.json"
+        if not path.is_file():
+            raise ValueError(f"Unknown language: {locale} (available: {', '.join(available_locales(directory))})")
+        with open(path, 'r', encoding='utf-8') as f:
+            messages = json.load(f)
+        fallback = load_catalog(DEFAULT_LOCALE, directory) if locale != DEFAULT_LOCALE else None
+        catalog = _CATALOGS[cache_key] = MessageCatalog(locale, messages, fallback)
+    return catalog
@@ -0,0 +1,85 @@
+class AsciiMapRenderer:
+    """Text map of an ExplorationTracker's grid, redrawing only cells that changed
+
+    '#' marks rooms, '@' the player, '+' rooms with stairs, and '-' and '|'
+    the links between them.
+    """
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.level = 0  # z level being shown
+        self.player_cell = None
+        self.canvas = {}  # (row, col) -> character
+        self._rows = {}  # row -> rendered string
+        self._dirty_rows = set()
+        self._bounds = None  # (min_row, max_row, min_col, max_col)
+
+    def update(self, player_location):
+        """Redraw the cells changed since the last update and the player marker"""
+        dirty = self.tracker.drain_dirty()
+        cell = self.tracker.coords.get(player_location)
+        if cell != self.player_cell:
+            if self.player_cell is not None:
+                dirty.add(self.player_cell)
+            if cell is not None:
+                dirty.add(cell)
+                if cell[2] != self.level:
+                    # Changing level shows a different slice of the map
+                    self.level = cell[2]
+                    self.reset()
+                    dirty = {c for c in self.tracker.cells if c[2] == self.level}
+            self.player_cell = cell
+        for changed in dirty:
+            if changed[2] == self.level and changed in self.tracker.cells:
+                self.draw_cell(changed, self.tracker.cells[changed], changed == self.player_cell)
+        return dirty
+
+    def reset(self):
+        """Clear the drawing surface"""
+        self.canvas.clear()
+        self._rows.clear()
+        self._dirty_rows.clear()
+        self._bounds = None
+
+    def draw_cell(self, cell, location_id, is_player):
+        """Draw one location and its links to its neighbors"""
+        x, y, z = cell
+        row, col = y * 2, x * 2
+        tracker = self.tracker
+        if is_player:
+            char = "@"
+        elif tracker.cells.get((x, y, z + 1)) and tracker.linked(location_id, tracker.cells[(x, y, z + 1)]) \
+                or tracker.cells.get((x, y, z - 1)) and tracker.linked(location_id, tracker.cells[(x, y, z - 1)]):
+            char = "+"
+        else:
+            char = "#"
+        self._set(row, col, char)
+        # Links to the four neighbors on this level
+        for dx, dy, link_char in ((1, 0, "-"), (-1, 0, "-"), (0, 1, "|"), (0, -1, "|")):
+            neighbor = tracker.cells.get((x + dx, y + dy, z))
+            if neighbor is not None and tracker.linked(location_id, neighbor):
+                self._set(row + dy, col + dx, link_char)
+
+    def render(self):
+        """The map as text; only rows touched since the last call are rebuilt"""
+        if self._bounds is None:
+            return ""
+        min_row, max_row, min_col, max_col = self._bounds
+        for row in self._dirty_rows:
+            self._rows[row] = "".join(self.canvas.get((row, col), " ") for col in range(min_col, max_col + 1)).rstrip()
+        self._dirty_rows.clear()
+        return "\n".join(self._rows.get(row, "") for row in range(min_row, max_row + 1))
+
+    def _set(self, row, col, char):
+        if self.canvas.get((row, col)) == char:
+            return
+        self.canvas[(row, col)] = char
+        if self._bounds is None:
+            self._bounds = (row, row, col, col)
+        else:
+            min_row, max_row, min_col, max_col = self._bounds
+            if col < min_col or col > max_col:
+                # The map grew sideways: every row needs re-padding
+                self._dirty_rows.update(range(min(min_row, row), max(max_row, row) + 1))
+            self._bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+        self._dirty_rows.add(row)
@@ -0,0 +1,281 @@
+from collections.abc import Mapping
+
+# Hash bits consumed per trie level, and the resulting branching factor
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+_HASH_BITS = 64  # Python hashes fit in a signed 64-bit integer
+_HASH_MASK = (1 << _HASH_BITS) - 1
+
+_MISSING = object()
+
+def _hash(key):
+    return hash(key) & _HASH_MASK
+
+def _index(bitmap, bit):
+    """Position of a bit's entry among the entries present in a bitmap"""
+    return bin(bitmap & (bit - 1)).count("1")
+
+class _Node:
+    """Trie level: a bitmap of occupied slots and one entry per set bit
+
+    Entries are (hash, key, value) tuples or child nodes.
+    """
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries
+
+class _Collision:
+    """Keys whose full hashes are equal, kept in a small tuple"""
+
+    __slots__ = ("hash", "entries")
+
+    def __init__(self, key_hash, entries):
+        self.hash = key_hash
+        self.entries = entries
+
+_EMPTY_NODE = _Node(0, ())
+
+def _get(node, shift, key_hash, key, default):
+    while True:
+        if isinstance(node, _Collision):
+            for entry in node.entries:
+                if entry[1] == key:
+                    return entry[2]
+            return default
+        bit = 1 << ((key_hash >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return default
+        entry = node.entries[_index(node.bitmap, bit)]
+        if isinstance(entry, tuple):
+            return entry[2] if entry[0] == key_hash and (entry[1] is key or entry[1] == key) else default
+        node = entry
+        shift += _BITS
+
+def _merge(shift, first, second):
+    """Smallest subtree holding two entries with different keys"""
+    if shift >= _HASH_BITS or first[0] == second[0]:
+        return _Collision(first[0], (first, second))
+    first_slot = (first[0] >> shift) & _MASK
+    second_slot = (second[0] >> shift) & _MASK
+    if first_slot == second_slot:
+        return _Node(1 << first_slot, (_merge(shift + _BITS, first, second),))
+    entries = (first, second) if first_slot < second_slot else (second, first)
+    return _Node((1 << first_slot) | (1 << second_slot), entries)
+
+def _set(node, shift, entry):
+    """Node with an entry added or replaced; returns (node, added)
+
+    The same node is returned when the key already maps to that exact value.
+    """
+    key_hash, key, value = entry
+    if isinstance(node, _Collision):
+        if key_hash != node.hash:
+            # Push the collision one level down next to the new key
+            wrapper = _Node(1 << ((node.hash >> shift) & _MASK), (node,))
+            return _set(wrapper, shift, entry)
+        for i, existing in enumerate(node.entries):
+            if existing[1] == key:
+                if existing[2] is value:
+                    return node, False
+                return _Collision(key_hash, node.entries[:i] + (entry,) + node.entries[i + 1:]), False
+        return _Collision(key_hash, node.entries + (entry,)), True
+
+    bit = 1 << ((key_hash >> shift) & _MASK)
+    position = _index(node.bitmap, bit)
+    entries = node.entries
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, entries[:position] + (entry,) + entries[position:]), True
+    existing = entries[position]
+    if isinstance(existing, tuple):
+        if existing[0] == key_hash and (existing[1] is key or existing[1] == key):
+            if existing[2] is value:
+                return node, False
+            replacement, added = entry, False
+        else:
+            replacement, added = _merge(shift + _BITS, existing, entry), True
+    else:
+        replacement, added = _set(existing, shift + _BITS, entry)
+        if replacement is existing:
+            return node, False
+    return _Node(node.bitmap, entries[:position] + (replacement,) + entries[position + 1:]), added
+
+def _delete(node, shift, key_hash, key):
+    """Node without a key (None if it became empty); the same node if the key was absent"""
+    if isinstance(node, _Collision):
+        remaining = tuple(entry for entry in node.entries if entry[1] != key)
+        if len(remaining) == len(node.entries):
+            return node
+        if len(remaining) == 1:
+            return remaining[0]
+        return _Collision(node.hash, remaining)
+
+    bit = 1 << ((key_hash >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+    position = _index(node.bitmap, bit)
+    entries = node.entries
+    existing = entries[position]
+    if isinstance(existing, tuple):
+        if existing[0] != key_hash or not (existing[1] is key or existing[1] == key):
+            return node
+        replacement = None
+    else:
+        replacement = _delete(existing, shift + _BITS, key_hash, key)
+        if replacement is existing:
+            return node
+        # A child left with a single entry collapses into that entry
+        if isinstance(replacement, _Node) and len(replacement.entries) == 1 \
+                and isinstance(replacement.entries[0], tuple):
+            replacement = replacement.entries[0]
+    if replacement is None:
+        if node.bitmap == bit:
+            return None
+        return _Node(node.bitmap & ~bit, entries[:position] + entries[position + 1:])
+    return _Node(node.bitmap, entries[:position] + (replacement,) + entries[position + 1:])
+
+def _entries(node):
+    """Every (hash, key, value) entry under a node or entry"""
+    if isinstance(node, tuple):
+        yield node
+        return
+    for entry in node.entries:
+        if isinstance(entry, tuple):
+            yield entry
+        else:
+            yield from _entries(entry)
+
+def _aligned(old, new):
+    """Pairs of entries of two nodes slot by slot, None where a slot is empty"""
+    bitmap = old.bitmap | new.bitmap
+    while bitmap:
+        bit = bitmap & -bitmap
+        bitmap ^= bit
+        yield (old.entries[_index(old.bitmap, bit)] if old.bitmap & bit else None,
+               new.entries[_index(new.bitmap, bit)] if new.bitmap & bit else None)
+
+def _diff(old, new, shift):
+    """(key, old value, new value) for every key that differs between two subtrees
+
+    Subtrees shared by both sides are skipped without being visited; a
+    missing value is _MISSING.
+    """
+    if old is new:
+        return
+    if isinstance(old, _Node) and isinstance(new, _Node):
+        if old.bitmap == new.bitmap:
+            # Same slots on both sides (the usual case after a few set() calls)
+            pairs = zip(old.entries, new.entries)
+        else:
+            pairs = _aligned(old, new)
+        for old_entry, new_entry in pairs:
+            if old_entry is new_entry:
+                continue
+            if old_entry is None:
+                for _, key, value in _entries(new_entry):
+                    yield key, _MISSING, value
+            elif new_entry is None:
+                for _, key, value in _entries(old_entry):
+                    yield key, value, _MISSING
+            elif isinstance(old_entry, tuple) and isinstance(new_entry, tuple) \
+                    and old_entry[0] == new_entry[0] and old_entry[1] == new_entry[1]:
+                if old_entry[2] is not new_entry[2] and old_entry[2] != new_entry[2]:
+                    yield old_entry[1], old_entry[2], new_entry[2]
+            else:
+                yield from _diff(old_entry, new_entry, shift + _BITS)
+        return
+    # Leaves, collisions or a leaf against a subtree: compare the entries directly
+    old_values = {key: value for _, key, value in _entries(old)}
+    for _, key, value in _entries(new):
+        previous = old_values.pop(key, _MISSING)
+        if previous is not value and previous != value:
+            yield key, previous, value
+    for key, value in old_values.items():
+        yield key, value, _MISSING
+
+class PersistentMap(Mapping):
+    """Immutable hash map (a hash array mapped trie) sharing structure between versions
+
+    set() and delete() return a new map in O(log n), copying only the path
+    to the changed key; every other node is shared with the original.
+    diff() compares two versions in time proportional to their differences.
+    """
+
+    __slots__ = ("_root", "_count")
+
+    def __init__(self, items=None):
+        self._root = _EMPTY_NODE
+        self._count = 0
+        if items:
+            pairs = items.items() if isinstance(items, Mapping) else items
+            root, count = self._root, 0
+            for key, value in pairs:
+                root, added = _set(root, 0, (_hash(key), key, value))
+                count += added
+            self._root, self._count = root, count
+
+    @classmethod
+    def _from(cls, root, count):
+        result = cls.__new__(cls)
+        result._root = _EMPTY_NODE if root is None else root
+        result._count = count
+        return result
+
+    def __getitem__(self, key):
+        value = _get(self._root, 0, _hash(key), key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return _get(self._root, 0, _hash(key), key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        for _, key, _ in _entries(self._root):
+            yield key
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return f"PersistentMap({dict(self.items())!r})"
+
+    def get(self, key, default=None):
+        """Value of a key, or default"""
+        return _get(self._root, 0, _hash(key), key, default)
+
+    def set(self, key, value):
+        """Map with a key set to a value (this map if it already was)"""
+        root, added = _set(self._root, 0, (_hash(key), key, value))
+        if root is self._root:
+            return self
+        return PersistentMap._from(root, self._count + added)
+
+    def delete(self, key):
+        """Map without a key (this map if the key is absent)"""
+        root = _delete(self._root, 0, _hash(key), key)
+        if root is self._root:
+            return self
+        return PersistentMap._from(root, self._count - 1)
+
+    def update(self, items):
+        """Map with several keys set"""
+        pairs = items.items() if isinstance(items, Mapping) else items
+        root, count = self._root, self._count
+        for key, value in pairs:
+            root, added = _set(root, 0, (_hash(key), key, value))
+            count += added
+        if root is self._root:
+            return self
+        return PersistentMap._from(root, count)
+
+    def diff(self, other, missing=None):
+        """Keys whose values differ in another map, as (key, value here, value there)
+
+        A key absent on one side has missing as its value on that side.
+        """
+        for key, old, new in _diff(self._root, other._root, 0):
+            yield key, missing if old is _MISSING else old, missing if new is _MISSING else new
@@ -0,0 +1,245 @@
+import json
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+
+# Upper bounds of the latency buckets, in seconds (roughly logarithmic)
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+class LatencyHistogram:
+    __slots__ = ("counts", "total", "count", "max")
+
+    def __init__(self):
+        # One extra bucket catches everything above the last bound
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Record a single latency sample"""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate a quantile from the bucket upper bounds"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self):
+        """Return a JSON-friendly summary of the histogram"""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], self.counts))
+        }
+
+class _PhaseTimer:
+    __slots__ = ("profiler", "key", "start")
+
+    def __init__(self, profiler, key):
+        self.profiler = profiler
+        self.key = key
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.observe(self.key, time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class Profiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}  # (phase, labels) -> LatencyHistogram
+        self.counters = Counter()  # (name, labels) -> count
+        self.started_at = time.time()
+        self._sampler = None
+
+    def enable(self):
+        """Start recording timings"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording timings (already recorded data is kept)"""
+        self.enabled = False
+
+    def reset(self):
+        """Discard all recorded data"""
+        self.histograms.clear()
+        self.counters.clear()
+        self.started_at = time.time()
+
+    def phase(self, name, **labels):
+        """Context manager timing one phase of a turn; a no-op while disabled"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _PhaseTimer(self, (name, tuple(sorted(labels.items()))))
+
+    def observe(self, key, seconds):
+        """Add a latency sample for a (phase, labels) key"""
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def count(self, name, **labels):
+        """Increment a counter; a no-op while disabled"""
+        if self.enabled:
+            self.counters[(name, tuple(sorted(labels.items())))] += 1
+
+    def start_sampling(self, interval=0.005, thread=None):
+        """Start a statistical profiler sampling the stack of a thread"""
+        if self._sampler is not None:
+            return self._sampler
+        import threading  # Only the sampling profiler needs threads
+        target = thread or threading.current_thread()
+        self._sampler = StackSampler(target.ident, interval)
+        self._sampler.start()
+        return self._sampler
+
+    def stop_sampling(self):
+        """Stop the sampling profiler and return it"""
+        sampler = self._sampler
+        if sampler is not None:
+            sampler.stop()
+            self._sampler = None
+        return sampler
+
+    def to_dict(self):
+        """Return all recorded metrics as a JSON-friendly dict"""
+        return {
+            "started_at": self.started_at,
+            "histograms": [
+                {"phase": phase, "labels": dict(labels), **histogram.to_dict()}
+                for (phase, labels), histogram in sorted(self.histograms.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+        }
+
+    def to_json(self):
+        """Export metrics as a JSON document"""
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """Export metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP kerno_phase_seconds Latency of game loop phases",
+            "# TYPE kerno_phase_seconds histogram"
+        ]
+        for (phase, labels), histogram in sorted(self.histograms.items()):
+            base = [("phase", phase)] + list(labels)
+            cumulative = 0
+            for bound, bucket_count in zip(list(LATENCY_BUCKETS) + ["+Inf"], histogram.counts):
+                cumulative += bucket_count
+                lines.append(f"kerno_phase_seconds_bucket{_format_labels(base + [('le', bound)])} {cumulative}")
+            lines.append(f"kerno_phase_seconds_sum{_format_labels(base)} {histogram.total}")
+            lines.append(f"kerno_phase_seconds_count{_format_labels(base)} {histogram.count}")
+
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            lines.append(f"# TYPE kerno_{name}_total counter")
+            for (counter_name, labels), value in sorted(self.counters.items()):
+                if counter_name == name:
+                    lines.append(f"kerno_{name}_total{_format_labels(list(labels))} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, fmt=None):
+        """Write metrics to a local file, picking the format from the extension if not given"""
+        path = Path(path)
+        if fmt is None:
+            fmt = "json" if path.suffix == ".json" else "prometheus"
+        text = self.to_json() if fmt == "json" else self.to_prometheus()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+def _format_labels(labels):
+    """Format label pairs as a Prometheus label set"""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+class StackSampler:
+    def __init__(self, thread_id, interval=0.005, max_depth=64):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()  # stack tuple -> number of samples
+        self.sample_count = 0
+        import threading
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="kerno-sampler", daemon=True)
+
+    def start(self):
+        """Start sampling in a background thread"""
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the background thread"""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        """Sampling loop"""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[tuple(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def collapsed(self):
+        """Return samples in collapsed-stack format (one 'a;b;c count' per line)"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+    def write(self, path):
+        """Write collapsed stacks to a file, usable with flamegraph tools"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        return path
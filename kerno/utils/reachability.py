@@ -0,0 +1,760 @@
+"""Ending reachability analysis of a world file
+
+Explores every state the story of a world can get into and reports which
+endings can be reached (with a shortest route to each), how many states
+can no longer reach any ending, and the actions after which that happens.
+
+    python -m kerno.utils.reachability kerno/data/tutorial_world.json --workers 4
+
+A state holds only what conditions (of exits, rules, dialogues and
+endings) can read: those globals, items and knowledge keys, where such
+items were moved, the rules that fired, scheduled events that can
+change any of it, a conversation in progress and the player's location.
+Locations are merged when the player can walk between them both ways,
+and walking itself is not a step: a step is an action that changes
+something (taking or dropping an item, using furniture, answering in a
+conversation, waiting for an event). Routes are shortest in such steps,
+with the walks between them filled in afterwards. States are explored
+breadth first, each one once, spreading each level over a process pool.
+
+The number of states still grows with every item, global and event that
+conditions read and that actions can change independently of each other.
+Hand-written stories with a few such keys stay small, but busy maps (a
+generated world of a hundred rooms with items and switches everywhere)
+reach the --max-states bound within a few steps; the report then says
+the search is incomplete.
+
+Needs, health and status effects are not modelled, carrying capacity is
+ignored, more than MAX_COPIES copies of an item count as MAX_COPIES,
+talking NPCs are assumed to be found on their schedule, and random room
+events are assumed to happen eventually.
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+from collections import deque
+from kerno.models.conditions import USES_INVENTORY, USES_KNOWLEDGE, USES_PROFESSION
+from kerno.models.content import ContentLibrary
+from kerno.models.dialogue import END
+from kerno.models.player import Player
+from kerno.models.rules import MAX_CASCADE_ROUNDS
+from kerno.models.world import World
+
+# Ido movement commands for exit directions
+IDO_DIRECTIONS = {"north": "nordo", "south": "sudo", "east": "esto", "west": "westo", "up": "supre", "down": "infre"}
+
+# Copies of one item told apart in the inventory or on a floor; more count as this many
+MAX_COPIES = 3
+
+# Frontiers smaller than this are expanded in the main process
+MIN_PARALLEL_FRONTIER = 64
+BATCH_SIZE = 256
+
+def _freeze(value):
+    """Hashable form of a JSON value"""
+    if isinstance(value, list):
+        return tuple(_freeze(element) for element in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(element)) for key, element in value.items()))
+    return value
+
+class _View:
+    """An abstract state seen as both the world and the player by compiled conditions"""
+
+    __slots__ = ("global_state", "inventory", "knowledge", "profession")
+
+    def __init__(self, global_state, inventory, knowledge, profession):
+        self.global_state = global_state
+        self.inventory = inventory
+        self.knowledge = knowledge
+        self.profession = profession
+
+    def knows(self, key):
+        return key in self.knowledge
+
+class _Work:
+    """Mutable copy of a state while an action is applied to it"""
+
+    __slots__ = ("location", "conversation", "globals", "inventory", "moved", "knowledge",
+                 "fired", "active", "pending", "taken", "changed")
+
+class WorldModel:
+    """What can happen in a world, extracted from the loaded game objects
+
+    States are tuples:
+        (location, conversation, globals, inventory, moved items, knowledge,
+         (fired rules, rules whose condition holds), pending events, taken copies)
+
+    Floors that effects add tracked items to or remove them from are
+    recorded item by item in moved items. Copies lying anywhere else are
+    interchangeable, so a state only counts how many of them were taken.
+    """
+
+    def __init__(self, world_file, profession="technician"):
+        world = World(world_file)
+        if not world.load():
+            raise ValueError(f"Cannot load world file: {world_file}")
+        for pack_id in list(world.packs):
+            world.load_pack(pack_id)
+        player = Player()
+        player.current_location = world.starting_room_id
+        ContentLibrary().profession(profession).apply(world, player)
+        self.world = world
+        self.profession = player.profession
+        self.start_location = player.current_location
+        self.endings = world.endings
+        self.rules = world.rules.rules
+        self.dialogues = world.dialogues
+        self._effects = []  # Interned effect lists, referenced by index from states
+        self._effect_index = {}
+        self._relevance = {}  # id of an effect list -> whether it can matter
+
+        self.locations = {**world.passages, **world.rooms}
+        self.exits = {}  # location id -> [(direction, destination, condition or None)]
+        guard_keys, guard_uses = set(), set()
+        for location_id, location in self.locations.items():
+            exits = []
+            for direction, destination in location.exits.items():
+                if destination not in self.locations:
+                    continue
+                guarded = location.guarded_exits.get(direction)
+                condition = guarded.condition if guarded else None
+                if condition is not None:
+                    guard_keys |= condition.keys
+                    guard_uses |= condition.uses
+                exits.append((direction, destination, condition))
+            self.exits[location_id] = exits
+        self._guard_keys = tuple(sorted(guard_keys))
+        self._guard_uses = guard_uses
+        self._graphs = {}  # guard signature -> see _graph()
+
+        # Only the globals and items some condition reads can change what happens
+        conditions = [condition for exits in self.exits.values() for _, _, condition in exits if condition]
+        conditions += [rule.condition for rule in self.rules]
+        conditions += [ending.condition for ending in self.endings]
+        conditions += [condition for dialogue in self.dialogues.values() for condition in dialogue.conditions]
+        self.read_keys = frozenset().union(*(condition.keys for condition in conditions))
+        self.tracked = frozenset().union(*(condition.items for condition in conditions))
+        self.read_knowledge = frozenset().union(*(condition.knows for condition in conditions))
+
+        # What there is to do in each location
+        self.item_names = {item_id: world.items[item_id].get("name", item_id) for item_id in world.items}
+        self.takeable = {item_id for item_id in self.tracked
+                         if item_id in world.items and world.items[item_id].get("takeable", True)}
+        self.furniture = {}  # location id -> [(name, effects index)]
+        self.events = {}  # location id -> [effects index] of random events
+        self.drop_targets = {}  # item id -> locations whose effects remove that item from the floor
+        self.floor_rooms = set()  # Locations whose effects add or remove tracked items on their floor
+        for location_id, location in self.locations.items():
+            for furniture in location.furniture:
+                effects = furniture.get("interaction", {}).get("effects")
+                if effects and self._relevant(effects):
+                    self.furniture.setdefault(location_id, []).append((furniture["name"], self._intern(effects)))
+                    self._note_floors(effects, location_id)
+            for event in location.events:
+                if event.get("effects") and event.get("probability", 0) > 0 and self._relevant(event["effects"]):
+                    self.events.setdefault(location_id, []).append(self._intern(event["effects"]))
+                    self._note_floors(event["effects"], location_id)
+        self.items = {}  # floor room id -> tracked item ids on its floor at the start
+        self.homes = {}  # tracked item id -> floor rooms with a copy at the start
+        self.plain_homes = {}  # tracked item id -> other locations with a copy at the start
+        self.copies = {}  # tracked item id -> number of copies in those other locations
+        for location_id in sorted(self.locations):
+            floor = sorted(item["id"] for item in self.locations[location_id].items if item["id"] in self.tracked)
+            if floor and location_id in self.floor_rooms:
+                self.items[location_id] = tuple(floor)
+            for item_id in floor:
+                homes = self.homes if location_id in self.floor_rooms else self.plain_homes
+                if location_id not in homes.setdefault(item_id, []):
+                    homes[item_id].append(location_id)
+                if location_id not in self.floor_rooms:
+                    self.copies[item_id] = self.copies.get(item_id, 0) + 1
+        self.talkers = {}  # location id -> [(agent name, dialogue id)]
+        agents = world.agents
+        for row, agent_id in enumerate(agents.ids):
+            dialogue_id = agents.dialogue.get(agent_id)
+            if dialogue_id not in self.dialogues:
+                continue
+            schedule = agents.schedule[row]
+            rooms = agents.schedules[schedule] if schedule >= 0 else (agents.location[row],)
+            for room in dict.fromkeys(agents.room_ids[index] for index in rooms):
+                self.talkers.setdefault(room, []).append((agents.names[row], dialogue_id))
+        self.active = sorted(set(self.furniture) | set(self.events) | set(self.talkers))
+
+        self.initial = self._initial_state(world, player)
+
+    def _intern(self, effects):
+        """Index of an effect list (and of the lists it schedules)"""
+        index = self._effect_index.get(id(effects))
+        if index is None:
+            index = self._effect_index[id(effects)] = len(self._effects)
+            self._effects.append(effects)
+            for effect in effects:
+                if effect.get("type") == "schedule_event" and effect.get("effects"):
+                    self._intern(effect["effects"])
+        return index
+
+    def _relevant(self, effects):
+        """Whether effects can change anything a condition reads"""
+        relevant = self._relevance.get(id(effects))
+        if relevant is None:
+            relevant = self._relevance[id(effects)] = self._reads(effects)
+        return relevant
+
+    def _reads(self, effects):
+        """_relevant() without the cache"""
+        for effect in effects:
+            effect_type = effect.get("type")
+            if effect_type in ("add_item", "remove_item"):
+                if _item_id(effect) in self.tracked:
+                    return True
+            elif effect_type == "set_global":
+                if effect.get("key") in self.read_keys:
+                    return True
+            elif effect_type == "learn":
+                if effect.get("key") in self.read_knowledge:
+                    return True
+            elif effect_type == "schedule_event":
+                if self._relevant(effect.get("effects", [])):
+                    return True
+        return False
+
+    def _note_floors(self, effects, location_id):
+        """Record where effects put tracked items on or take them off the floor"""
+        for effect in effects:
+            effect_type = effect.get("type")
+            if effect_type in ("add_item", "remove_item") and effect.get("target") == "room" \
+                    and _item_id(effect) in self.tracked:
+                room = effect.get("room_id", location_id)
+                self.floor_rooms.add(room)
+                if effect_type == "remove_item":
+                    # Dropping the item there is worth trying
+                    self.drop_targets.setdefault(effect["item_id"], set()).add(room)
+            elif effect_type == "schedule_event":
+                self._note_floors(effect.get("effects", []), location_id)
+
+    def _initial_state(self, world, player):
+        """State of a new game, after the profession is applied and pending rules ran"""
+        work = _Work()
+        work.location = player.current_location
+        work.conversation = None
+        work.globals = {key: _freeze(value) for key, value in world.global_state.items() if key in self.read_keys}
+        work.inventory = {item["id"]: min(player.inventory.quantity(item["id"]), MAX_COPIES)
+                          for item in player.inventory if item["id"] in self.tracked}
+        work.moved = {}
+        work.taken = {}
+        work.knowledge = set(player.knowledge) & self.read_knowledge
+        work.fired = set()
+        work.active = set()
+        work.pending = [(event.get("turns_remaining", 1), self._intern(event["effects"]))
+                        for event in world.events if self._relevant(event.get("effects", []))]
+        # Every rule is evaluated on the first turn
+        work.changed = None
+        self._run_rules(work)
+        return self._freeze(work)
+
+    # States
+
+    def _thaw(self, state):
+        location, conversation, globals_, inventory, moved, knowledge, rules, pending, taken = state
+        work = _Work()
+        work.location = location
+        work.conversation = conversation
+        work.globals = dict(globals_)
+        work.inventory = dict(inventory)
+        work.moved = {room: list(items) for room, items in moved}
+        work.knowledge = set(knowledge)
+        work.fired, work.active = set(rules[0]), set(rules[1])
+        work.pending = list(pending)
+        work.taken = dict(taken)
+        work.changed = set()
+        return work
+
+    def _freeze(self, work):
+        floors = ((room, tuple(sorted(items))) for room, items in work.moved.items())
+        moved = tuple(sorted((room, items) for room, items in floors if items != self.items.get(room, ())))
+        view = self._view(work)
+        location = self._graph(self._signature(view))[0].get(work.location, work.location)
+        return (location, work.conversation, tuple(sorted(work.globals.items())),
+                tuple(sorted((item, count) for item, count in work.inventory.items() if count > 0)),
+                moved, frozenset(work.knowledge), (frozenset(work.fired), frozenset(work.active)),
+                tuple(sorted(set(work.pending))), tuple(sorted(work.taken.items())))
+
+    def _view(self, work):
+        return _View(work.globals, work.inventory, work.knowledge, self.profession)
+
+    def state_view(self, state):
+        """Condition view of a state"""
+        return _View(dict(state[2]), dict(state[3]), state[5], self.profession)
+
+    def _items_in(self, work, location_id):
+        """Mutable list of the item ids on a location's floor"""
+        items = work.moved.get(location_id)
+        if items is None:
+            items = work.moved[location_id] = list(self.items.get(location_id, ()))
+        return items
+
+    # Location graph
+
+    def _signature(self, view):
+        """Values of everything the guarded exits read"""
+        values = tuple(view.global_state.get(key) for key in self._guard_keys)
+        uses = self._guard_uses
+        return (values,
+                frozenset(view.inventory) if USES_INVENTORY in uses else None,
+                frozenset(view.knowledge) if USES_KNOWLEDGE in uses else None,
+                view.profession if USES_PROFESSION in uses else None)
+
+    def _graph(self, signature):
+        """(representative of each location, reachable-set cache, open exits) for a guard signature
+
+        Locations in one strongly connected component share the
+        representative with the smallest id.
+        """
+        graph = self._graphs.get(signature)
+        if graph is None:
+            view = self._signature_view(signature)
+            adjacency = {location_id: [destination for _, destination, condition in exits
+                                       if condition is None or condition(view, view)]
+                         for location_id, exits in self.exits.items()}
+            graph = self._graphs[signature] = (_components(adjacency), {}, adjacency)
+        return graph
+
+    def _signature_view(self, signature):
+        """View with just the inputs a signature records, for evaluating exit guards"""
+        values, inventory, knowledge, profession = signature
+        return _View(dict(zip(self._guard_keys, values)), inventory or frozenset(),
+                     knowledge or frozenset(), profession or self.profession)
+
+    def reachable(self, location_id, view):
+        """Locations the player can walk to from a location"""
+        representatives, cache, adjacency = self._graph(self._signature(view))
+        start = representatives.get(location_id, location_id)
+        reachable = cache.get(start)
+        if reachable is None:
+            seen = {start}
+            queue = deque([start])
+            while queue:
+                for destination in adjacency.get(queue.popleft(), ()):
+                    if destination not in seen:
+                        seen.add(destination)
+                        queue.append(destination)
+            reachable = cache[start] = frozenset(seen)
+        return reachable
+
+    def path(self, origin, target, view):
+        """Exit directions of a shortest walk between two locations, or None"""
+        adjacency = {location_id: [(direction, destination) for direction, destination, condition in exits
+                                   if condition is None or condition(view, view)]
+                     for location_id, exits in self.exits.items()}
+        previous = {origin: None}
+        queue = deque([origin])
+        while queue:
+            location_id = queue.popleft()
+            if location_id == target:
+                directions = []
+                while previous[location_id] is not None:
+                    location_id, direction = previous[location_id]
+                    directions.append(direction)
+                return directions[::-1]
+            for direction, destination in adjacency[location_id]:
+                if destination not in previous:
+                    previous[destination] = (location_id, direction)
+                    queue.append(destination)
+        return None
+
+    # Transitions
+
+    def successors(self, state):
+        """What each possible step leads to: [(step, next state, ending id or None)]
+
+        A step is (location, command): the command is entered in that
+        location (None for answers in a conversation).
+        """
+        results = []
+        if state[1] is not None:
+            dialogue_id, node = state[1]
+            dialogue = self.dialogues[dialogue_id]
+            for number, row in enumerate(self._responses(dialogue, node, self.state_view(state)), 1):
+                work = self._thaw(state)
+                self._apply(work, dialogue.response_effects[row], work.location)
+                next_node = dialogue.response_next[row]
+                work.conversation = None if next_node == END else self._enter(work, dialogue_id, next_node)
+                results.append(self._finish((None, f"respondar {number}"), work))
+            return _unique(results)
+
+        view = self.state_view(state)
+        reachable = self.reachable(state[0], view)
+        moved = dict(state[4])
+        inventory = dict(state[3])
+        taken = dict(state[8])
+        for item_id in sorted(self.takeable):
+            if inventory.get(item_id, 0) >= MAX_COPIES:
+                continue
+            sources = [(location_id, False) for location_id in self._floors_with(item_id, moved)
+                       if location_id in reachable]
+            if taken.get(item_id, 0) < self.copies.get(item_id, 0):
+                # One of the interchangeable copies, from the first location within reach
+                plain = next((location_id for location_id in self.plain_homes[item_id] if location_id in reachable), None)
+                if plain is not None:
+                    sources.append((plain, True))
+            for location_id, interchangeable in sources:
+                work = self._thaw(state)
+                if interchangeable:
+                    work.taken[item_id] = taken.get(item_id, 0) + 1
+                else:
+                    self._items_in(work, location_id).remove(item_id)
+                work.inventory[item_id] = inventory.get(item_id, 0) + 1
+                work.location = location_id
+                results.append(self._finish((location_id, f"prenar {self.item_names[item_id].lower()}"), work))
+        for location_id in self.active:
+            if location_id not in reachable:
+                continue
+            for name, effects in self.furniture.get(location_id, ()):
+                work = self._thaw(state)
+                work.location = location_id
+                self._apply(work, self._effects[effects], location_id)
+                results.append(self._finish((location_id, f"interagar {name.lower()}"), work))
+            for name, dialogue_id in self.talkers.get(location_id, ()):
+                work = self._thaw(state)
+                work.location = location_id
+                work.conversation = self._enter(work, dialogue_id, self.dialogues[dialogue_id].start)
+                results.append(self._finish((location_id, f"parolar {name.lower()}"), work))
+            for effects in self.events.get(location_id, ()):
+                # Waiting until a random event of the location happens
+                work = self._thaw(state)
+                work.location = location_id
+                self._apply(work, self._effects[effects], location_id)
+                results.append(self._finish((location_id, "regardar"), work))
+        for item_id in inventory:
+            # Dropping an item where the player stands (to be without it), or
+            # where an effect takes it off the floor
+            for location_id in (state[0], *sorted(self.drop_targets.get(item_id, ()))):
+                if location_id in reachable:
+                    work = self._thaw(state)
+                    work.inventory[item_id] -= 1
+                    items = self._items_in(work, location_id)
+                    if items.count(item_id) < MAX_COPIES:
+                        items.append(item_id)
+                    work.location = location_id
+                    results.append(self._finish((location_id, f"pozar {self.item_names[item_id].lower()}"), work))
+        if state[7]:
+            # Waiting for scheduled events
+            results.append(self._finish((None, "regardar"), self._thaw(state)))
+        return _unique(results)
+
+    def _floors_with(self, item_id, moved):
+        """Locations whose floor is recorded in states and has a copy of an item"""
+        locations = [location_id for location_id in self.homes.get(item_id, ())
+                     if item_id in moved.get(location_id, self.items[location_id])]
+        locations += sorted(location_id for location_id, items in moved.items()
+                            if item_id in items and location_id not in self.items)
+        return locations
+
+    def _responses(self, dialogue, node, view):
+        """Rows of the responses available at a dialogue node"""
+        rows = range(dialogue.first_response[node], dialogue.first_response[node + 1])
+        return [row for row in rows if dialogue.response_condition[row] < 0
+                or dialogue.conditions[dialogue.response_condition[row]](view, view)]
+
+    def _enter(self, work, dialogue_id, node):
+        """Enter a dialogue node; returns the conversation, or None if it ends there"""
+        dialogue = self.dialogues[dialogue_id]
+        self._apply(work, dialogue.node_effects[node], work.location)
+        if not self._responses(dialogue, node, self._view(work)):
+            return None
+        return (dialogue_id, node)
+
+    def _finish(self, step, work):
+        """End a step the way a turn ends: endings, scheduled events, rules"""
+        ending = self._ending(work)
+        if ending is None:
+            due = [effects for turns, effects in work.pending if turns <= 1]
+            work.pending = [(turns - 1, effects) for turns, effects in work.pending if turns > 1]
+            for effects in due:
+                self._apply(work, self._effects[effects], work.location)
+            self._run_rules(work)
+            ending = self._ending(work)
+        return step, self._freeze(work), ending
+
+    def _ending(self, work):
+        view = self._view(work)
+        for ending in self.endings:
+            if ending.reached(view, view):
+                return ending.id
+        return None
+
+    def _run_rules(self, work):
+        """Fire the rules affected by changed globals, like RulesEngine.evaluate"""
+        view = self._view(work)
+        changed, work.changed = work.changed, set()
+        for _ in range(MAX_CASCADE_ROUNDS):
+            rules = self.rules if changed is None else [rule for rule in self.rules if rule.condition.keys & changed]
+            if not rules:
+                break
+            for rule in rules:
+                if rule.once and rule.id in work.fired:
+                    continue
+                result = bool(rule.condition(view, view))
+                if result and rule.id not in work.active:
+                    work.fired.add(rule.id)
+                    self._apply(work, rule.effects, work.location)
+                if result:
+                    work.active.add(rule.id)
+                else:
+                    work.active.discard(rule.id)
+            changed, work.changed = work.changed, set()
+
+    def _apply(self, work, effects, location_id):
+        """Apply the effects that matter for reachability"""
+        for effect in effects:
+            effect_type = effect.get("type")
+            if effect_type == "add_item":
+                item_id = _item_id(effect)
+                if item_id not in self.tracked:
+                    continue
+                if effect.get("target") == "player":
+                    work.inventory[item_id] = min(work.inventory.get(item_id, 0) + 1, MAX_COPIES)
+                elif effect.get("target") == "room":
+                    items = self._items_in(work, effect.get("room_id", location_id))
+                    if items.count(item_id) < MAX_COPIES:
+                        items.append(item_id)
+            elif effect_type == "remove_item":
+                item_id = effect.get("item_id")
+                if effect.get("target") == "player":
+                    if work.inventory.get(item_id, 0) > 0:
+                        work.inventory[item_id] -= 1
+                elif effect.get("target") == "room":
+                    items = self._items_in(work, effect.get("room_id", location_id))
+                    if item_id in items:
+                        items.remove(item_id)
+            elif effect_type == "set_global":
+                key = effect.get("key")
+                if key in self.read_keys:
+                    value = _freeze(effect.get("value"))
+                    if work.globals.get(key, _MISSING) != value:
+                        work.globals[key] = value
+                        work.changed.add(key)
+            elif effect_type == "learn":
+                if effect.get("key") in self.read_knowledge:
+                    work.knowledge.add(effect["key"])
+            elif effect_type == "schedule_event" and self._relevant(effect.get("effects", [])):
+                work.pending.append((effect.get("turns", 1), self._intern(effect.get("effects", []))))
+
+    def route(self, steps, states):
+        """Commands for a list of steps, with the walks between them
+
+        states[i] is the state in which steps[i] is taken.
+        """
+        commands = []
+        location = self.start_location
+        for (target, command), state in zip(steps, states):
+            if target is not None and target != location:
+                directions = self.path(location, target, self.state_view(state)) or []
+                commands.extend(IDO_DIRECTIONS.get(direction, direction) for direction in directions)
+                location = target
+            commands.append(command)
+        return commands
+
+_MISSING = object()
+
+def _item_id(effect):
+    """Id of the item an add_item or remove_item effect moves"""
+    item = effect.get("item_id") or effect.get("item")
+    return item.get("id") if isinstance(item, dict) else item
+
+def _unique(results):
+    """Successors without the steps that lead to the same state as an earlier one"""
+    unique = {}
+    for result in results:
+        unique.setdefault(result[1], result)
+    return list(unique.values())
+
+def _components(adjacency):
+    """Representative (smallest id) of the strongly connected component of every location"""
+    index, low, stack, on_stack = {}, {}, [], set()
+    representative = {}
+    counter = 0
+    for root in adjacency:
+        if root in index:
+            continue
+        # Iterative Tarjan: (node, iterator over its successors)
+        work = [(root, iter(adjacency[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(adjacency.get(successor, ()))))
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    smallest = min(component)
+                    for member in component:
+                        representative[member] = smallest
+    return representative
+
+# Process pool workers keep their own model of the world
+_MODEL = None
+
+def _init_worker(world_file, profession):
+    """Pool initializer: load the world once per worker"""
+    global _MODEL
+    _MODEL = WorldModel(world_file, profession)
+
+def _expand_batch(states):
+    """Pool entry point"""
+    return [_MODEL.successors(state) for state in states]
+
+def analyze(world_file, profession="technician", workers=None, max_states=200000, model=None):
+    """Explore the states of a world breadth first and report on its endings
+
+    Returns a dict with the number of states explored, whether the
+    exploration was complete, every ending with a shortest route (or None
+    if unreachable), the number of dead-end states (from which no ending
+    can be reached) and the shortest routes into dead ends.
+    """
+    model = model or WorldModel(world_file, profession)
+    states = [model.initial]
+    ids = {model.initial: 0}
+    parents = [None]  # state id -> (parent id, step)
+    successors = [None]  # state id -> ids of the states its steps lead to
+    ending_routes = {}  # ending id -> (state id, step) of the first way found
+    ends = set()  # ids of states with a step that reaches an ending
+    frontier = [0]
+    depth = 0
+    complete = True
+    workers = workers or multiprocessing.cpu_count()
+    pool = None
+    try:
+        while frontier:
+            batch = [states[state_id] for state_id in frontier]
+            if workers > 1 and len(batch) >= MIN_PARALLEL_FRONTIER:
+                if pool is None:
+                    pool = multiprocessing.Pool(workers, _init_worker, (world_file, profession))
+                chunks = [batch[i:i + BATCH_SIZE] for i in range(0, len(batch), BATCH_SIZE)]
+                expanded = [result for chunk in pool.imap(_expand_batch, chunks) for result in chunk]
+            else:
+                expanded = [model.successors(state) for state in batch]
+
+            next_frontier = []
+            for state_id, steps in zip(frontier, expanded):
+                targets = []
+                for step, state, ending in steps:
+                    if ending is not None:
+                        ends.add(state_id)
+                        ending_routes.setdefault(ending, (state_id, step))
+                        continue
+                    target = ids.get(state)
+                    if target is None:
+                        if len(states) >= max_states:
+                            complete = False
+                            continue
+                        target = ids[state] = len(states)
+                        states.append(state)
+                        parents.append((state_id, step))
+                        successors.append(None)
+                        next_frontier.append(target)
+                    targets.append(target)
+                successors[state_id] = targets
+            frontier = next_frontier
+            depth += bool(frontier)
+            if not complete:
+                break  # State limit reached: the states found last stay unexpanded
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    def route_to(state_id, last_step=None):
+        """Commands from the start to a state (and one more step from it)"""
+        steps, path = [], []
+        if last_step is not None:
+            steps.append(last_step)
+            path.append(states[state_id])
+        while parents[state_id] is not None:
+            parent, step = parents[state_id]
+            steps.append(step)
+            path.append(states[parent])
+            state_id = parent
+        return model.route(steps[::-1], path[::-1])
+
+    endings = {}
+    for ending in model.endings:
+        found = ending_routes.get(ending.id)
+        endings[ending.id] = {"name": ending.name,
+                              "route": route_to(*found) if found is not None else None}
+
+    report = {"states": len(states), "depth": depth, "complete": complete, "endings": endings}
+    if complete:
+        # States that can still reach an ending, walking the steps backwards
+        predecessors = [[] for _ in states]
+        for state_id, targets in enumerate(successors):
+            for target in targets or ():
+                predecessors[target].append(state_id)
+        alive = set(ends)
+        queue = deque(ends)
+        while queue:
+            for predecessor in predecessors[queue.popleft()]:
+                if predecessor not in alive:
+                    alive.add(predecessor)
+                    queue.append(predecessor)
+        dead = [state_id for state_id in range(len(states)) if state_id not in alive]
+        # Points of no return: the first dead state along a route (ids are in breadth-first order)
+        entries = [state_id for state_id in dead if parents[state_id] is not None and parents[state_id][0] in alive]
+        report["dead_ends"] = len(dead)
+        report["points_of_no_return"] = [route_to(state_id) for state_id in entries[:10]]
+    return report
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Which endings of a Kerno world can be reached, and how")
+    parser.add_argument("world", nargs="?", default="kerno/data/tutorial_world.json", help="world file")
+    parser.add_argument("--profession", default="technician", help="profession of the player")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-states", type=int, default=200000, help="stop exploring after this many states")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = analyze(args.world, args.profession, args.workers, args.max_states)
+    print(f"{report['states']} states, {report['depth']} steps deep"
+          + ("" if report["complete"] else " (stopped at --max-states; dead ends not computed)"))
+    for ending_id, ending in report["endings"].items():
+        if ending["route"] is None:
+            print(f"{ending_id} ({ending['name']}): unreachable")
+        else:
+            print(f"{ending_id} ({ending['name']}): {len(ending['route'])} commands: {', '.join(ending['route'])}")
+    if report["complete"]:
+        print(f"{report['dead_ends']} dead-end state(s)")
+        for route in report["points_of_no_return"]:
+            print(f"  no ending after: {', '.join(route)}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    unreachable = [ending for ending in report["endings"].values() if ending["route"] is None]
+    return 1 if unreachable and report["complete"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
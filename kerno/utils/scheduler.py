@@ -0,0 +1,32 @@
+import heapq
+from itertools import count
+
+class TurnScheduler:
+    """Priority queue of items that become due on a given turn"""
+
+    def __init__(self):
+        self._heap = []
+        self._sequence = count()  # Keeps items due on the same turn in insertion order
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, turn, item):
+        """Queue an item to become due on the given turn"""
+        heapq.heappush(self._heap, (turn, next(self._sequence), item))
+
+    def next_turn(self):
+        """Turn of the earliest queued item, or None if empty"""
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, turn):
+        """Remove and return all items due on or before the given turn"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= turn:
+            due.append(heapq.heappop(heap)[2])
+        return due
+
+    def clear(self):
+        """Drop every queued item"""
+        self._heap.clear()
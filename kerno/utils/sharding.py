@@ -0,0 +1,374 @@
+import multiprocessing
+import random
+import zlib
+from collections import deque
+from math import ceil
+from kerno.models.actions import ActionHandler
+from kerno.models.exits import parse_exits
+from kerno.models.player import Player
+from kerno.models.world import World
+from kerno.utils.world_loader import WorldFileReader
+
+def read_location_graph(world_file):
+    """Read the undirected graph of rooms and passages from a world file
+
+    Only ids and links are kept, so this stays cheap for large worlds.
+    Returns (graph, starting_room) where graph maps id -> set of neighbor ids.
+    """
+    graph = {}
+    starting_room = None
+
+    def link(a, b):
+        graph.setdefault(a, set()).add(b)
+        graph.setdefault(b, set()).add(a)
+
+    reader = WorldFileReader(world_file, streamed=("rooms", "passages"))
+    for section, data in reader:
+        if section == "starting_room":
+            starting_room = data
+        elif section == "rooms":
+            graph.setdefault(data["id"], set())
+            for destination in parse_exits(data.get("exits", {}))[0].values():
+                link(data["id"], destination)
+        elif section == "passages":
+            graph.setdefault(data["id"], set())
+            for destination in data.get("connections", {}).values():
+                link(data["id"], destination)
+    return graph, starting_room
+
+def partition_rooms(graph, count):
+    """Split a location graph into count connected-ish regions of similar size
+
+    Regions grow breadth-first from seeds spread across the graph, taking
+    turns so that no region exceeds its share. Returns id -> region index.
+    """
+    ids = list(graph)
+    count = max(1, min(count, len(ids)))
+    capacity = ceil(len(ids) / count)
+    region_of = {}
+    sizes = [0] * count
+
+    # Seeds: each new seed is the location farthest from the previous ones
+    seeds = [ids[0]] if ids else []
+    while len(seeds) < count:
+        distances = _bfs_distances(graph, seeds)
+        unseeded = [room_id for room_id in ids if room_id not in seeds]
+        seeds.append(max(unseeded, key=lambda room_id: distances.get(room_id, float("inf"))))
+
+    frontiers = [deque([seed]) for seed in seeds]
+    unassigned = set(ids)
+    while unassigned:
+        grew = False
+        for region, frontier in enumerate(frontiers):
+            if sizes[region] >= capacity:
+                continue
+            # Claim the next unassigned location reachable from this region
+            while frontier:
+                room_id = frontier.popleft()
+                if room_id in unassigned:
+                    unassigned.discard(room_id)
+                    region_of[room_id] = region
+                    sizes[region] += 1
+                    frontier.extend(graph[room_id] - region_of.keys())
+                    grew = True
+                    break
+        if not grew and unassigned:
+            # Disconnected leftovers start again from the smallest region
+            region = sizes.index(min(sizes))
+            frontiers[region].append(next(iter(unassigned)))
+            if sizes[region] >= capacity:
+                capacity += 1
+    return region_of
+
+def _bfs_distances(graph, sources):
+    """Hop distance from the nearest source to every reachable location"""
+    distances = {source: 0 for source in sources}
+    queue = deque(sources)
+    while queue:
+        room_id = queue.popleft()
+        for neighbor in graph[room_id]:
+            if neighbor not in distances:
+                distances[neighbor] = distances[room_id] + 1
+                queue.append(neighbor)
+    return distances
+
+class RegionWorker:
+    """The part of a sharded world owned by one process
+
+    Requests arrive as tuples; every request gets exactly one reply
+    (results, outbox). Outbox messages are routed by the coordinator:
+    ("handoff", player_id, state), ("item", room_id, item, prototype),
+    ("remove", room_id, item_id) and ("globals", {key: value}).
+    """
+
+    def __init__(self, world_file, region_ids, seed=None):
+        self.world = World(world_file)
+        if seed is not None:
+            self.world.seed = seed
+        # Set before loading, so that exits into other regions are kept for handoffs
+        self.world.foreign_room_handler = self._send_item
+        self.world.foreign_removal_handler = self._send_removal
+        if not self.world.load(region=region_ids):
+            raise RuntimeError(f"Could not load region from {world_file}")
+        self.players = {}  # player id -> Player
+        self.handlers = {}  # player id -> ActionHandler
+        self.outbox = []
+        self._seen_versions = dict(self.world.global_state.versions)
+
+    def handle(self, request):
+        """Process one request and return (results, outbox)"""
+        kind = request[0]
+        results = {}
+        if kind == "join":
+            _, player_id, state = request
+            self._admit(player_id, state)
+        elif kind == "command":
+            _, player_id, text = request
+            result = self.handlers[player_id].process_action(text)
+            results[player_id] = (result.message, result.action_type)
+            self._check_boundary(player_id)
+        elif kind == "tick":
+            # The clock advances exactly once per tick, with or without players
+            if not self.players:
+                self.world.process_events(None)
+            for position, (player_id, player) in enumerate(list(self.players.items())):
+                results[player_id] = self.world.process_events(player, advance=position == 0)
+                results[player_id] += self.handlers[player_id].check_dialogue()
+                self._check_boundary(player_id)
+        elif kind == "item":
+            _, room_id, item, prototype = request
+            self._define(prototype)
+            self.world.add_item_to_room(room_id, item)
+        elif kind == "remove":
+            _, room_id, item_id = request
+            self.world.remove_item_from_room(room_id, item_id)
+        elif kind == "globals":
+            _, changes = request
+            for key, value in changes.items():
+                self.world.global_state[key] = value
+            self._seen_versions = dict(self.world.global_state.versions)
+        elif kind == "query":
+            results = {
+                "rooms": len(self.world.rooms),
+                "turn": self.world.turn_count,
+                "players": {pid: p.current_location for pid, p in self.players.items()},
+                "room_items": {rid: [item["id"] for item in room.items] for rid, room in self.world.rooms.items()},
+                "passage_items": {pid: [item["id"] for item in passage.items]
+                                  for pid, passage in self.world.passages.items()},
+                "global_state": dict(self.world.global_state)
+            }
+
+        self._collect_global_changes()
+        outbox, self.outbox = self.outbox, []
+        return results, outbox
+
+    def _admit(self, player_id, state):
+        """Take ownership of a player arriving in this region"""
+        for prototype in state.pop("prototypes", []):
+            self._define(prototype)
+        player = Player.from_dict(state, self.world.items)
+        self.players[player_id] = player
+        self.handlers[player_id] = ActionHandler(self.world, player)
+
+    def _check_boundary(self, player_id):
+        """Hand a player over if they walked into a location owned by another region"""
+        player = self.players[player_id]
+        location = player.current_location
+        if location in self.world.rooms or location in self.world.passages:
+            return
+        state = player.to_dict()
+        # Carry the full prototypes along; the other region may only know them by id
+        state["prototypes"] = [dict(item.prototype) for item, _ in player.inventory.stacks() if hasattr(item, "prototype")]
+        del self.players[player_id]
+        del self.handlers[player_id]
+        self.outbox.append(("handoff", player_id, state))
+
+    def _send_item(self, room_id, item):
+        """Forward an item placed in a room owned by another region"""
+        prototype = dict(item.prototype) if hasattr(item, "prototype") else None
+        payload = item.to_dict() if hasattr(item, "to_dict") else dict(item)
+        self.outbox.append(("item", room_id, payload, prototype))
+
+    def _send_removal(self, room_id, item_id):
+        """Forward the removal of an item from a room owned by another region"""
+        self.outbox.append(("remove", room_id, item_id))
+
+    def _define(self, prototype):
+        """Register a prototype received from another region if it is unknown here"""
+        if prototype and (prototype["id"] not in self.world.items
+                          or self.world.items[prototype["id"]].keys() <= {"id", "name"}):
+            self.world.items.define(prototype)
+
+    def _collect_global_changes(self):
+        """Queue global_state keys changed locally so other regions see them"""
+        state = self.world.global_state
+        changes = {key: state.get(key) for key, version in state.versions.items()
+                   if self._seen_versions.get(key) != version}
+        if changes:
+            self._seen_versions = dict(state.versions)
+            self.outbox.append(("globals", changes))
+
+def _worker_main(connection, world_file, region_ids, seed):
+    """Entry point of a worker process"""
+    try:
+        worker = RegionWorker(world_file, region_ids, seed)
+        connection.send(("ready", None))
+    except Exception as e:
+        connection.send(("error", str(e)))
+        return
+    while True:
+        request = connection.recv()
+        if request[0] == "stop":
+            break
+        try:
+            connection.send(("ok", worker.handle(request)))
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {e}"))
+    connection.close()
+
+class ShardedWorld:
+    """A world split into regions, each simulated by its own worker process
+
+    Every room and passage is owned by exactly one region. Players live in
+    the worker owning their current location and are handed off (with
+    their inventory) when they cross a region boundary. Items placed into
+    or removed from foreign locations and global_state changes are routed
+    between workers over local pipes. Each region's world seed is derived
+    from the session seed, so a session replays the same way given the
+    same seed, worker count and commands.
+    """
+
+    def __init__(self, world_file, workers=None, seed=None):
+        self.world_file = world_file
+        self.worker_count = workers or multiprocessing.cpu_count()
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.region_of = {}  # location id -> region index
+        self.player_region = {}  # player id -> region index
+        self.starting_room = None
+        self._connections = []
+        self._processes = []
+
+    def start(self):
+        """Partition the world and start one worker per region"""
+        graph, self.starting_room = read_location_graph(self.world_file)
+        self.region_of = partition_rooms(graph, self.worker_count)
+        regions = [[] for _ in range(max(self.region_of.values(), default=0) + 1)]
+        for location_id, region in self.region_of.items():
+            regions[region].append(location_id)
+
+        for region, region_ids in enumerate(regions):
+            parent, child = multiprocessing.Pipe()
+            seed = zlib.crc32(f"{self.seed}:region:{region}".encode("utf-8"))
+            process = multiprocessing.Process(
+                target=_worker_main, args=(child, self.world_file, region_ids, seed), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        for connection in self._connections:
+            status, detail = connection.recv()
+            if status != "ready":
+                self.stop()
+                raise RuntimeError(f"Region worker failed to start: {detail}")
+        return self
+
+    def stop(self):
+        """Stop every worker"""
+        for connection in self._connections:
+            try:
+                connection.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def join(self, player_id, player=None):
+        """Add a player at their location (or the starting room)"""
+        player = player or Player()
+        player.id = player_id
+        if player.current_location is None:
+            player.current_location = self.starting_room
+        region = self.region_of[player.current_location]
+        self.player_region[player_id] = region
+        self._request_all({region: [("join", player_id, player.to_dict())]})
+
+    def command(self, player_id, text):
+        """Run one command for one player; returns (message, action_type)"""
+        return self.commands({player_id: text})[player_id]
+
+    def commands(self, player_commands):
+        """Run commands for several players, in parallel across regions"""
+        requests = {}
+        for player_id, text in player_commands.items():
+            requests.setdefault(self.player_region[player_id], []).append(("command", player_id, text))
+        return self._request_all(requests)
+
+    def tick(self):
+        """Process world events in every region; returns player id -> messages"""
+        return self._request_all({region: [("tick",)] for region in range(len(self._connections))})
+
+    def query(self):
+        """Per-region summary of rooms, turn, players, items and global state"""
+        return [self._request_all({region: [("query",)]}, raw=True)[region]
+                for region in range(len(self._connections))]
+
+    def _request_all(self, requests, raw=False):
+        """Send queued requests per region, wait for the replies and route outboxes
+
+        Each region's requests run concurrently with the other regions'.
+        """
+        results = {}
+        raw_results = {}
+        while requests:
+            for region, region_requests in requests.items():
+                self._connections[region].send(region_requests[0])
+            routed = {}
+            for region, region_requests in list(requests.items()):
+                status, reply = self._connections[region].recv()
+                if status != "ok":
+                    raise RuntimeError(f"Region {region} failed: {reply}")
+                region_results, outbox = reply
+                raw_results[region] = region_results
+                if not raw:
+                    results.update(region_results)
+                for message in outbox:
+                    self._route(region, message, routed)
+                region_requests.pop(0)
+            # Remaining requests of each region go before the routed messages
+            for region, region_requests in requests.items():
+                if region_requests:
+                    routed.setdefault(region, [])[:0] = region_requests
+            requests = routed
+        return raw_results if raw else results
+
+    def _route(self, source, message, routed):
+        """Queue an outbox message for the region(s) that must receive it"""
+        kind = message[0]
+        if kind == "handoff":
+            _, player_id, state = message
+            region = self.region_of.get(state["current_location"], source)
+            self.player_region[player_id] = region
+            routed.setdefault(region, []).append(("join", player_id, state))
+        elif kind == "item":
+            _, room_id, item, prototype = message
+            region = self.region_of.get(room_id)
+            if region is not None and region != source:
+                routed.setdefault(region, []).append(("item", room_id, item, prototype))
+        elif kind == "remove":
+            _, room_id, item_id = message
+            region = self.region_of.get(room_id)
+            if region is not None and region != source:
+                routed.setdefault(region, []).append(("remove", room_id, item_id))
+        elif kind == "globals":
+            for region in range(len(self._connections)):
+                if region != source:
+                    routed.setdefault(region, []).append(("globals", message[1]))
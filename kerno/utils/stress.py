@@ -0,0 +1,449 @@
+"""Randomized stress testing of the game engine
+
+Generates random worlds and command streams, plays them through
+ActionHandler.process_action and World.process_events the way the game
+loop does, and checks invariants after every step. Failing cases are
+shrunk to a minimal reproduction that can be saved and replayed.
+
+    python -m kerno.utils.stress --cases 500 --workers 4
+    python -m kerno.utils.stress --replay failure.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import traceback
+from kerno.models.actions import ActionHandler
+from kerno.models.combat import DAMAGE_TYPES
+from kerno.models.needs import NEED_LIMITS, NEEDS
+from kerno.models.player import Player
+from kerno.models.timeline import Timeline
+from kerno.models.world import World
+from kerno.utils.event_stream import ItemMoved
+from kerno.utils.text_utils import TextFormatter
+
+DIRECTIONS = {"north": "south", "south": "north", "east": "west", "west": "east", "up": "down", "down": "up"}
+STEPS = {"north": (0, 1, 0), "south": (0, -1, 0), "east": (1, 0, 0), "west": (-1, 0, 0), "up": (0, 0, 1), "down": (0, 0, -1)}
+ITEM_NAMES = ("lampo", "kablo", "klefo", "pano", "aquo", "utensilo", "karto", "batro", "libro", "tubo")
+FURNITURE_NAMES = ("tablo", "panelo", "armoro", "lito", "ekrano")
+CREATURE_NAMES = ("rato", "insekto", "droido")
+COMMAND_WORDS = ("nordo", "sudo", "esto", "westo", "supre", "infre", "regardar", "examinar", "prenar",
+                 "pozar", "uzar", "interagar", "parolar", "respondar", "atakar", "inventario", "kayero", "mapo",
+                 "statuso", "desfacar", "rifacar", "helpo")
+
+class InvariantError(AssertionError):
+    """A game invariant did not hold"""
+
+def random_world(rng, rooms=8, prototypes=6):
+    """A random but loadable world description (the dict form of a world file)"""
+    world = {"starting_room": "r0", "global_state": {}, "items": [], "rooms": [], "passages": []}
+    for index in range(prototypes):
+        item_type = rng.choice(("food", "drink", "tool", "generic"))
+        world["items"].append({
+            "id": f"i{index}",
+            "name": f"{ITEM_NAMES[index % len(ITEM_NAMES)]}{index}",
+            "type": item_type,
+            "weight": rng.choice((0.5, 1, 2, 5, 12)),
+            "usable": rng.random() < 0.7,
+            "consumable": item_type in ("food", "drink") or rng.random() < 0.2,
+            "takeable": rng.random() < 0.9,
+            "use_effects": [{"room_type": "generic", "message": "Ol funcionas."}] if item_type == "tool" else []
+        })
+        if item_type == "tool" and rng.random() < 0.5:
+            world["items"][-1]["attack"] = _random_attack(rng)
+
+    # Lay the rooms out on a grid so that opposite exits stay consistent
+    positions = {(0, 0, 0): "r0"}
+    room_data = {"r0": _random_room(rng, "r0", prototypes, world)}
+    links = []
+    while len(positions) < rooms:
+        origin = rng.choice(list(positions))
+        direction = rng.choice(list(STEPS))
+        dx, dy, dz = STEPS[direction]
+        position = (origin[0] + dx, origin[1] + dy, origin[2] + dz)
+        if position in positions:
+            links.append((positions[origin], direction, positions[position]))
+            continue
+        room_id = f"r{len(positions)}"
+        positions[position] = room_id
+        room_data[room_id] = _random_room(rng, room_id, prototypes, world)
+        links.append((positions[origin], direction, room_id))
+
+    for origin, direction, destination in links:
+        back = DIRECTIONS[direction]
+        if direction in room_data[origin]["exits"] or back in room_data[destination]["exits"]:
+            continue
+        if rng.random() < 0.2:
+            # Some links go through a passage
+            passage_id = f"p{len(world['passages'])}"
+            world["passages"].append({
+                "id": passage_id, "name": f"Pasejo {passage_id}", "description": "Streta pasejo.",
+                "connections": {direction: destination, back: origin},
+                "items": [f"i{rng.randrange(prototypes)}" for _ in range(rng.randrange(2))]
+            })
+            room_data[origin]["exits"][direction] = passage_id
+            room_data[destination]["exits"][back] = passage_id
+        elif rng.random() < 0.15:
+            # Some exits need an item
+            room_data[origin]["exits"][direction] = {
+                "to": destination, "requires": {"items": [f"i{rng.randrange(prototypes)}"]}}
+            room_data[destination]["exits"][back] = origin
+        else:
+            room_data[origin]["exits"][direction] = destination
+            room_data[destination]["exits"][back] = origin
+    world["rooms"] = list(room_data.values())
+
+    world["agents"] = []
+    for index in range(rng.randrange(4)):
+        combat = {"health": rng.randrange(1, 12), "hostile": rng.random() < 0.5,
+                  "resistances": {rng.choice(DAMAGE_TYPES): rng.choice((0, 0.5, 2))}}
+        if rng.random() < 0.8:
+            combat["attack"] = _random_attack(rng)
+        world["agents"].append({
+            "id": f"a{index}", "name": f"{CREATURE_NAMES[index % len(CREATURE_NAMES)]}{index}",
+            "kind": "creature", "location": rng.choice(world["rooms"])["id"],
+            "mobility": rng.choice((0, 0.3)), "combat": combat
+        })
+    return world
+
+def _random_attack(rng):
+    """A random attack spec for a weapon or a creature"""
+    low = rng.randrange(4)
+    attack = {"damage": [low, low + rng.randrange(4)], "type": rng.choice(DAMAGE_TYPES),
+              "accuracy": rng.choice((0.3, 0.7, 1))}
+    if rng.random() < 0.3:
+        attack["inflicts"] = {"id": f"s{rng.randrange(3)}", "name": "Vundo", "description": "Vundo.",
+                              "duration": rng.randrange(1, 4),
+                              "combat_modifiers": {rng.choice(("attack", "defend")): rng.choice((0.5, 2))}}
+        attack["inflict_chance"] = rng.choice((0.5, 1))
+    return attack
+
+def _random_room(rng, room_id, prototypes, world):
+    """One random room"""
+    room = {
+        "id": room_id, "name": f"Chambro {room_id}", "description": f"Chambro {room_id}.",
+        "type": rng.choice(("generic", "technical")),
+        "items": [f"i{rng.randrange(prototypes)}" for _ in range(rng.randrange(3))],
+        "furniture": [], "exits": {}, "events": []
+    }
+    for index in range(rng.randrange(3)):
+        name = FURNITURE_NAMES[rng.randrange(len(FURNITURE_NAMES))]
+        room["furniture"].append({
+            "id": f"{room_id}_f{index}", "name": f"{name}{room_id}{index}",
+            "interaction": {"message": "Ulo eventas.", "effects": _random_effects(rng, prototypes, room_id)}
+        })
+    for _ in range(rng.randrange(3)):
+        room["events"].append({"probability": rng.random(), "message": "Ulo sonas.",
+                               "effects": _random_effects(rng, prototypes, room_id)})
+    return room
+
+def _random_effects(rng, prototypes, room_id, depth=0):
+    """A short list of random event effects"""
+    effects = []
+    for _ in range(rng.randrange(3)):
+        effect_type = rng.choice(("add_item", "remove_item", "set_global", "learn",
+                                  "schedule_event", "player_effect"))
+        if effect_type in ("add_item", "remove_item"):
+            effects.append({"type": effect_type, "target": rng.choice(("player", "room")),
+                            "item_id": f"i{rng.randrange(prototypes)}"})
+        elif effect_type == "set_global":
+            effects.append({"type": "set_global", "key": f"g{rng.randrange(4)}", "value": rng.randrange(3)})
+        elif effect_type == "learn":
+            effects.append({"type": "learn", "key": f"k{rng.randrange(4)}", "value": "fakto"})
+        elif effect_type == "schedule_event":
+            if depth < 2:
+                effects.append({"type": "schedule_event", "turns": rng.randrange(1, 4), "message": "Pose.",
+                                "effects": _random_effects(rng, prototypes, room_id, depth + 1)})
+        else:
+            name = rng.choice(("rest", "heal", "damage", "status"))
+            effect = {"type": "player_effect", "effect": name, "value": rng.randrange(1, 40)}
+            if name == "status":
+                effect["status"] = {"id": f"s{rng.randrange(3)}", "name": "Efekto", "description": "Efekto.",
+                                    "duration": rng.randrange(1, 5),
+                                    "need_modifiers": {"energy": -rng.randrange(3)}}
+            effects.append(effect)
+    return effects
+
+def random_commands(rng, world, count):
+    """Random command lines, mostly well-formed, targeting things in the world"""
+    targets = [item["name"] for item in world["items"]]
+    targets += [f["name"] for room in world["rooms"] for f in room["furniture"]]
+    creatures = [agent["name"] for agent in world.get("agents", [])]
+    commands = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            commands.append(rng.choice(("", "xyz", "prenar", "uzar ", "respondar abc")))
+        elif roll < 0.4:
+            commands.append(rng.choice(COMMAND_WORDS[:6]))
+        else:
+            word = rng.choice(COMMAND_WORDS)
+            if word in ("examinar", "prenar", "pozar", "uzar", "interagar", "kayero") and targets:
+                word += " " + rng.choice(targets)
+            elif word == "atakar" and creatures:
+                word += " " + rng.choice(creatures)
+            elif word == "respondar":
+                word += f" {rng.randrange(1, 4)}"
+            commands.append(word)
+    return commands
+
+def _item_total(world, player):
+    """Number of item units in every location and the inventory"""
+    total = player.inventory.count
+    for location in list(world.rooms.values()) + list(world.passages.values()):
+        total += len(location.items)
+    return total
+
+def _check(world, player, previous):
+    """Check the invariants after a step; previous holds what the last check saw"""
+    low, high = NEED_LIMITS
+    for need in NEEDS:
+        value = getattr(player, need)
+        if not low <= value <= high:
+            raise InvariantError(f"{need} out of range: {value}")
+    for name, value in player.stats.items():
+        if value < previous["stats"].get(name, 0):
+            raise InvariantError(f"stat {name} decreased")
+    if world.turn_count < previous["turn"]:
+        raise InvariantError("turn count went back")
+    if world.get_location(player.current_location) is None:
+        raise InvariantError(f"player in unknown location {player.current_location}")
+
+    # Items only appear or vanish through events that say so
+    expected = previous["items"]
+    for event in previous["feed"].poll():
+        if isinstance(event, ItemMoved):
+            expected += (event.source is None) - (event.destination is None)
+    total = _item_total(world, player)
+    if total != expected:
+        raise InvariantError(f"item count {total}, expected {expected}")
+
+    weight = sum(item.get("weight", 0) * quantity for item, quantity in player.inventory.stacks())
+    if abs(weight - player.inventory.weight) > 1e-6:
+        raise InvariantError(f"inventory weight {player.inventory.weight}, items weigh {weight}")
+
+    previous["stats"] = dict(player.stats)
+    previous["turn"] = world.turn_count
+    previous["items"] = total
+
+def _check_scheduled(world, pending):
+    """Every scheduled event counts down by one turn and fires when it reaches zero"""
+    remaining = {id(event): event["turns_remaining"] for event in world.events}
+    for event, before in pending:
+        if before > 1 and remaining.get(id(event)) != before - 1:
+            raise InvariantError(f"scheduled event at {before} turns now at {remaining.get(id(event))}")
+        if before <= 1 and id(event) in remaining:
+            raise InvariantError("scheduled event due but not fired")
+
+def _check_timeline(world, player, timeline):
+    """The incrementally built snapshot matches a full capture of the live state"""
+    expected = Timeline(world, player).record().state
+    differences = sorted(str(key) for key, _, _ in timeline.current.state.diff(expected))
+    if differences:
+        raise InvariantError(f"snapshot differs from the game in {', '.join(differences)}")
+
+def _expected_destination(world, player, handler, command):
+    """Where a movement command through an open exit must take the player, or None"""
+    direction = handler.direction_mapping.get(command.strip())
+    location = world.get_location(player.current_location)
+    if direction is None or location is None:
+        return None
+    exits = getattr(location, "exits", None) or getattr(location, "connections", {})
+    destination = exits.get(direction)
+    guarded = getattr(location, "guarded_exits", {}).get(direction)
+    if destination is None or (guarded is not None and not guarded.is_open(world, player)):
+        return None
+    return destination
+
+def run_case(world_data, commands, seed=0):
+    """Play a command stream in a world; returns None or a failure dict"""
+    fd, path = tempfile.mkstemp(suffix=".json", prefix="kerno-stress-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(world_data, f)
+        world = World(path)
+        if not world.load():
+            return {"step": -1, "command": None, "kind": "LoadError", "detail": "world did not load"}
+        world.seed = seed
+        player = Player()
+        player.current_location = world.starting_room_id
+        handler = ActionHandler(world, player)
+        formatter = TextFormatter(player.messages)
+        previous = {"stats": {}, "turn": 0, "items": _item_total(world, player),
+                    "feed": world.event_stream.subscribe()}
+        timeline = Timeline(world, player)
+        handler.timeline = timeline
+        timeline.record()
+
+        step, command = -1, None
+        try:
+            for step, command in enumerate(commands):
+                # Same order as GameEngine.game_loop
+                pending = [(event, event["turns_remaining"]) for event in world.events]
+                world.process_events(player)
+                handler.check_dialogue()
+                _check_scheduled(world, pending)
+                _check(world, player, previous)
+                location = world.get_location(player.current_location)
+                formatter.format_room_description(location, player,
+                                                  world.agents.names_in_room(player.current_location))
+                handler.get_available_actions()
+                expected = _expected_destination(world, player, handler, command)
+                result = handler.process_action(command)
+                if expected is not None and player.current_location != expected:
+                    raise InvariantError(f"stuck: '{command}' should lead to {expected}")
+                if result.action_type not in ("undo", "redo"):
+                    timeline.record()
+                elif result.success:
+                    # Going back rewinds the turn and stats: compare with the restored state
+                    previous.update(stats={}, turn=world.turn_count, items=_item_total(world, player))
+                    previous["feed"].poll()
+                _check(world, player, previous)
+                if timeline.current.turn == world.turn_count:
+                    _check_timeline(world, player, timeline)
+        except InvariantError as e:
+            return {"step": step, "command": command, "kind": "InvariantError", "detail": str(e)}
+        except Exception as e:
+            return {"step": step, "command": command, "kind": type(e).__name__, "detail": str(e),
+                    "traceback": traceback.format_exc()}
+        return None
+    finally:
+        os.remove(path)
+
+def _same_failure(failure, reference):
+    """Whether a failure looks like the one being shrunk"""
+    if failure is None:
+        return False
+    if reference["kind"] == "InvariantError":
+        return failure["kind"] == "InvariantError" and failure["detail"].split(" ")[0] == reference["detail"].split(" ")[0]
+    return failure["kind"] == reference["kind"]
+
+def shrink(world_data, commands, seed, failure):
+    """Reduce a failing case while it keeps failing the same way
+
+    Commands are cut with delta debugging; then room events, furniture,
+    items and effects are removed one at a time.
+    Returns (world_data, commands, failure).
+    """
+    commands = list(commands[:failure["step"] + 1])
+
+    def fails(world, cmds):
+        result = run_case(world, cmds, seed)
+        return result if _same_failure(result, failure) else None
+
+    # Delta debugging over the command list
+    chunks = 2
+    while len(commands) >= 2:
+        size = max(1, len(commands) // chunks)
+        reduced = False
+        for start in range(0, len(commands), size):
+            candidate = commands[:start] + commands[start + size:]
+            result = fails(world_data, candidate)
+            if result:
+                commands, failure, reduced = candidate[:result["step"] + 1], result, True
+                chunks = max(chunks - 1, 2)
+                break
+        if not reduced:
+            if size == 1:
+                break
+            chunks = min(chunks * 2, len(commands))
+
+    # Strip world content that the failure does not need
+    changed = True
+    while changed:
+        changed = False
+        for path in _removable_parts(world_data):
+            candidate = json.loads(json.dumps(world_data))
+            container, index = _resolve(candidate, path)
+            del container[index]
+            result = fails(candidate, commands)
+            if result:
+                world_data, failure, changed = candidate, result, True
+                break
+    return world_data, commands, failure
+
+def _removable_parts(world_data):
+    """Paths (into the world dict) of list entries the shrinker may try to delete"""
+    paths = []
+    for section in ("rooms", "passages"):
+        for i, location in enumerate(world_data.get(section, [])):
+            for key in ("events", "furniture", "items"):
+                for j, entry in enumerate(location.get(key, [])):
+                    paths.append((section, i, key, j))
+                    if key == "events":
+                        paths.extend((section, i, key, j, "effects", k) for k in range(len(entry.get("effects", []))))
+                    elif key == "furniture":
+                        effects = entry.get("interaction", {}).get("effects", [])
+                        paths.extend((section, i, key, j, "interaction", "effects", k) for k in range(len(effects)))
+    paths.extend(("agents", i) for i in range(len(world_data.get("agents", []))))
+    # Later entries first, so deleting one does not shift the others
+    return sorted(paths, reverse=True)
+
+def _resolve(data, path):
+    """Container and index for a path"""
+    for key in path[:-1]:
+        data = data[key]
+    return data, path[-1]
+
+def fuzz_case(seed, rooms=8, commands=100):
+    """Generate, run and (on failure) shrink one random case"""
+    rng = random.Random(seed)
+    world_data = random_world(rng, rooms=rooms)
+    command_list = random_commands(rng, world_data, commands)
+    failure = run_case(world_data, command_list, seed)
+    if failure is None:
+        return seed, None
+    world_data, command_list, failure = shrink(world_data, command_list, seed, failure)
+    return seed, {"seed": seed, "world": world_data, "commands": command_list, "failure": failure}
+
+def _fuzz_job(args):
+    """Pool entry point"""
+    return fuzz_case(*args)
+
+def fuzz(cases, workers=None, rooms=8, commands=100, first_seed=0):
+    """Run many random cases in parallel; returns the shrunk failures"""
+    jobs = [(seed, rooms, commands) for seed in range(first_seed, first_seed + cases)]
+    failures = []
+    with multiprocessing.Pool(workers or multiprocessing.cpu_count()) as pool:
+        for seed, failure in pool.imap_unordered(_fuzz_job, jobs, chunksize=4):
+            if failure is not None:
+                failures.append(failure)
+    return sorted(failures, key=lambda failure: failure["seed"])
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Randomized stress test of the Kerno engine")
+    parser.add_argument("--cases", type=int, default=200, help="number of random cases")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--rooms", type=int, default=8, help="rooms per random world")
+    parser.add_argument("--commands", type=int, default=100, help="commands per case")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first case")
+    parser.add_argument("--output", help="write the shrunk failures to this JSON file")
+    parser.add_argument("--replay", help="replay the failures saved in a JSON file")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        with open(args.replay, 'r', encoding='utf-8') as f:
+            failures = json.load(f)
+        for case in failures:
+            failure = run_case(case["world"], case["commands"], case["seed"])
+            print(f"seed {case['seed']}: {failure or 'ok'}")
+        return 0
+
+    failures = fuzz(args.cases, args.workers, args.rooms, args.commands, args.seed)
+    for case in failures:
+        failure = case["failure"]
+        print(f"seed {case['seed']}: {failure['kind']}: {failure['detail']} "
+              f"after {len(case['commands'])} command(s) {case['commands']}")
+    print(f"{args.cases} cases, {len(failures)} failure(s)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(failures, f, ensure_ascii=False, indent=2)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,50 +1,59 @@
+from kerno.utils.i18n import load_catalog
+
 class TextFormatter:
-    def __init__(self):
-        """Initialize text formatter with Ido as the only language"""
-        self.language = "ido"
+    def __init__(self, messages=None):
+        """Initialize text formatter; texts come from a message catalog (Ido by default)"""
+        self.messages = messages or load_catalog()
+        self.language = self.messages.locale
         
         # Commands in Ido
         self.basic_commands = [
             "regardar", "examinar", "prenar", "pozar", "uzar", 
-            "interagar", "inventario", "statuso", "helpo", "finar",
+            "interagar", "parolar", "respondar", "inventario", "kayero", "mapo", "statuso", "helpo", "finar",
             "nordo", "sudo", "esto", "westo", "supre", "infre"
         ]
         
-    def format_room_description(self, room, player):
-        """Format room description with dynamic elements in Ido"""
+    def format_room_description(self, room, player, present=None):
+        """Format room description with dynamic elements"""
+        messages = self.messages
         # Start with the room name as a header
         formatted_text = f"{room.name}\n"
         formatted_text += "=" * len(room.name) + "\n\n"
         
         # Get the base description
-        formatted_text += room.get_description()
+        formatted_text += room.get_description(messages=messages)
+        
+        # Add the NPCs and creatures in the room
+        if present:
+            formatted_text += "\n" + messages("room.present", names=", ".join(present))
         
         # Add player status if it's relevant
         if player.hunger > 80:
-            formatted_text += "\n\nVua stomako dolorante grondas. Vu bezonas trovar nutrivo balde."
+            formatted_text += "\n\n" + messages("warning.hunger")
         elif player.thirst > 80:
-            formatted_text += "\n\nVua boko esas sika. Vu desperate bezonas aquo."
+            formatted_text += "\n\n" + messages("warning.thirst")
         elif player.energy < 20:
-            formatted_text += "\n\nVu sentas exhaustita. Vu devus reposar balde."
+            formatted_text += "\n\n" + messages("warning.energy")
             
         return formatted_text
         
     def format_status_block(self, player):
-        """Format player status as a visual block in Ido"""
+        """Format player status as a visual block"""
+        messages = self.messages
         health_bar = self.create_progress_bar(player.health, 100, 20)
         hunger_bar = self.create_progress_bar(100 - player.hunger, 100, 20)  # Invert so empty is bad
         thirst_bar = self.create_progress_bar(100 - player.thirst, 100, 20)  # Invert so empty is bad
         energy_bar = self.create_progress_bar(player.energy, 100, 20)
         
-        status_text = f"Saneso: {health_bar} {player.health}%\n"
-        status_text += f"Hungro: {hunger_bar} {100-player.hunger}%\n"
-        status_text += f"Soifo: {thirst_bar} {100-player.thirst}%\n"
-        status_text += f"Energio: {energy_bar} {player.energy}%\n"
+        status_text = messages("status.bar", need=messages("need.health"), bar=health_bar, percent=player.health) + "\n"
+        status_text += messages("status.bar", need=messages("need.hunger"), bar=hunger_bar, percent=100 - player.hunger) + "\n"
+        status_text += messages("status.bar", need=messages("need.thirst"), bar=thirst_bar, percent=100 - player.thirst) + "\n"
+        status_text += messages("status.bar", need=messages("need.energy"), bar=energy_bar, percent=player.energy) + "\n"
         
         if player.status_effects:
-            status_text += "\nStatuso-efekti:\n"
+            status_text += "\n" + messages("status.effects_header") + "\n"
             for effect in player.status_effects:
-                status_text += f"- {effect['name']}: {effect['description']}\n"
+                status_text += messages("status.effect_entry", name=effect["name"], description=effect["description"]) + "\n"
                 
         return status_text
         
@@ -64,17 +73,27 @@ class TextFormatter:
         return f"[{bar_char * filled_width}{' ' * empty_width}]"
         
     def format_inventory_list(self, inventory):
-        """Format inventory items as a list in Ido"""
+        """Format inventory items as a list"""
+        messages = self.messages
         if not inventory:
-            return "Vua inventario esas vakua."
+            return messages("inventory.empty")
             
-        inventory_text = "Inventario:\n"
-        for item in inventory:
-            inventory_text += f"- {item['name']}"
+        inventory_text = messages("inventory.header") + "\n"
+        for item, quantity in inventory.stacks():
+            inventory_text += messages("inventory.item", name=item["name"])
+            if quantity > 1:
+                inventory_text += messages("inventory.quantity", quantity=quantity)
             if "weight" in item:
-                inventory_text += f" ({item['weight']} kg)"
+                inventory_text += messages("inventory.item_weight", weight=item["weight"])
             inventory_text += "\n"
             
+        if inventory.weight:
+            if inventory.max_weight is not None:
+                inventory_text += messages("inventory.total_limit", weight=inventory.weight,
+                                           max_weight=inventory.max_weight) + "\n"
+            else:
+                inventory_text += messages("inventory.total", weight=inventory.weight) + "\n"
+            
         return inventory_text
         
     def word_wrap(self, text, width=80):
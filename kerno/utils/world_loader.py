@@ -0,0 +1,133 @@
+import codecs
+import json
+import os
+
+# Top-level arrays of a world file that are read one element at a time
+STREAMED_SECTIONS = ("rooms", "passages", "items", "agents", "rules", "dialogues", "endings")
+
+_WHITESPACE = " \t\n\r"
+
+class WorldFileReader:
+    """Incremental reader for world files
+
+    Iterating yields (section, value) pairs. Elements of the arrays in
+    STREAMED_SECTIONS are yielded one by one as they are parsed, so only
+    the current element is held in memory; other top-level values are
+    yielded whole. An optional progress callback receives
+    (section, elements_read, bytes_read, total_bytes).
+    """
+
+    def __init__(self, path, progress=None, chunk_size=1 << 16, streamed=STREAMED_SECTIONS):
+        self.path = path
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.streamed = frozenset(streamed)
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._file = None
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        with open(self.path, 'rb') as f:
+            self._file = f
+            self._expect("{")
+            if self._peek() == "}":
+                return
+            while True:
+                key = self._value()
+                self._expect(":")
+                if key in self.streamed and self._peek() == "[":
+                    yield from self._array(key)
+                else:
+                    yield key, self._value()
+                if self._next_delimiter("}") == "}":
+                    break
+
+    def _array(self, section):
+        """Yield the elements of a top-level array one at a time"""
+        self._expect("[")
+        count = 0
+        if self._peek() == "]":
+            self._pos += 1
+        else:
+            while True:
+                yield section, self._value()
+                count += 1
+                if self.progress:
+                    self.progress(section, count, self.bytes_read, self.total_bytes)
+                if self._next_delimiter("]") == "]":
+                    break
+        if self.progress and not count:
+            self.progress(section, 0, self.bytes_read, self.total_bytes)
+
+    def _fill(self, at_least=0):
+        """Read the next chunk (of at least at_least bytes); returns False at end of file"""
+        if self._eof:
+            return False
+        # Drop what has been consumed before growing the buffer
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = self._file.read(max(self.chunk_size, at_least))
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self._eof = True
+            self._buffer += self._utf8.decode(b"", final=True)
+            return False
+        self._buffer += self._utf8.decode(chunk)
+        return True
+
+    def _peek(self):
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not self._fill():
+                raise ValueError(f"Unexpected end of world file {self.path}")
+
+    def _expect(self, char):
+        """Consume an expected structural character"""
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' at byte ~{self.bytes_read} of {self.path}")
+        self._pos += 1
+
+    def _next_delimiter(self, closing):
+        """Consume a ',' or the closing bracket and return it"""
+        found = self._peek()
+        if found not in (",", closing):
+            raise ValueError(f"Expected ',' or '{closing}' but found '{found}' in {self.path}")
+        self._pos += 1
+        return found
+
+    def _value(self):
+        """Decode one complete JSON value, reading more data as needed"""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Decoding restarts from the value's start, so read as much
+                # again as is pending: a large value is retried O(log n) times
+                if self._fill(len(self._buffer) - self._pos):
+                    continue
+                raise
+            # A value running up to the end of the buffer may be cut short
+            # (a number split across chunks), so make sure more follows
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+def iter_world_file(path, progress=None):
+    """Iterate over the (section, value) pairs of a world file"""
+    return iter(WorldFileReader(path, progress))
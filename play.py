@@ -7,6 +7,9 @@ Kerno: La Lasta Devo
 Exekutez ica skripto por komencar la ludo.
 """
 
+import time
+STARTED = time.perf_counter()  # Taken before any other import, for --startup-time
+
 import sys
 import argparse
 from kerno.main import GameEngine
@@ -19,10 +22,59 @@ def main():
         default="kerno/data/tutorial_world.json",
         help="La dosiero por la mondo charjar (original: tutorial_world.json)"
     )
+    parser.add_argument(
+        "--profession",
+        default="technician",
+        help="La profesiono di la ludanto (original: technician)"
+    )
+    parser.add_argument(
+        "--language",
+        default="io",
+        help="La linguo di la mesaji (original: io; anke: en)"
+    )
+    parser.add_argument(
+        "--no-intro",
+        action="store_true",
+        help="Saltar la introduko e komencar direte"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ne uzar la memorajo di pre-analizita mondi (sempre lektar la JSON)"
+    )
+    parser.add_argument(
+        "--startup-time",
+        action="store_true",
+        help="Montrar la tempo til la unesma prompto (sur stderr)"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DOSIERO",
+        help="Registrar la tempo di omna fazo e skribar la metriki (.json o Prometheus-texto)"
+    )
+    parser.add_argument(
+        "--profile-sample",
+        metavar="DOSIERO",
+        help="Exekutar la specimenanta profililo e skribar la stako-specimeni"
+    )
     args = parser.parse_args()
     
+    profiler = None
+    if args.profile or args.profile_sample:
+        from kerno.utils.profiling import Profiler
+        profiler = Profiler(enabled=bool(args.profile))
+        if args.profile_sample:
+            profiler.start_sampling()
+    bootstrap_cache = None
+    if not args.no_cache:
+        from kerno.utils.bootstrap import BootstrapCache
+        bootstrap_cache = BootstrapCache()
+    
+    game = None
     try:
-        game = GameEngine(args.world)
+        game = GameEngine(args.world, profiler=profiler, profession=args.profession,
+                          locale=args.language, skip_intro=args.no_intro,
+                          bootstrap_cache=bootstrap_cache, started=STARTED)
         game.game_loop()
     except KeyboardInterrupt:
         print("\nLudo interrompita per uzanto.")
@@ -30,6 +82,13 @@ def main():
     except Exception as e:
         print(f"Eroro: {e}")
         return 1
+    finally:
+        if args.startup_time and game and game.time_to_first_prompt is not None:
+            print(f"Tempo til la unesma prompto: {game.time_to_first_prompt * 1000:.1f} ms", file=sys.stderr)
+        if args.profile:
+            profiler.write(args.profile)
+        if args.profile_sample:
+            profiler.stop_sampling().write(args.profile_sample)
     
     return 0
 
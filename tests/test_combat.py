@@ -0,0 +1,49 @@
+import json
+from kerno.models.actions import ActionHandler
+from kerno.models.player import Player
+from kerno.models.world import World
+
+def _write_world(tmp_path):
+    world = {
+        "starting_room": "r0",
+        "items": [],
+        "rooms": [{"id": "r0", "name": "Chambro", "description": "Chambro.", "exits": {}, "items": [], "furniture": []}],
+        "agents": [{"id": "rato", "name": "Rato", "kind": "creature", "location": "r0", "mobility": 0.0,
+                    "combat": {"health": 40, "hostile": True,
+                               "attack": {"damage": [1, 4], "type": "physical", "accuracy": 0.6}}}]
+    }
+    path = tmp_path / "world.json"
+    path.write_text(json.dumps(world), encoding="utf-8")
+    return str(path)
+
+def _fight(path, seed, player_ids):
+    """Combat records and each player's health after a few turns of attacking the rat"""
+    world = World(path)
+    assert world.load()
+    world.seed = seed
+    feed = world.event_stream.subscribe(("combat",))
+    players = []
+    for player_id in player_ids:
+        player = Player()
+        player.id = player_id
+        player.current_location = "r0"
+        players.append((player, ActionHandler(world, player)))
+    for _ in range(6):
+        for player, handler in players:
+            handler.process_action("atakar rato")
+        for position, (player, _) in enumerate(players):
+            world.process_events(player, advance=position == 0)
+    records = [(record.turn, record.attacks, record.defeated) for record in feed.poll()]
+    return records, {player.id: player.health for player, _ in players}
+
+def test_fights_follow_the_world_seed(tmp_path):
+    path = _write_world(tmp_path)
+    first = _fight(path, 11, ["ana"])
+    assert first[0]
+    assert _fight(path, 11, ["ana"]) == first
+    assert _fight(path, 12, ["ana"]) != first
+
+def test_players_act_in_the_order_of_their_ids(tmp_path):
+    path = _write_world(tmp_path)
+    # Players share the default name; the order they are seen in must not matter
+    assert _fight(path, 5, ["ana", "bo"]) == _fight(path, 5, ["bo", "ana"])
@@ -0,0 +1,45 @@
+import json
+import pytest
+from kerno.models.actions import ActionHandler
+from kerno.models.dialogue import CompiledDialogue
+from kerno.models.player import Player
+from kerno.models.world import World
+
+DIALOGUE = {"id": "saluto", "nodes": [{"id": "start", "speaker": "Ana", "text": "Saluto!",
+                                       "responses": [{"text": "Saluto.", "next": None}]}]}
+
+def _handler(tmp_path):
+    world = {
+        "starting_room": "r0",
+        "items": [],
+        "rooms": [{"id": "r0", "name": "Chambro", "description": ".", "exits": {"east": "r1"}, "items": [], "furniture": []},
+                  {"id": "r1", "name": "Koridoro", "description": ".", "exits": {"west": "r0"}, "items": [], "furniture": []}],
+        "agents": [{"id": "ana", "name": "Ana", "kind": "npc", "location": "r0", "mobility": 0.0, "dialogue": "saluto"}],
+        "dialogues": [DIALOGUE]
+    }
+    path = tmp_path / "world.json"
+    path.write_text(json.dumps(world), encoding="utf-8")
+    world = World(str(path))
+    assert world.load()
+    player = Player()
+    player.current_location = "r0"
+    handler = ActionHandler(world, player)
+    assert handler.process_action("parolar ana").success
+    return handler
+
+def test_walking_away_ends_the_conversation(tmp_path):
+    handler = _handler(tmp_path)
+    assert handler.process_action("esto").success
+    assert handler.dialogue_session is None
+
+def test_conversation_ends_when_the_speaker_leaves(tmp_path):
+    handler = _handler(tmp_path)
+    handler.world.agents.despawn("ana")
+    assert handler.check_dialogue() == [handler.messages("talk.left", name="ana")]
+    assert not handler.process_action("respondar 1").success
+
+def test_dialogues_need_a_known_start_node():
+    with pytest.raises(ValueError):
+        CompiledDialogue({"id": "vakua", "nodes": []})
+    with pytest.raises(ValueError):
+        CompiledDialogue({**DIALOGUE, "start": "fino"})
@@ -0,0 +1,74 @@
+import json
+from kerno.models.actions import ActionHandler
+from kerno.models.player import Player
+from kerno.models.timeline import Timeline
+from kerno.models.world import World
+
+def _world(tmp_path, requires):
+    world = {
+        "starting_room": "r0",
+        "global_state": {"power": False},
+        "items": [{"id": "karto", "name": "Karto"}],
+        "rooms": [{"id": "r0", "name": "Chambro", "description": ".", "items": ["karto"], "furniture": [],
+                   "exits": {"north": {"to": "r1", "requires": requires}}},
+                  {"id": "r1", "name": "Laboratorio", "description": ".", "exits": {"south": "r0"},
+                   "items": [], "furniture": []}]
+    }
+    path = tmp_path / "world.json"
+    path.write_text(json.dumps(world), encoding="utf-8")
+    world = World(str(path))
+    assert world.load()
+    return world
+
+def _player():
+    player = Player()
+    player.current_location = "r0"
+    return player
+
+def test_cached_exit_follows_the_inventory(tmp_path):
+    world = _world(tmp_path, {"items": ["karto"]})
+    player = _player()
+    assert not world.is_exit_open("r0", "north", player)
+    card = world.rooms["r0"].items[0]
+    player.add_item(card)
+    assert world.is_exit_open("r0", "north", player)
+    player.remove_item(card)
+    assert not world.is_exit_open("r0", "north", player)
+
+def test_cached_exit_follows_global_state_and_knowledge(tmp_path):
+    world = _world(tmp_path, {"global": {"power": True}, "knowledge": ["kodo"]})
+    player = _player()
+    assert not world.is_exit_open("r0", "north", player)
+    world.global_state["power"] = True
+    assert not world.is_exit_open("r0", "north", player)
+    player.learn("kodo", "1234")
+    assert world.is_exit_open("r0", "north", player)
+    world.global_state["power"] = False
+    assert not world.is_exit_open("r0", "north", player)
+
+def test_cached_exit_is_kept_per_player(tmp_path):
+    world = _world(tmp_path, {"knowledge": ["kodo"]})
+    first, second = _player(), _player()
+    first.learn("kodo", "1234")
+    assert world.is_exit_open("r0", "north", first)
+    assert not world.is_exit_open("r0", "north", second)
+
+def test_cached_exit_follows_undo(tmp_path):
+    world = _world(tmp_path, {"global": {"power": True}, "items": ["karto"]})
+    player = _player()
+    handler = ActionHandler(world, player)
+    handler.timeline = timeline = Timeline(world, player)
+    timeline.record("start")
+    world._process_event_effects([{"type": "set_global", "key": "power", "value": True}], player)
+    timeline.record()
+    assert not world.is_exit_open("r0", "north", player)
+    handler.process_action("prenar karto")
+    timeline.record()
+    assert world.is_exit_open("r0", "north", player)
+    timeline.undo()
+    assert not world.is_exit_open("r0", "north", player)
+    timeline.redo()
+    assert world.is_exit_open("r0", "north", player)
+    timeline.undo(2)
+    player.add_item(world.rooms["r0"].items[0])
+    assert not world.is_exit_open("r0", "north", player)
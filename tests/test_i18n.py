@@ -0,0 +1,29 @@
+import pytest
+from kerno.utils.i18n import MessageCatalog, compile_template, load_catalog
+
+def test_compiled_templates_render_like_str_format():
+    for template in ("{name} pezas {weight:.1f} kg", "{{literal}} {query!r}", "{a}{a}{b:>4}", "Nula valori"):
+        render, _ = compile_template(template)
+        values = {"name": "Guto", "weight": 1.25, "query": "x", "a": 1, "b": 2}
+        assert render(values) == template.format(**values)
+
+def test_unsupported_templates_are_rejected():
+    for template in ("{0}", "{item.name}", "{value:{width}}"):
+        with pytest.raises(ValueError):
+            compile_template(template)
+
+def test_translations_fall_back_to_the_default_catalog():
+    base = MessageCatalog("io", {"hello": "Saluto, {name}!", "bye": "Adio."})
+    english = MessageCatalog("en", {"hello": "Hello, {name}!"}, fallback=base)
+    assert english("hello", name="Ana") == "Hello, Ana!"
+    assert english("bye") == "Adio."
+    assert english.missing == {"bye"}
+    assert english("nowhere") == "nowhere"
+    with pytest.raises(ValueError):
+        MessageCatalog("en", {"hello": "Hello, {nickname}!"}, fallback=base)
+
+def test_bundled_catalogs_agree():
+    # Loading checks that translations only use fields the game passes
+    english = load_catalog("en")
+    assert not english.untranslated()
+    assert english.keys() <= english.fallback.keys()
@@ -0,0 +1,37 @@
+import json
+import pytest
+from kerno.models.actions import ActionHandler
+from kerno.models.player import Player
+from kerno.models.world import World
+
+def _world(tmp_path, items, pack_rooms=()):
+    (tmp_path / "pack.json").write_text(json.dumps({"rooms": list(pack_rooms)}), encoding="utf-8")
+    world = {
+        "starting_room": "r0",
+        "items": [{"id": "guto", "name": "Guto"}],
+        "rooms": [{"id": "r0", "name": "Chambro", "description": ".", "exits": {}, "items": items, "furniture": []}],
+        "packs": [{"id": "extra", "file": "pack.json", "rooms": ["r1"]}]
+    }
+    path = tmp_path / "world.json"
+    path.write_text(json.dumps(world), encoding="utf-8")
+    world = World(str(path))
+    assert world.load()
+    return world
+
+def test_take_removes_the_instance_taken(tmp_path):
+    world = _world(tmp_path, ["guto", {"proto": "guto", "name": "Reda guto"}])
+    player = Player()
+    player.current_location = "r0"
+    assert ActionHandler(world, player).process_action("prenar reda").success
+    assert [item["name"] for item in player.inventory] == ["Reda guto"]
+    assert [item["name"] for item in world.rooms["r0"].items] == ["Guto"]
+
+def test_failed_pack_load_ends_item_loading(tmp_path):
+    # An undefined item is referenced, then an item entry without an id stops the load
+    world = _world(tmp_path, [], [{"id": "r1", "name": "Chambro", "items": ["fantomo", {"name": "?"}]}])
+    with pytest.raises(Exception):
+        world.load_pack("extra")
+    assert not world.items.loading
+    assert "fantomo" not in world.items
+    with pytest.raises(KeyError):
+        world.items.instantiate("fantomo")
@@ -0,0 +1,21 @@
+from kerno.models.actions import ActionHandler
+from kerno.models.player import Player
+from kerno.models.world import World
+
+WORLD_FILE = "kerno/data/tutorial_world.json"
+
+def _handler():
+    world = World(WORLD_FILE)
+    assert world.load()
+    player = Player()
+    player.current_location = world.starting_room_id
+    return ActionHandler(world, player)
+
+def test_notebook_lists_what_a_search_finds():
+    handler = _handler()
+    assert handler.process_action("kayero").message == handler.messages("notebook.empty")
+    room = handler.world.rooms[handler.player.current_location]
+    handler.process_action("regardar")
+    assert handler.process_action(f"kayero {room.name.split()[0]}").success
+    listing = handler.process_action("kayero").message
+    assert handler.messages("notebook.search_entry", title=room.name) in listing
@@ -0,0 +1,50 @@
+import json
+from kerno.models.actions import ActionHandler
+from kerno.models.player import Player
+from kerno.models.world import World
+
+def _world(tmp_path, rules):
+    world = {
+        "starting_room": "r0",
+        "global_state": {"alarm": False},
+        "items": [{"id": "klefo", "name": "Klefo", "takeable": True}],
+        "rooms": [{"id": "r0", "name": "Chambro", "description": "Chambro.", "exits": {},
+                   "items": ["klefo"], "furniture": []}],
+        "rules": rules
+    }
+    path = tmp_path / "world.json"
+    path.write_text(json.dumps(world), encoding="utf-8")
+    world = World(str(path))
+    assert world.load()
+    player = Player()
+    player.current_location = "r0"
+    return world, player
+
+def test_rule_fires_when_its_global_changes(tmp_path):
+    world, player = _world(tmp_path, [
+        {"id": "siren", "when": {"key": "alarm"}, "effects": [{"type": "set_global", "key": "siren", "value": True}]},
+        {"id": "panic", "when": {"key": "siren"}, "message": "Paniko!"}
+    ])
+    assert world.process_events(player) == []
+    world.global_state["alarm"] = True
+    assert "Paniko!" in world.process_events(player)
+    assert world.global_state["siren"] is True
+
+def test_rule_reading_the_inventory_fires_after_taking_the_item(tmp_path):
+    world, player = _world(tmp_path, [{"id": "found", "when": {"has_item": "klefo"}, "message": "Trovita!"}])
+    assert world.process_events(player) == []
+    ActionHandler(world, player).process_action("prenar klefo")
+    assert "Trovita!" in world.process_events(player)
+    assert "Trovita!" not in world.process_events(player)
+
+def test_rule_reading_knowledge_fires_after_learning(tmp_path):
+    world, player = _world(tmp_path, [{"id": "idea", "when": {"knows": "kodo"}, "message": "Ideo!", "once": False}])
+    world.process_events(player)
+    player.learn("kodo", True)
+    assert "Ideo!" in world.process_events(player)
+
+def test_rules_reading_the_player_wait_for_one(tmp_path):
+    world, player = _world(tmp_path, [{"id": "found", "when": {"has_item": "klefo"}, "message": "Trovita!"}])
+    assert world.rules.evaluate(None) == []
+    ActionHandler(world, player).process_action("prenar klefo")
+    assert world.rules.evaluate(player) == ["Trovita!"]
@@ -0,0 +1,97 @@
+import json
+from kerno.utils.sharding import RegionWorker, ShardedWorld
+
+def _room(room_id, exits, items=(), furniture=()):
+    return {"id": room_id, "name": f"Chambro {room_id}", "description": f"Chambro {room_id}.",
+            "exits": exits, "items": list(items), "furniture": list(furniture)}
+
+def _write_world(tmp_path):
+    """A corridor r0 - r1 - p0 (passage) - r2 - r3 - r4"""
+    button = {"id": "butono", "name": "Butono", "interaction": {
+        "message": "Klik.", "effects": [{"type": "remove_item", "target": "room", "room_id": "r4", "item_id": "klefo"}]}}
+    world = {
+        "starting_room": "r0",
+        "items": [{"id": "lampo", "name": "Lampo", "takeable": True},
+                  {"id": "klefo", "name": "Klefo", "takeable": True}],
+        "rooms": [
+            _room("r0", {"east": "r1"}, items=["lampo"], furniture=[button]),
+            _room("r1", {"west": "r0", "east": "p0"}),
+            _room("r2", {"west": "p0", "east": "r3"}),
+            _room("r3", {"west": "r2", "east": "r4"}),
+            _room("r4", {"west": "r3"}, items=["klefo"]),
+        ],
+        "passages": [{"id": "p0", "name": "Pasejo", "description": "Streta pasejo.",
+                      "connections": {"west": "r1", "east": "r2"}}]
+    }
+    path = tmp_path / "world.json"
+    path.write_text(json.dumps(world), encoding="utf-8")
+    return str(path)
+
+def _items(regions, location_id):
+    """Item ids in a location, per region that has it loaded"""
+    found = []
+    for summary in regions:
+        items = summary["room_items"].get(location_id, summary["passage_items"].get(location_id))
+        if items is not None:
+            found.append(items)
+    return found
+
+def test_player_walks_across_regions(tmp_path):
+    with ShardedWorld(_write_world(tmp_path), workers=2) as world:
+        assert world.region_of["r0"] != world.region_of["r4"]
+        world.join("ana")
+        world.command("ana", "prenar lampo")
+
+        regions_visited = set()
+        for _ in range(5):
+            message, action_type = world.command("ana", "esto")
+            assert action_type == "move"
+            world.tick()
+            regions = world.query()
+            holders = [index for index, summary in enumerate(regions) if "ana" in summary["players"]]
+            location = regions[holders[0]]["players"]["ana"]
+            assert holders == [world.region_of[location]]
+            regions_visited.add(holders[0])
+            if location == "p0":
+                world.command("ana", "pozar lampo")
+        assert location == "r4"
+        assert len(regions_visited) == 2
+
+def test_locations_have_one_owner(tmp_path):
+    with ShardedWorld(_write_world(tmp_path), workers=2) as world:
+        world.join("ana")
+        world.command("ana", "prenar lampo")
+        for _ in range(2):
+            world.command("ana", "esto")
+        world.command("ana", "pozar lampo")
+
+        regions = world.query()
+        for location_id in world.region_of:
+            assert len(_items(regions, location_id)) == 1
+        assert _items(regions, "p0") == [["lampo"]]
+
+def test_item_removal_is_routed_to_the_owning_region(tmp_path):
+    with ShardedWorld(_write_world(tmp_path), workers=2) as world:
+        world.join("ana")
+        assert _items(world.query(), "r4") == [["klefo"]]
+        world.command("ana", "interagar butono")
+        assert _items(world.query(), "r4") == [[]]
+
+def test_regions_without_players_keep_time(tmp_path):
+    with ShardedWorld(_write_world(tmp_path), workers=2, seed=3) as world:
+        world.join("ana")
+        for _ in range(3):
+            world.tick()
+        assert [summary["turn"] for summary in world.query()] == [3, 3]
+
+def test_scheduled_event_fires_in_region_without_players(tmp_path):
+    worker = RegionWorker(_write_world(tmp_path), ["r3", "r4"], seed=3)
+    assert worker.world.seed == 3
+    worker.world.events.append({"turns_remaining": 2, "message": "Krak.", "effects": [
+        {"type": "remove_item", "target": "room", "room_id": "r4", "item_id": "klefo"},
+        {"type": "set_global", "key": "falis", "value": True}]})
+    worker.handle(("tick",))
+    assert [item["id"] for item in worker.world.rooms["r4"].items] == ["klefo"]
+    _, outbox = worker.handle(("tick",))
+    assert worker.world.rooms["r4"].items == []
+    assert ("globals", {"falis": True}) in outbox
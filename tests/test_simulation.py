@@ -0,0 +1,46 @@
+import json
+from kerno.models.player import Player
+from kerno.models.world import World
+
+def _room(room_id, exits, events=()):
+    return {"id": room_id, "name": f"Chambro {room_id}", "description": ".", "exits": exits,
+            "items": [], "furniture": [], "events": list(events)}
+
+def _world(tmp_path, events=()):
+    """r0 - p0 (passage) - r1 - r2, and r2 - r3 from a content pack"""
+    pack = {"rooms": [_room("r3", {"west": "r2"})]}
+    (tmp_path / "pack.json").write_text(json.dumps(pack), encoding="utf-8")
+    world = {
+        "starting_room": "r0",
+        "items": [{"id": "guto", "name": "Guto"}],
+        "rooms": [_room("r0", {"east": "p0"}), _room("r1", {"west": "p0", "east": "r2"}, events),
+                  _room("r2", {"west": "r1", "east": "r3"})],
+        "passages": [{"id": "p0", "name": "Pasejo", "description": ".", "connections": {"west": "r0", "east": "r1"}}],
+        "packs": [{"id": "extra", "file": "pack.json", "rooms": ["r3"]}]
+    }
+    path = tmp_path / "world.json"
+    path.write_text(json.dumps(world), encoding="utf-8")
+    world = World(str(path))
+    assert world.load()
+    return world
+
+def test_neighborhood_goes_through_passages(tmp_path):
+    world = _world(tmp_path)
+    assert world.lod.neighborhood("r0") == {"r0": 0, "p0": 1, "r1": 2, "r2": 3}
+    assert world.lod.neighborhood("p0") == {"p0": 0, "r0": 1, "r1": 1, "r2": 2}
+
+def test_neighborhood_sees_rooms_of_a_loaded_pack(tmp_path):
+    world = _world(tmp_path)
+    assert "r3" not in world.lod.neighborhood("r1")
+    world.load_pack("extra")
+    assert world.lod.neighborhood("r1")["r3"] == 2
+
+def test_catch_up_counts_every_occurrence(tmp_path):
+    drip = {"probability": 0.5, "message": "Plop.",
+            "effects": [{"type": "add_item", "target": "room", "item_id": "guto"}]}
+    world = _world(tmp_path, [drip])
+    world.random.seed(4)
+    player = Player()
+    player.current_location = "r0"
+    world.lod.advance("r1", 40, player)
+    assert 10 < len(world.rooms["r1"].items) < 30
@@ -0,0 +1,85 @@
+from kerno.main import GameEngine
+from kerno.models.actions import ActionHandler
+from kerno.models.player import Player
+from kerno.models.timeline import Timeline
+from kerno.models.world import World
+
+WORLD_FILE = "kerno/data/tutorial_world.json"
+
+class ScriptedIO:
+    """GameIO replacement that plays a list of commands and keeps the output"""
+
+    def __init__(self, commands):
+        self.commands = list(commands)
+        self.messages = []
+
+    def clear_screen(self):
+        pass
+
+    def display_intro(self):
+        pass
+
+    def display_prompt(self, available_actions=None):
+        pass
+
+    def display_message(self, message):
+        self.messages.append(message)
+
+    def get_input(self):
+        return self.commands.pop(0)
+
+def _session(seed=9):
+    world = World(WORLD_FILE)
+    assert world.load()
+    world.seed = seed
+    player = Player()
+    player.current_location = world.starting_room_id
+    handler = ActionHandler(world, player)
+    handler.timeline = timeline = Timeline(world, player)
+    timeline.record("start")
+    return world, player, handler, timeline
+
+def _turn(world, handler, timeline, command):
+    world.process_events(handler.player)
+    handler.process_action(command)
+    return timeline.record()
+
+def _view(world, player):
+    return (world.turn_count, player.current_location, player.energy, sorted(item["id"] for item in player.inventory),
+            dict(world.global_state), [world.agents.get_agent(agent_id) for agent_id in world.agents.ids])
+
+def test_undo_and_redo_round_trip():
+    world, player, handler, timeline = _session()
+    _turn(world, handler, timeline, "regardar")
+    before = _view(world, player)
+    for command in ("nordo", "regardar", "sudo"):
+        _turn(world, handler, timeline, command)
+    after = _view(world, player)
+
+    assert timeline.undo(3).turn == before[0]
+    assert _view(world, player) == before
+    for _ in range(3):
+        assert timeline.redo() is not None
+    assert _view(world, player) == after
+
+def test_replaying_after_undo_gives_the_same_turns():
+    world, player, handler, timeline = _session()
+    for command in ("nordo", "regardar", "regardar"):
+        _turn(world, handler, timeline, command)
+    after = _view(world, player)
+    timeline.undo(3)
+    for command in ("nordo", "regardar", "regardar"):
+        _turn(world, handler, timeline, command)
+    assert _view(world, player) == after
+
+def test_recorded_state_matches_a_full_capture():
+    world, player, handler, timeline = _session()
+    for command in ("nordo", "regardar", "sudo", "regardar"):
+        snapshot = _turn(world, handler, timeline, command)
+        assert not list(snapshot.state.diff(Timeline(world, player).record().state))
+
+def test_game_loop_stays_on_the_turn_undo_returned_to():
+    game = GameEngine(WORLD_FILE, skip_intro=True)
+    game.io = ScriptedIO(["regardar", "regardar", "desfacar", "finar"])
+    game.game_loop()
+    assert game.world.turn_count == game.timeline.current.turn
@@ -0,0 +1,51 @@
+import json
+from kerno.models.world import World
+from kerno.utils.bootstrap import BootstrapCache
+from kerno.utils.world_loader import WorldFileReader, iter_world_file
+
+WORLD_FILE = "kerno/data/tutorial_world.json"
+
+def _sections(data):
+    pairs = []
+    for key, value in data.items():
+        if isinstance(value, list) and key in ("rooms", "passages", "items", "agents", "rules", "dialogues", "endings"):
+            pairs += [(key, element) for element in value]
+        else:
+            pairs.append((key, value))
+    return pairs
+
+def test_streamed_sections_match_json_load():
+    with open(WORLD_FILE, encoding="utf-8") as f:
+        expected = _sections(json.load(f))
+    assert list(iter_world_file(WORLD_FILE)) == expected
+    # Tiny chunks split tokens and multi-byte characters across reads
+    assert list(WorldFileReader(WORLD_FILE, chunk_size=7)) == expected
+
+def test_bootstrap_cache_streams_a_miss(tmp_path):
+    cache = BootstrapCache(str(tmp_path))
+    read = []
+
+    def values():
+        for value in iter_world_file(WORLD_FILE):
+            read.append(value)
+            yield value
+
+    stream = cache.collect(WORLD_FILE, values())
+    first = next(stream)
+    # Values are handed on as they are parsed; the entry is written after the last one
+    assert read == [first]
+    assert cache.lookup(WORLD_FILE) is None
+    rest = list(stream)
+    assert cache.lookup(WORLD_FILE) == [first, *rest] == read
+
+def test_bootstrap_cache_serves_the_next_load(tmp_path):
+    cache = BootstrapCache(str(tmp_path))
+    worlds = []
+    for _ in range(2):
+        world = World(WORLD_FILE)
+        world.bootstrap_cache = cache
+        assert world.load()
+        worlds.append(world)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert worlds[0].rooms.keys() == worlds[1].rooms.keys()
+    assert worlds[0].items.prototypes == worlds[1].items.prototypes